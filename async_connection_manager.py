@@ -0,0 +1,425 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import threading
+from typing import Optional
+from client_handler import ClientHandler, _PAUSE_CHECK_INTERVAL, _POLLRDHUP
+from connection_manager import ConnectionManager
+
+# How long stop() lets clients flush what they still have queued before dropping them.
+_SHUTDOWN_GRACE = 0.1
+
+
+class AsyncClientHandler(ClientHandler):
+    """
+    ClientHandler driven by an asyncio transport instead of a thread of its
+    own. Received data is handed over by _ClientProtocol, and sends are
+    queued on the transport, so neither side ever blocks the event loop.
+
+    Sends made from outside the loop's thread are handed to the loop.
+    Cut-through relaying is not used: it streams between blocking sockets.
+    """
+
+    def __init__(self, transport: asyncio.Transport, client_address: tuple, **kwargs):
+        super().__init__(transport.get_extra_info('socket'), client_address, **kwargs)
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._pause_check = None
+        self._handshake_timer = None
+        self._writing_paused = False
+
+    def _on_loop(self) -> bool:
+        return threading.get_ident() == self._loop_thread_id
+
+    def _call(self, callback, *args):
+        if self._on_loop():
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def start(self):
+        self.is_running = True
+
+        if not self._handle_handshake():
+            self.error_handler.log_error(
+                f"Handshake failed for {self.client_address[0]}:{self.client_address[1]}",
+                "CLIENT_HANDLER"
+            )
+            self.stop()
+            return False
+
+        if self.config.handshake_timeout:
+            self._handshake_timer = self.loop.call_later(self.config.handshake_timeout, self._handshake_timed_out)
+
+        self.error_handler.log_info(
+            f"Client handler started for {self.client_address[0]}:{self.client_address[1]}",
+            "CLIENT_HANDLER"
+        )
+        return True
+
+    def stop(self):
+        self.is_running = False
+        self.chunk_assembler.clear()
+        try:
+            self._notify_disconnection()
+        except Exception:
+            pass
+        # connection_lost() follows and hands the receive buffer back.
+        self._call(self.transport.close)
+        self.error_handler.log_info(
+            f"Client handler stopped for {self.client_address[0]}:{self.client_address[1]}",
+            "CLIENT_HANDLER"
+        )
+
+    def _handle_handshake(self) -> bool:
+        try:
+            success = self.send_version_handshake()
+            if success:
+                self.version_handshake_complete = True
+            return success
+        except Exception as e:
+            self.error_handler.handle_client_error(
+                self.client_address, e, "handling handshake"
+            )
+            return False
+
+    def _on_handshake_complete(self):
+        if self._handshake_timer is not None:
+            self._handshake_timer.cancel()
+            self._handshake_timer = None
+
+    def _handshake_timed_out(self):
+        self._handshake_timer = None
+        if self.handshake.complete or self.transport.is_closing():
+            return
+        self.error_handler.log_warning(
+            f"Handshake with {self.client_address[0]}:{self.client_address[1]} timed out",
+            "HANDSHAKE"
+        )
+        self._notify_disconnection()
+        self.transport.abort()
+
+    def send_version_handshake(self) -> bool:
+        try:
+            self._write(self.packet_processor.templates.version_frame())
+            self.error_handler.log_debug("Version packet sent", "PACKET_OPERATIONS")
+            return True
+        except Exception as e:
+            self.error_handler.log_error(f"Failed to send version packet: {e}", "PACKET_OPERATIONS")
+            return False
+
+    def _write(self, data):
+        if self._on_loop():
+            self._write_now(data)
+        else:
+            self.loop.call_soon_threadsafe(self._write_now, bytes(data))
+
+    def _write_now(self, data):
+        if self.transport.is_closing():
+            return
+        self.transport.write(data)
+        # Only a transport past its high-water mark can be over the limit.
+        limit = self.config.max_send_backlog
+        if self._writing_paused and limit and self.transport.get_write_buffer_size() > limit:
+            self.abort(f"send backlog over max_send_backlog ({limit} bytes)")
+            return
+        self._report_memory()
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        self._report_memory()
+
+    def _send_backlog(self) -> int:
+        return self.transport.get_write_buffer_size()
+
+    def _try_cut_through(self, packet_size: int) -> bool:
+        return False
+
+    def _dispatch_packets(self, packets: list):
+        if self.dispatch_pool is None:
+            super()._dispatch_packets(packets)
+            return
+
+        # Waiting for room would stall every connection on the loop, so a full
+        # queue pauses reading from this one until its messages are handled.
+        self._submit_packets(packets, wait=False)
+        if self.dispatch_pool.policy == "block" and self.dispatch_pool.is_full(self):
+            self._pause()
+            self.dispatch_pool.when_idle(self, self.resume_reading)
+
+    def data_received(self, count: int):
+        self._process_received_data(count)
+        self._report_memory()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        if self.is_running:
+            if exc is None:
+                self.error_handler.log_info(
+                    f"Client {self.client_address[0]}:{self.client_address[1]} disconnected",
+                    "CLIENT_HANDLER"
+                )
+            else:
+                self.error_handler.handle_client_error(self.client_address, exc, "receiving data")
+        self._notify_disconnection()
+        self._on_handshake_complete()
+        if self._pause_check is not None:
+            self._pause_check.cancel()
+            self._pause_check = None
+        self._release_receive_buffer()
+
+    def pause_reading(self):
+        self._call(self._pause)
+
+    def resume_reading(self):
+        self._call(self._resume)
+
+    def _pause(self):
+        if self.transport.is_closing():
+            return
+        self.transport.pause_reading()
+        if self._pause_check is None:
+            self._pause_check = self.loop.call_later(_PAUSE_CHECK_INTERVAL, self._check_paused)
+
+    def _resume(self):
+        if self._pause_check is not None:
+            self._pause_check.cancel()
+            self._pause_check = None
+        if not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    def _check_paused(self):
+        # A paused transport doesn't read, so it wouldn't notice the peer closing,
+        # and the governor only hears of its backlog draining from here.
+        self._pause_check = None
+        if self.transport.is_closing() or self.transport.is_reading():
+            return
+        self._report_memory()
+        if self.transport.is_reading():
+            return
+        if _POLLRDHUP and self._peer_closed():
+            self.error_handler.log_info(
+                f"Client {self.client_address[0]}:{self.client_address[1]} disconnected while paused",
+                "CLIENT_HANDLER"
+            )
+            self.transport.abort()
+            return
+        self._pause_check = self.loop.call_later(_PAUSE_CHECK_INTERVAL, self._check_paused)
+
+    def abort(self, reason: str):
+        self.error_handler.log_warning(
+            f"Disconnecting {self.client_address[0]}:{self.client_address[1]}: {reason}",
+            "CLIENT_HANDLER"
+        )
+        self._notify_disconnection()
+        self._call(self.transport.abort)
+
+    def is_connected(self) -> bool:
+        return self.is_running and not self.transport.is_closing()
+
+
+class _ClientProtocol(asyncio.BufferedProtocol):
+    """
+    Feeds a connection's transport into its AsyncClientHandler. Data is
+    received straight into the handler's FrameBuffer.
+    """
+
+    def __init__(self, manager: 'AsyncConnectionManager'):
+        self.manager = manager
+        self.handler: Optional[AsyncClientHandler] = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.handler = self.manager._accept(transport)
+        if self.handler is None:
+            transport.abort()
+
+    def get_buffer(self, sizehint: int):
+        return self.handler.buffer.writable()
+
+    def buffer_updated(self, nbytes: int):
+        self.handler.data_received(nbytes)
+
+    def eof_received(self):
+        return False
+
+    def pause_writing(self):
+        self.handler.pause_writing()
+
+    def resume_writing(self):
+        self.handler.resume_writing()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        if self.handler is not None:
+            self.handler.connection_lost(exc)
+
+
+class AsyncConnectionManager(ConnectionManager):
+    """
+    ConnectionManager that runs every connection on a single asyncio event
+    loop in one thread: accepting, the version handshake, framing and the
+    message handlers. Idle clients cost their buffers and nothing else, where
+    the thread-per-client manager also pays for a thread and its stack.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+
+    def start(self) -> bool:
+        if self.is_running:
+            return True
+
+        ready = threading.Event()
+        self.accept_thread = threading.Thread(target=self._run_loop, args=(ready,), daemon=True)
+        self.accept_thread.start()
+        ready.wait()
+        return self.is_running
+
+    def _run_loop(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(loop.create_server(
+                lambda: _ClientProtocol(self),
+                self.config.server_host,
+                self.config.server_port,
+                reuse_address=True,
+                backlog=self.config.listen_backlog
+            ))
+        except Exception as e:
+            self.error_handler.handle_server_error(e, "starting connection manager")
+            loop.close()
+            ready.set()
+            return
+
+        self.loop = loop
+        self.is_running = True
+        self._start_cleanup_worker()
+        if self.dispatch_pool:
+            self.dispatch_pool.start()
+        ready.set()
+        self.error_handler.log_info(
+            f"Connection manager started on {self.config.server_host}:{self.config.server_port} (asyncio)",
+            "CONNECTION_MANAGER"
+        )
+
+        try:
+            loop.run_forever()
+            loop.run_until_complete(self._shutdown())
+        except Exception as e:
+            self.error_handler.handle_server_error(e, "running event loop")
+        finally:
+            loop.close()
+
+    def stop(self):
+        self.is_running = False
+        self._shutdown_in_progress = True
+        if self.dispatch_pool:
+            self.dispatch_pool.stop()
+
+        if self.loop and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+            except RuntimeError:
+                pass
+
+        if self.accept_thread and self.accept_thread.is_alive():
+            self.accept_thread.join(timeout=5.0)
+        self._stop_cleanup_worker()
+
+        self.error_handler.log_info("Connection manager stopped", "CONNECTION_MANAGER")
+
+    async def _shutdown(self):
+        self._server.close()
+        with self.clients_lock:
+            handlers = list(self.clients.values())
+        self._close_all_clients()
+
+        await asyncio.sleep(_SHUTDOWN_GRACE)
+        for client_handler in handlers:
+            client_handler.transport.abort()
+        # Lets the connection_lost() callbacks run and release their buffers.
+        await asyncio.sleep(0)
+        await self._server.wait_closed()
+
+    def _accept(self, transport: asyncio.Transport) -> Optional[AsyncClientHandler]:
+        client_address = transport.get_extra_info('peername')
+        reserved = False
+        try:
+            if not self._reserve_connection():
+                self.error_handler.log_warning(
+                    f"Connection limit reached, rejecting {client_address[0]}:{client_address[1]}",
+                    "CONNECTION_MANAGER"
+                )
+                return None
+            reserved = True
+
+            client_id = f"{client_address[0]}:{client_address[1]}"
+            client_handler = AsyncClientHandler(
+                transport,
+                client_address,
+                packet_processor=self.packet_processor,
+                error_handler=self.error_handler,
+                registry=self.registry,
+                message_handlers=self.message_handlers.copy(),
+                on_disconnect_callback=self._client_disconnected,
+                config=self.config,
+                relay_stream_opener=None,
+                memory_governor=self.memory_governor,
+                dispatch_pool=self.dispatch_pool
+            )
+
+            if not client_handler.start():
+                self.error_handler.log_warning(
+                    f"Failed to start client handler for {client_address[0]}:{client_address[1]}",
+                    "CONNECTION_MANAGER"
+                )
+                client_handler._release_receive_buffer()
+                return None
+
+            # The version goes out from the same callback that accepted the connection.
+            self._record_handshake(0.0)
+            reserved = False
+            if not self._register_client(client_id, client_handler):
+                return client_handler
+
+            self.error_handler.log_info(
+                f"New client connected: {client_address[0]}:{client_address[1]}",
+                "CONNECTION_MANAGER"
+            )
+
+            if self.on_client_connected:
+                try:
+                    self.on_client_connected(client_handler)
+                except Exception as e:
+                    self.error_handler.handle_client_error(
+                        client_address, e, "client connected callback"
+                    )
+            return client_handler
+
+        except Exception as e:
+            self.error_handler.handle_server_error(e, "accepting connections")
+            return None
+        finally:
+            if reserved:
+                self._release_connection()
@@ -17,8 +17,16 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 from .bm_parameter import BMParameter
-
+from .schema import message, Field, Objects, INT, UTF
+
+@message(
+    Field("id", INT),
+    Field("method", UTF),
+    Field("return_method", UTF),
+    Objects("params_list", count=INT),
+)
 class BMInvoke:
+    __slots__ = ('id', 'method', 'return_method', 'params_list')
     SOURCE = None
 
     def __init__(self, iid=0, method="", *args):
@@ -43,32 +51,4 @@ class BMInvoke:
         return self.method
 
     def set_return_method(self, method):
-        self.return_method = method
-
-    def read_external(self, data_input):
-        self.id = data_input.readInt()
-        self.method = data_input.readUTF()
-        self.return_method = data_input.readUTF()
-        num_params = data_input.readInt()
-        self.params_list = []
-
-        if num_params > 0:
-            for i in range(num_params):
-                param = data_input.readObject()
-                self.params_list.append(param)
-
-    def write_external(self, data_output):
-        if hasattr(data_output, 'write_int'):
-            data_output.write_int(self.id)
-            data_output.write_utf(self.method or "")
-            data_output.write_utf(self.return_method or "")
-            data_output.write_int(len(self.params_list))
-            for param in self.params_list:
-                data_output.write_object(param)
-        else:  # DataOutput object
-            data_output.writeInt(self.id)
-            data_output.writeUTF(self.method or "")
-            data_output.writeUTF(self.return_method or "")
-            data_output.writeInt(len(self.params_list))
-            for param in self.params_list:
-                data_output.writeObject(param)
\ No newline at end of file
+        self.return_method = method
\ No newline at end of file
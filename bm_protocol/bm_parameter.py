@@ -16,7 +16,14 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+from .schema import message, Tagged
+
+@message(
+    Tagged("encoding", "value"),
+)
 class BMParameter:
+    __slots__ = ('encoding', 'value')
+
     def __init__(self, default_value=None):
         self.encoding = None
         self.value = None
@@ -40,73 +47,5 @@ class BMParameter:
             else:
                 raise ValueError(f"Unrecognized object: {type(self.value)} {self.value}")
 
-    def read_external(self, data_input):
-        self.encoding = data_input.readUTF()
-
-        if self.encoding == "i":
-            self.value = data_input.readInt()
-        elif self.encoding == "I":
-            self.value = data_input.readUnsignedInt()
-        elif self.encoding == "s":
-            self.value = data_input.readShort()
-        elif self.encoding == "S":
-            self.value = data_input.readUnsignedShort()
-        elif self.encoding == "f":
-            self.value = data_input.readFloat()
-        elif self.encoding == "d":
-            self.value = data_input.readDouble()
-        elif self.encoding == "B":
-            self.value = data_input.readBoolean()
-        elif self.encoding == "*":
-            self.value = data_input.readUTF()
-        elif self.encoding == "@":
-            self.value = data_input.readObject()
-
-    def write_external(self, data_output):
-        if hasattr(data_output, 'write_utf'):
-            data_output.write_utf(self.encoding)
-            self._write_value_stream(data_output)
-        else:
-            data_output.writeUTF(self.encoding)
-            self._write_value_dataoutput(data_output)
-
-    def _write_value_stream(self, data_output):
-        if self.value is not None:
-            if self.encoding == "i":
-                data_output.write_int(self.value)
-            elif self.encoding == "I":
-                data_output.write_unsigned_int(self.value)
-            elif self.encoding in ["s", "S"]:
-                data_output.write_short(self.value)
-            elif self.encoding == "f":
-                data_output.write_float(self.value)
-            elif self.encoding == "d":
-                data_output.write_double(self.value)
-            elif self.encoding == "B":
-                data_output.write_boolean(self.value)
-            elif self.encoding == "*":
-                data_output.write_utf(self.value)
-            elif self.encoding == "@":
-                data_output.write_object(self.value)
-
-    def _write_value_dataoutput(self, data_output):
-        if self.value is not None:
-            if self.encoding == "i":
-                data_output.writeInt(self.value)
-            elif self.encoding == "I":
-                data_output.writeUnsignedInt(self.value)
-            elif self.encoding in ["s", "S"]:
-                data_output.writeShort(self.value)
-            elif self.encoding == "f":
-                data_output.writeFloat(self.value)
-            elif self.encoding == "d":
-                data_output.writeDouble(self.value)
-            elif self.encoding == "B":
-                data_output.writeBoolean(self.value)
-            elif self.encoding == "*":
-                data_output.writeUTF(self.value)
-            elif self.encoding == "@":
-                data_output.writeObject(self.value)
-
     def __str__(self):
         return f"BMParameter [encoding={self.encoding}, value={self.value.__str__()}]"
\ No newline at end of file
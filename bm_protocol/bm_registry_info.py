@@ -16,100 +16,33 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from pyamf import amf3
-
+from .schema import message, Field, When, SHORT, UTF, OBJECT
+
+@message(
+    Field("device", OBJECT),
+    Field("address", OBJECT, required=True),
+    Field("app_id", UTF),
+    Field("slot_id", SHORT),
+    When("self.slot_id > 0",
+         Field("current_clients", SHORT),
+         Field("max_clients", SHORT)),
+    after_read="_attach_address",
+)
 class BMRegistryInfo:
-    def __init__(self):
-        self._slot_id = 0
-        self._app_id = ""
-        self._max_clients = 0
-        self._current_clients = 0
-        self._device = None
-        self._address = None
-
-    @property
-    def max_clients(self):
-        return self._max_clients
-
-    @max_clients.setter
-    def max_clients(self, value):
-        self._max_clients = value
-
-    @property
-    def current_clients(self):
-        return self._current_clients
-
-    @current_clients.setter
-    def current_clients(self, value):
-        self._current_clients = value
-
-    @property
-    def slot_id(self):
-        return self._slot_id
-
-    @slot_id.setter
-    def slot_id(self, value):
-        self._slot_id = value
+    __slots__ = ('device', 'address', 'app_id', 'slot_id', 'current_clients', 'max_clients')
 
-    @property
-    def app_id(self):
-        return self._app_id
-
-    @app_id.setter
-    def app_id(self, value: str):
-        self._app_id = value
-
-    @property
-    def device(self):
-        return self._device
-
-    @device.setter
-    def device(self, value):
-        self._device = value
-
-    @property
-    def address(self):
-        return self._address
-
-    @address.setter
-    def address(self, value):
-        self._address = value
-
-    def read_external(self, data_input: amf3.DataInput):
-        self._device = data_input.readObject()
-        self._address = data_input.readObject()
-        self._device.address = self._address
-        self._app_id = data_input.readUTF()
-        self._slot_id = data_input.readShort()
-        if self._slot_id > 0:
-            self._current_clients = data_input.readShort()
-            self._max_clients = data_input.readShort()
+    def __init__(self):
+        self.slot_id = 0
+        self.app_id = ""
+        self.max_clients = 0
+        self.current_clients = 0
+        self.device = None
+        self.address = None
 
-    def write_external(self, data_output):
-        if hasattr(data_output, 'write_object'):
-            data_output.write_object(self._device)
-            if self._address is not None:
-                data_output.write_object(self._address)
-                data_output.write_utf(self._app_id)
-                data_output.write_short(self._slot_id)
-                if self._slot_id > 0:
-                    data_output.write_short(self._current_clients)
-                    data_output.write_short(self._max_clients)
-            else:
-                raise Exception("Address is None")
-        else:
-            data_output.writeObject(self._device)
-            if self._address is not None:
-                data_output.writeObject(self._address)
-                data_output.writeUTF(self._app_id)
-                data_output.writeShort(self._slot_id)
-                if self._slot_id > 0:
-                    data_output.writeShort(self._current_clients)
-                    data_output.writeShort(self._max_clients)
-            else:
-                raise Exception("Address is None")
+    def _attach_address(self):
+        self.device.address = self.address
 
     def __str__(self):
-        return (f"BMRegistryInfo(slot_id={self._slot_id}, app_id={self._app_id}, "
-                f"max_clients={self._max_clients}, current_clients={self._current_clients}, "
-                f"device={self._device}, address={self._address})")
\ No newline at end of file
+        return (f"BMRegistryInfo(slot_id={self.slot_id}, app_id={self.app_id}, "
+                f"max_clients={self.max_clients}, current_clients={self.current_clients}, "
+                f"device={self.device}, address={self.address})")
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from typing import Any, Dict
+
+MIN_BUFFER_SIZE = 512
+DEFAULT_MAX_FREE_BYTES = 16 * 1024 * 1024  # 16 MiB
+
+
+def size_class(size: int) -> int:
+    """Smallest power of two that holds size, never below MIN_BUFFER_SIZE."""
+    if size <= MIN_BUFFER_SIZE:
+        return MIN_BUFFER_SIZE
+    return 1 << (size - 1).bit_length()
+
+
+class BufferPool:
+    """
+    Process-wide free lists of receive buffers, one per power-of-two size
+    class. Connections lease a buffer when they need one and release it
+    when they are done with it, so buffers are reused instead of reallocated.
+    At most max_free_bytes are kept idle; leased_bytes accounts for every
+    buffer currently held by a connection.
+    """
+
+    def __init__(self, max_free_bytes: int = DEFAULT_MAX_FREE_BYTES):
+        self.max_free_bytes = max_free_bytes
+        self._free: Dict[int, list] = {}
+        self._lock = threading.Lock()
+        self.free_bytes = 0
+        self.leased = 0
+        self.leased_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def lease(self, size: int) -> bytearray:
+        size = size_class(size)
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                buf = free.pop()
+                self.free_bytes -= size
+                self.hits += 1
+            else:
+                buf = None
+                self.misses += 1
+            self.leased += 1
+            self.leased_bytes += size
+
+        return buf if buf is not None else bytearray(size)
+
+    def release(self, buf: bytearray):
+        size = len(buf)
+        with self._lock:
+            self.leased -= 1
+            self.leased_bytes -= size
+            if size != size_class(size) or self.free_bytes + size > self.max_free_bytes:
+                self.dropped += 1
+                return
+            self._free.setdefault(size, []).append(buf)
+            self.free_bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self.free_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'leased': self.leased,
+                'leased_bytes': self.leased_bytes,
+                'free_bytes': self.free_bytes,
+                'max_free_bytes': self.max_free_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'dropped': self.dropped,
+                'free_by_size': {size: len(free) for size, free in sorted(self._free.items()) if free},
+            }
+
+
+_buffer_pool = BufferPool()
+
+
+def get_buffer_pool() -> BufferPool:
+    return _buffer_pool
+
+
+def configure_buffer_pool(max_free_bytes: int):
+    _buffer_pool.max_free_bytes = max_free_bytes
@@ -16,69 +16,58 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from pyamf import amf3
+import struct
+
+_SIZE = struct.Struct('<I')
 
 class ByteChunk:
+    __slots__ = ('_size', '_raw_chunk', '_chunk')
+
     def __init__(self):
-        self.size = 0
-        self.raw_chunk = None
-        self.chunk = None
+        self._size = 0
+        self._raw_chunk = None
+        self._chunk = None
 
     @property
     def size(self):
-        return self.size
+        return self._size
 
     @size.setter
     def size(self, value):
-        self.size = value
+        self._size = value
 
     @property
     def raw_chunk(self):
-        return self.raw_chunk
+        return self._raw_chunk
 
     @raw_chunk.setter
     def raw_chunk(self, value):
-        self.raw_chunk = value
+        self._raw_chunk = value
 
     @property
     def chunk(self):
-        return self.chunk
+        return self._chunk
 
     @chunk.setter
     def chunk(self, value):
-        self.chunk = value
+        self._chunk = value
 
     @staticmethod
     def can_read(input_stream):
         if input_stream.remaining() > 4:
-            size = (input_stream.readByte() & 0xFF |
-                    (input_stream.readByte() & 0xFF) << 8 |
-                    (input_stream.readByte() & 0xFF) << 16 |
-                    (input_stream.readByte() & 0xFF) << 24)
+            size = input_stream.unpack(_SIZE)[0]
 
             if input_stream.remaining() >= size:
                 return True
         return False
 
     def read_external(self, input_stream):
-        self.size = (input_stream.readByte() & 0xFF |
-                     (input_stream.readByte() & 0xFF) << 8 |
-                     (input_stream.readByte() & 0xFF) << 16 |
-                     (input_stream.readByte() & 0xFF) << 24)
-
-        expected_size = self.size
-        self.raw_chunk = amf3.ByteArray()
-
-        while expected_size > 0 and input_stream.remaining() > 0:
-            self.raw_chunk.writeByte(input_stream.readByte())
-            expected_size -= 1
+        self.size = input_stream.unpack(_SIZE)[0]
+        self.raw_chunk = input_stream.read_bytes(min(self.size, input_stream.remaining()))
 
     def write_external(self, output_stream):
-        output_stream.writeByte(self.size & 0xFF)
-        output_stream.writeByte((self.size >> 8) & 0xFF)
-        output_stream.writeByte((self.size >> 16) & 0xFF)
-        output_stream.writeByte((self.size >> 24) & 0xFF)
+        output_stream.pack(_SIZE, self.size & 0xFFFFFFFF)
 
         if self.chunk is not None:
             if isinstance(self.chunk, bool):
-                output_stream.writeObject(self.chunk)
\ No newline at end of file
+                output_stream.writeObject(self.chunk)
@@ -0,0 +1,178 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import bisect
+import mmap
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_SPILL_THRESHOLD = 1024 * 1024  # 1 MiB
+DEFAULT_MAX_SET_SIZE = 64 * 1024 * 1024  # 64 MiB
+DEFAULT_MAX_SETS = 16
+
+
+class ChunkSet:
+    """
+    Destination buffer for one set_id. Chunks are copied straight to their
+    start_byte; sets larger than the spill threshold live in an mmap'd
+    temporary file instead of the heap. The byte ranges received so far are
+    tracked, so overlapping or repeated chunks count only once.
+    """
+
+    def __init__(self, set_id: str, total_size: int, spill_threshold: int):
+        self.set_id = set_id
+        self.total_size = total_size
+        self.received = 0
+        # Sorted, disjoint [start, end) ranges received so far.
+        self._starts = []
+        self._ends = []
+        self._file = None
+
+        if total_size > spill_threshold:
+            self._file = tempfile.TemporaryFile()
+            self._file.truncate(total_size)
+            self._buffer = mmap.mmap(self._file.fileno(), total_size)
+        else:
+            self._buffer = bytearray(total_size)
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.total_size
+
+    def add(self, start_byte: int, data) -> bool:
+        size = len(data)
+        if start_byte < 0 or start_byte + size > self.total_size:
+            raise ValueError(
+                f"Chunk {start_byte}+{size} is outside byte set {self.set_id} of {self.total_size} bytes"
+            )
+        end = start_byte + size
+        # Ranges that overlap or touch this chunk are merged with it.
+        first = bisect.bisect_left(self._ends, start_byte)
+        last = bisect.bisect_right(self._starts, end)
+        if first < last:
+            if self._starts[first] <= start_byte and end <= self._ends[first]:
+                return False
+            merged = sum(self._ends[i] - self._starts[i] for i in range(first, last))
+            start = min(start_byte, self._starts[first])
+            end = max(end, self._ends[last - 1])
+        elif size == 0:
+            return False
+        else:
+            merged = 0
+            start = start_byte
+
+        self._buffer[start_byte:start_byte + size] = data
+        self._starts[first:last] = [start]
+        self._ends[first:last] = [end]
+        self.received += end - start - merged
+        return True
+
+    def view(self) -> memoryview:
+        return memoryview(self._buffer)
+
+    def getvalue(self) -> bytes:
+        return bytes(self._buffer)
+
+    def close(self):
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+            self._file = None
+        self._buffer = bytearray()
+
+
+class ChunkAssembler:
+    """
+    Reassembles BMByteChunk sets keyed by set_id. add() returns the ChunkSet
+    once its last chunk arrives; the caller owns it from then on and should
+    close() it when done. At most max_sets sets are in flight, the oldest
+    being dropped to make room.
+
+    Safe to use from several threads: chunks are added by whichever thread
+    handles them while buffered_bytes is read by the receiving one.
+    """
+
+    def __init__(self, spill_threshold: int = DEFAULT_SPILL_THRESHOLD,
+                 max_set_size: int = DEFAULT_MAX_SET_SIZE, max_sets: int = DEFAULT_MAX_SETS):
+        self.spill_threshold = spill_threshold
+        self.max_set_size = max_set_size
+        self.max_sets = max_sets
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+        # Total size of the sets in _sets, changed only where sets come and go.
+        self._buffered = 0
+
+    def add(self, chunk):
+        data = chunk.bytes
+        if hasattr(data, 'getvalue'):
+            data = data.getvalue()
+
+        with self._lock:
+            chunk_set = self._sets.get(chunk.set_id)
+            if chunk_set is None:
+                total_size = chunk.total_size
+                if total_size < 0 or total_size > self.max_set_size:
+                    raise ValueError(
+                        f"Byte set {chunk.set_id} of {total_size} bytes exceeds the limit of {self.max_set_size}"
+                    )
+                while len(self._sets) >= self.max_sets:
+                    self._free(self._sets.popitem(last=False)[1])
+                chunk_set = ChunkSet(chunk.set_id, total_size, self.spill_threshold)
+                self._sets[chunk.set_id] = chunk_set
+                self._buffered += total_size
+            elif chunk.total_size != chunk_set.total_size:
+                raise ValueError(
+                    f"Byte set {chunk.set_id} changed size from {chunk_set.total_size} to {chunk.total_size}"
+                )
+
+            chunk_set.add(chunk.start_byte, data[:chunk.chunk_size])
+
+            if chunk_set.complete:
+                del self._sets[chunk.set_id]
+                self._buffered -= chunk_set.total_size
+                return chunk_set
+        return None
+
+    def _free(self, chunk_set: ChunkSet):
+        self._buffered -= chunk_set.total_size
+        chunk_set.close()
+
+    def discard(self, set_id: str):
+        with self._lock:
+            chunk_set = self._sets.pop(set_id, None)
+            if chunk_set is not None:
+                self._free(chunk_set)
+
+    def clear(self):
+        with self._lock:
+            for chunk_set in self._sets.values():
+                chunk_set.close()
+            self._sets.clear()
+            self._buffered = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._buffered
+
+    def __len__(self):
+        return len(self._sets)
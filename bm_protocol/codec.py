@@ -0,0 +1,130 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from pyamf import amf3
+from .stream import Stream
+from .fast_stream import FastStream, StringTable
+from .lazy_packet import read_lazy_packet, LazyPacket, LazyInvoke
+from .packet import Packet
+from .bm_invoke import BMInvoke
+from .bm_parameter import BMParameter
+from .bm_byte_chunk import BMByteChunk
+from .byte_chunk import ByteChunk
+from .object_pool import enable_pool, disable_pools, release, DEFAULT_POOL_SIZE
+
+DECODER_BACKENDS = ("pyamf", "struct")
+DEFAULT_DECODER_BACKEND = "struct"
+
+_decoder_backend = DEFAULT_DECODER_BACKEND
+_lazy_decoding = True
+_object_pooling = False
+
+POOLED_CLASSES = (Packet, LazyPacket, BMInvoke, LazyInvoke, BMParameter)
+
+
+def set_decoder_backend(name: str):
+    global _decoder_backend
+    if name not in DECODER_BACKENDS:
+        raise ValueError(f"Unknown decoder backend: {name}")
+    _decoder_backend = name
+
+
+def get_decoder_backend() -> str:
+    return _decoder_backend
+
+
+def set_lazy_decoding(enabled: bool):
+    global _lazy_decoding
+    _lazy_decoding = bool(enabled)
+
+
+def set_object_pooling(enabled: bool, max_size: int = DEFAULT_POOL_SIZE):
+    global _object_pooling
+    _object_pooling = bool(enabled)
+    if _object_pooling:
+        for cls in POOLED_CLASSES:
+            enable_pool(cls, max_size)
+    else:
+        disable_pools()
+
+
+def create_input_stream(data, registry=None, backend: str = None, strings=None):
+    """
+    Wraps one frame's payload in a stream of the selected decoder backend.
+    The "pyamf" backend is the original Stream over an amf3.ByteArray,
+    the "struct" backend is FastStream reading the bytes in place.
+    """
+    backend = backend or _decoder_backend
+    if backend == "struct":
+        return FastStream(data, registry, strings)
+
+    byte_array = amf3.ByteArray(bytes(data))
+    byte_array.endian = '<'
+    return Stream(byte_array, registry)
+
+
+def read_packet(data, registry=None, strings=None):
+    """
+    Decodes one received frame payload. With the "struct" backend and lazy
+    decoding enabled this returns a LazyPacket that leaves invoke parameters
+    and non-invoke messages encoded until a handler touches them.
+    strings is the connection's StringTable; the pyamf backend ignores it.
+    """
+    if _decoder_backend == "struct" and _lazy_decoding:
+        return read_lazy_packet(data, registry, strings)
+    return create_input_stream(data, registry, strings=strings).read_object()
+
+
+def release_packet(packet):
+    """
+    Returns a handled packet, its invoke and the invoke's parameters to their
+    pools when object pooling is on. None of them may be used afterwards.
+    Parts a lazy packet never decoded are left alone.
+    """
+    if not _object_pooling or packet is None:
+        return
+
+    message = None
+    if not isinstance(packet, LazyPacket) or packet.message_decoded:
+        message = getattr(packet, 'message', None)
+
+    if isinstance(message, BMInvoke) and (not isinstance(message, LazyInvoke) or message.params_decoded):
+        release(*message.params_list)
+    release(message, packet)
+
+
+def detach_packet(packet):
+    """
+    Copies the parts of a decoded packet that still point into its frame, so it
+    can be kept past the next receive. The struct backend reads in place: the
+    encoded parts of a lazy packet and the payload of a byte chunk are views
+    of the connection's receive buffer.
+    """
+    if isinstance(packet, LazyPacket):
+        packet.detach()
+        return
+
+    message = getattr(packet, 'message', None)
+    if isinstance(message, BMByteChunk):
+        if isinstance(message.bytes, memoryview):
+            message.bytes = bytes(message.bytes)
+    elif isinstance(message, BMInvoke):
+        for param in message.params_list:
+            value = getattr(param, 'value', None)
+            if isinstance(value, ByteChunk) and isinstance(value.raw_chunk, memoryview):
+                value.raw_chunk = bytes(value.raw_chunk)
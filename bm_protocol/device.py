@@ -17,42 +17,18 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 from .device_type import DeviceType
+from .schema import message, Field, INT, UTF
 
+@message(
+    Field("device_type", INT, decode=DeviceType.for_value, encode=DeviceType.value_of),
+    Field("device_id", UTF),
+    Field("device_name", UTF),
+)
 class Device:
+    __slots__ = ('device_type', 'device_id', 'device_name', 'address')
+
     def __init__(self, device_id="", device_name="", address=None):
-        self._device_id = device_id
+        self.device_id = device_id
         self.device_name = device_name
-        self._address = address
+        self.address = address
         self.device_type = DeviceType.SERVER
-
-    @property
-    def device_id(self):
-        return self._device_id
-
-    @device_id.setter
-    def device_id(self, value: str):
-        self._device_id = value
-
-    @property
-    def address(self):
-        return self._address
-
-    @address.setter
-    def address(self, value):
-        self._address = value
-
-    def read_external(self, data_input):
-        device_type_int = data_input.readInt()
-        self.device_type = DeviceType.for_value(device_type_int)
-        self.device_id = data_input.readUTF()
-        self.device_name = data_input.readUTF()
-
-    def write_external(self, data_output):
-        if hasattr(data_output, 'write_int'):
-            data_output.write_int(self.device_type.get_device_type() if self.device_type else 0)
-            data_output.write_utf(self.device_id or "")
-            data_output.write_utf(self.device_name or "")
-        else:
-            data_output.writeInt(self.device_type.get_device_type() if self.device_type else 0)
-            data_output.writeUTF(self.device_id or "")
-            data_output.writeUTF(self.device_name or "")
\ No newline at end of file
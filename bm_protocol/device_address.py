@@ -16,25 +16,20 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+from .schema import message, Field, INT, UTF
+
+# The port is sent twice on the wire; the second copy is the one that is kept.
+@message(
+    Field("host", UTF),
+    Field("port", INT),
+    Field("port", INT),
+)
 class DeviceAddress:
+    __slots__ = ('host', 'port')
+
     def __init__(self, host="", port=0):
         self.host = host
         self.port = port
 
-    def read_external(self, data_input):
-        self.host = data_input.readUTF()
-        data_input.readInt()
-        self.port = data_input.readInt()
-
-    def write_external(self, data_output):
-        if hasattr(data_output, 'write_utf'):
-            data_output.write_utf(self.host)
-            data_output.write_int(self.port)
-            data_output.write_int(self.port)
-        else:
-            data_output.writeUTF(self.host)
-            data_output.writeInt(self.port)
-            data_output.writeInt(self.port)
-
     def __str__(self):
         return f"DeviceAddress [host={self.host}, port={self.port}]"
\ No newline at end of file
@@ -16,80 +16,40 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-class DeviceType:
-    _ANY_DEVICE_TYPE = 0
-    _UNITY_DEVICE_TYPE = 1
-    _IPHONE_DEVICE_TYPE = 2
-    _FLASH_DEVICE_TYPE = 3
-    _ANDROID_DEVICE_TYPE = 4
-    _NATIVE_DEVICE_TYPE = 5
-    _PALM_DEVICE_TYPE = 6
-    _SERVER_DEVICE_TYPE = 7
-
-    # Pre-declare values for the IDE
-    ANY = None
-    UNITY = None
-    IPHONE = None
-    FLASH = None
-    ANDROID = None
-    NATIVE = None
-    PALM = None
-    SERVER = None
-    values = []
-    value_names = []
-
-    _enum_created = False
-
-    def __init__(self, value):
-        if DeviceType._enum_created:
-            raise RuntimeError("The enum is already created.")
-        self._value = value
+from enum import IntEnum
+
+class DeviceType(IntEnum):
+    ANY = 0
+    UNITY = 1
+    IPHONE = 2
+    FLASH = 3
+    ANDROID = 4
+    NATIVE = 5
+    PALM = 6
+    SERVER = 7
 
     @staticmethod
     def for_value(value):
-        return DeviceType.values[value]
+        return _DEVICE_TYPES[value]
 
     @staticmethod
-    def value(value):
-        return DeviceType.value_names[value]
+    def value_of(device_type):
+        return int(device_type) if device_type else 0
 
     def get_device_type(self):
-        return self._value
+        return int(self)
 
     def to_string(self):
-        return f"[DeviceType {DeviceType.value_names[self._value]}]"
+        return f"[DeviceType {self.name}]"
 
     def __str__(self):
         return self.to_string()
 
-DeviceType.ANY = DeviceType(DeviceType._ANY_DEVICE_TYPE)
-DeviceType.UNITY = DeviceType(DeviceType._UNITY_DEVICE_TYPE)
-DeviceType.IPHONE = DeviceType(DeviceType._IPHONE_DEVICE_TYPE)
-DeviceType.FLASH = DeviceType(DeviceType._FLASH_DEVICE_TYPE)
-DeviceType.ANDROID = DeviceType(DeviceType._ANDROID_DEVICE_TYPE)
-DeviceType.NATIVE = DeviceType(DeviceType._NATIVE_DEVICE_TYPE)
-DeviceType.PALM = DeviceType(DeviceType._PALM_DEVICE_TYPE)
-DeviceType.SERVER = DeviceType(DeviceType._SERVER_DEVICE_TYPE)
+# Wire value -> member, indexed directly instead of going through DeviceType(value).
+_DEVICE_TYPES = tuple(DeviceType)
 
-DeviceType.values = [
-    DeviceType.ANY,
-    DeviceType.UNITY,
-    DeviceType.IPHONE,
-    DeviceType.FLASH,
-    DeviceType.ANDROID,
-    DeviceType.NATIVE,
-    DeviceType.PALM,
-    DeviceType.SERVER
-]
+DeviceType.values = _DEVICE_TYPES
+DeviceType.value_names = tuple(device_type.name for device_type in _DEVICE_TYPES)
 
-DeviceType.value_names = [
-    "ANY",
-    "UNITY",
-    "IPHONE",
-    "FLASH",
-    "ANDROID",
-    "NATIVE",
-    "PALM",
-    "SERVER"
-]
-DeviceType._enum_created = True
+# Game hosts, as opposed to controller apps.
+GAME_DEVICE_TYPES = frozenset((DeviceType.FLASH, DeviceType.UNITY))
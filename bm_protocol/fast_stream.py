@@ -0,0 +1,305 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+from .registry import Registry
+from .object_pool import acquire
+from .schema import TAG_STRUCTS, MIN_TAGGED_RUN, run_struct
+
+_SHORT = struct.Struct('<h')
+_USHORT = struct.Struct('<H')
+_INT = struct.Struct('<i')
+_UINT = struct.Struct('<I')
+_FLOAT = struct.Struct('<f')
+_DOUBLE = struct.Struct('<d')
+_BYTE = struct.Struct('<b')
+# Length prefix, tag and class id of an object written as utf "@" + short.
+_OBJECT_HEADER = struct.Struct('<H1sh')
+
+
+class StringTable:
+    """
+    Bounded table of recently decoded strings keyed by their utf-8 bytes.
+    Shared by every frame of a connection so repeated ids and method names
+    resolve to one str object without being decoded again.
+    """
+
+    MAX_LENGTH = 64
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._strings = {}
+
+    def decode(self, raw) -> str:
+        if len(raw) > self.MAX_LENGTH:
+            return str(raw, 'utf-8')
+        # raw may be a view of a writable receive buffer, which can't be hashed.
+        key = bytes(raw)
+        value = self._strings.get(key)
+        if value is None:
+            value = str(key, 'utf-8')
+            if len(self._strings) >= self.max_size:
+                self._strings.clear()
+            self._strings[key] = value
+        return value
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class FastStream:
+    """
+    Read-only counterpart of Stream that decodes straight from a memoryview.
+    Every read is a precompiled struct unpack at an integer cursor, so there is
+    no pyamf ByteArray, no seeking and no per-field method chain.
+    """
+
+    def __init__(self, data=b"", registry=None, strings: StringTable = None):
+        if hasattr(data, 'getvalue'):
+            data = data.getvalue()
+
+        self.registry = registry
+        self.strings = strings
+        self.buf = memoryview(data)
+        self.pos = 0
+        self.end = len(self.buf)
+
+    @staticmethod
+    def _get_class_for_id(class_id: int):
+        return Registry.class_for_id_global(class_id)
+
+    def _underflow(self, length: int):
+        raise IOError(f"Tried to read {length} byte(s) from the stream")
+
+    def read_short(self):
+        try:
+            value = _SHORT.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(2)
+        self.pos += 2
+        return value
+
+    def read_unsigned_short(self):
+        try:
+            value = _USHORT.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(2)
+        self.pos += 2
+        return value
+
+    def read_utf(self):
+        pos = self.pos
+        try:
+            _len = _SHORT.unpack_from(self.buf, pos)[0]
+        except struct.error:
+            self._underflow(2)
+        start = pos + 2
+        end = start + _len
+        if _len < 0 or end > self.end:
+            self._underflow(_len)
+        self.pos = end
+        if self.strings is not None:
+            return self.strings.decode(self.buf[start:end])
+        return str(self.buf[start:end], 'utf-8')
+
+    def read_double(self):
+        try:
+            value = _DOUBLE.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(8)
+        self.pos += 8
+        return value
+
+    def read_int(self):
+        try:
+            value = _INT.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(4)
+        self.pos += 4
+        return value
+
+    def read_byte(self):
+        try:
+            value = _BYTE.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(1)
+        self.pos += 1
+        return value
+
+    def read_boolean(self):
+        pos = self.pos
+        if pos >= self.end:
+            self._underflow(1)
+        byte = self.buf[pos]
+        self.pos = pos + 1
+        if byte == 0:
+            return False
+        elif byte == 1:
+            return True
+        raise ValueError("Error reading boolean")
+
+    def read_unsigned_int(self):
+        try:
+            value = _UINT.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(4)
+        self.pos += 4
+        return value
+
+    def read_float(self):
+        try:
+            value = _FLOAT.unpack_from(self.buf, self.pos)[0]
+        except struct.error:
+            self._underflow(4)
+        self.pos += 4
+        return value
+
+    def unpack(self, fmt: struct.Struct):
+        pos = self.pos
+        try:
+            values = fmt.unpack_from(self.buf, pos)
+        except struct.error:
+            self._underflow(fmt.size)
+        self.pos = pos + fmt.size
+        return values
+
+    def read_bytes(self, length: int):
+        start = self.pos
+        end = start + length
+        if length < 0 or end > self.end:
+            self._underflow(length)
+        self.pos = end
+        return self.buf[start:end]
+
+    def read_tagged_run(self, max_count: int):
+        """
+        Decodes the longest run (up to max_count) of tagged scalars sharing the
+        next element's tag with a single unpack. The run is found by checking
+        the tag column of the buffer at the element stride. Returns None when
+        the next element doesn't start a run of at least MIN_TAGGED_RUN.
+        """
+        pos = self.pos
+        buf = self.buf
+        if pos + 3 > self.end or buf[pos] != 1 or buf[pos + 1] != 0:
+            return None
+        tag = chr(buf[pos + 2])
+        fmt = TAG_STRUCTS.get(tag)
+        if fmt is None:
+            return None
+
+        stride = 3 + fmt.size
+        count = min(max_count, (self.end - pos) // stride)
+        if count < MIN_TAGGED_RUN:
+            return None
+
+        region = buf[pos:pos + count * stride]
+        tags = region[2::stride].tobytes()
+        count -= len(tags.lstrip(tags[:1]))
+        lows = region[0:count * stride:stride].tobytes()
+        count -= len(lows.lstrip(b"\x01"))
+        highs = region[1:count * stride:stride].tobytes()
+        count -= len(highs.lstrip(b"\x00"))
+        if count < MIN_TAGGED_RUN:
+            return None
+
+        values = run_struct(tag, count).unpack_from(buf, pos)
+        self.pos = pos + count * stride
+        return values
+
+    def read_object_header(self) -> int:
+        """
+        Consumes the tag and class id of the next object and returns the id,
+        leaving the cursor on the object's body.
+        """
+        try:
+            length, tag, _type = _OBJECT_HEADER.unpack_from(self.buf, self.pos)
+        except struct.error:
+            length = tag = None
+
+        if length == 1 and tag == b"@":
+            self.pos += 5
+            return _type
+
+        encoding: str = self.read_utf()
+        if len(encoding) > 1:
+            from .stream import Stream
+            Stream.ERROR_DATA = encoding
+            raise Exception("Bad parsing!")
+        return self.read_short()
+
+    def read_rest(self):
+        start = self.pos
+        self.pos = self.end
+        return self.buf[start:self.end]
+
+    def read_object(self):
+        try:
+            length, tag, _type = _OBJECT_HEADER.unpack_from(self.buf, self.pos)
+        except struct.error:
+            length = tag = None
+
+        if length == 1 and tag == b"@":
+            self.pos += 5
+        else:
+            encoding: str = self.read_utf()
+            if len(encoding) > 1:
+                from .stream import Stream
+                Stream.ERROR_DATA = encoding
+                raise Exception("Bad parsing!")
+
+            _type: int = self.read_short()
+
+        obj_class = self._get_class_for_id(_type)
+
+        if obj_class:
+            instance = acquire(obj_class)
+            if hasattr(instance, 'read_external'):
+                instance.read_external(self)
+            return instance
+
+        # The body of an unknown class can't be skipped, so the rest of the frame is unreadable.
+        raise IOError(f"No class registered for ID: {_type}")
+
+    # The message classes use the ActionScript-style names, so alias them
+    # directly instead of adding another call per field.
+    readShort = read_short
+    readUnsignedShort = read_unsigned_short
+    readUTF = read_utf
+    readDouble = read_double
+    readInt = read_int
+    readByte = read_byte
+    readBoolean = read_boolean
+    readUnsignedInt = read_unsigned_int
+    readFloat = read_float
+    readObject = read_object
+
+    def remaining(self):
+        return self.end - self.pos
+
+    def getvalue(self):
+        return self.buf.tobytes()
+
+    def seek(self, position, whence=0):
+        if whence == 1:
+            position += self.pos
+        elif whence == 2:
+            position += self.end
+        self.pos = min(max(position, 0), self.end)
+
+    def tell(self):
+        return self.pos
@@ -20,16 +20,12 @@ from .device import Device
 from .device_type import DeviceType
 
 class FlashDevice(Device):
+    __slots__ = ()
+
     def __init__(self, device_id="", device_name="", address=None, device_type=None):
         super().__init__(device_id, address)
         self.device_name = device_name
         self.device_type = device_type if device_type is not None else DeviceType.FLASH
 
-    def read_external(self, data_input):
-        super().read_external(data_input)
-
-    def write_external(self, data_output):
-        super().write_external(data_output)
-
     def __str__(self):
         return f"FlashDevice [device_id={self.device_id}, device_name={self.device_name}, address={self.address}]"
\ No newline at end of file
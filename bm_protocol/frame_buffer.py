@@ -0,0 +1,223 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+from typing import Optional
+from .buffer_pool import BufferPool, MIN_BUFFER_SIZE, size_class
+
+_FRAME_LENGTH = struct.Struct('<I')
+
+DEFAULT_CAPACITY = 64 * 1024
+# The buffer is sized to hold about this many frames of the average size seen.
+FRAMES_PER_BUFFER = 4
+
+
+class FrameBuffer:
+    """
+    Per-connection receive buffer that splits the stream into length-prefixed
+    frames. Data is appended at write_pos and frames are consumed by moving
+    read_pos, so nothing is copied per frame. The unread bytes are only moved
+    back to the start once read_pos has passed compact_threshold, or when the
+    buffer has to grow anyway.
+
+    Frames are returned as memoryview slices of the buffer. They stay valid
+    until the next write() or writable(); anything that keeps the data longer
+    must copy it.
+
+    discard_frame() drops a frame without buffering it: bytes of it that
+    have not arrived yet are skipped as they are written.
+
+    With a pool, buffers are leased from it and the capacity follows the
+    average frame size, between min_capacity and max_capacity. The buffer is
+    only resized while it is empty, so that never copies anything.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, compact_threshold: int = None,
+                 max_capacity: int = None, pool: BufferPool = None):
+        self.pool = pool
+        if pool is not None:
+            capacity = size_class(capacity)
+            max_capacity = size_class(max_capacity or capacity)
+        self.min_capacity = capacity
+        self.max_capacity = max(max_capacity or capacity, capacity)
+        self.capacity = capacity
+        self.compact_threshold = compact_threshold
+        self.average_frame = 0.0
+        self.discard_remaining = 0
+        self.frames_discarded = 0
+        self.bytes_discarded = 0
+        self._buf = self._lease(capacity)
+        self.read_pos = 0
+        self.write_pos = 0
+
+    def __len__(self):
+        return self.write_pos - self.read_pos
+
+    @property
+    def size(self) -> int:
+        return len(self._buf)
+
+    def _lease(self, size: int) -> bytearray:
+        if self.pool is not None:
+            return self.pool.lease(size)
+        return bytearray(size)
+
+    def _replace(self, buf: bytearray):
+        if self.pool is not None:
+            self.pool.release(self._buf)
+        self._buf = buf
+
+    def write(self, data):
+        if self.discard_remaining:
+            dropped = self._drop(len(data))
+            data = memoryview(data)[dropped:]
+        size = len(data)
+        self._resize_if_empty()
+        if self.write_pos + size > len(self._buf):
+            self._make_room(size)
+        end = self.write_pos + size
+        self._buf[self.write_pos:end] = data
+        self.write_pos = end
+
+    def writable(self) -> memoryview:
+        """
+        Free space after the buffered data, for recv_into. It is at least a
+        quarter of the buffer, or room for the rest of a partly received frame.
+        Call commit() with the number of bytes written into it.
+        """
+        self._resize_if_empty()
+        wanted = max(len(self._buf) // 4, MIN_BUFFER_SIZE)
+        size = self.frame_size()
+        if size is not None:
+            wanted = max(wanted, min(size + 4 - len(self), self.max_capacity))
+        if self.write_pos + wanted > len(self._buf):
+            self._make_room(wanted)
+        return memoryview(self._buf)[self.write_pos:]
+
+    def commit(self, count: int):
+        end = min(self.write_pos + count, len(self._buf))
+        if self.discard_remaining:
+            # The buffer is empty while discarding, so the dropped bytes are just skipped over.
+            self.read_pos = self.write_pos + self._drop(end - self.write_pos)
+        self.write_pos = end
+        if self.read_pos == end:
+            self.read_pos = self.write_pos = 0
+
+    def _drop(self, count: int) -> int:
+        dropped = min(count, self.discard_remaining)
+        self.discard_remaining -= dropped
+        self.bytes_discarded += dropped
+        return dropped
+
+    @property
+    def discarding(self) -> bool:
+        return self.discard_remaining > 0
+
+    def discard_frame(self) -> Optional[int]:
+        """
+        Drops the next frame whether or not it has fully arrived and returns its
+        payload size, or None if its length prefix hasn't arrived yet.
+        """
+        size = self.frame_size()
+        if size is None:
+            return None
+        end = self.read_pos + 4 + size
+        self.frames_discarded += 1
+        if end <= self.write_pos:
+            self.bytes_discarded += end - self.read_pos
+            self._consume(end)
+        else:
+            self.bytes_discarded += self.write_pos - self.read_pos
+            self.discard_remaining = end - self.write_pos
+            self._consume(self.write_pos)
+        return size
+
+    def _make_room(self, size: int):
+        unread = self.write_pos - self.read_pos
+        needed = unread + size
+        threshold = self.compact_threshold if self.compact_threshold is not None else len(self._buf) // 2
+        if needed <= len(self._buf) and self.read_pos >= threshold:
+            self._buf[:unread] = self._buf[self.read_pos:self.write_pos]
+        else:
+            # Growing copies the unread bytes anyway, so it compacts for free.
+            new_buf = self._lease(max(len(self._buf) * 2, needed))
+            new_buf[:unread] = memoryview(self._buf)[self.read_pos:self.write_pos]
+            self._replace(new_buf)
+        self.read_pos = 0
+        self.write_pos = unread
+
+    def _resize_if_empty(self):
+        if self.write_pos == 0 and len(self._buf) != self.capacity:
+            self._replace(self._lease(self.capacity))
+
+    def _observe(self, frame_size: int):
+        if self.pool is None:
+            return
+        self.average_frame += (frame_size - self.average_frame) / 8
+        target = size_class(int(self.average_frame * FRAMES_PER_BUFFER))
+        self.capacity = min(max(target, self.min_capacity), self.max_capacity)
+
+    def frame_size(self) -> Optional[int]:
+        """Payload size of the next frame, or None until its length prefix has arrived."""
+        if self.write_pos - self.read_pos < 4:
+            return None
+        return _FRAME_LENGTH.unpack_from(self._buf, self.read_pos)[0]
+
+    def read_frame(self) -> Optional[memoryview]:
+        """Consumes the next frame and returns its payload, or None if it isn't complete yet."""
+        size = self.frame_size()
+        if size is None:
+            return None
+        start = self.read_pos + 4
+        end = start + size
+        if end > self.write_pos:
+            return None
+
+        frame = memoryview(self._buf)[start:end]
+        self._observe(size + 4)
+        self._consume(end)
+        return frame
+
+    def peek(self) -> memoryview:
+        """All unread bytes, length prefix included, without consuming them."""
+        return memoryview(self._buf)[self.read_pos:self.write_pos]
+
+    def clear(self):
+        self._consume(self.write_pos)
+
+    def _consume(self, position: int):
+        if position >= self.write_pos:
+            # Nothing left unread, so start over from the beginning without copying.
+            self.read_pos = self.write_pos = 0
+        else:
+            self.read_pos = position
+
+    def frames(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        """Hands the buffer back to the pool. The FrameBuffer must not be used afterwards."""
+        self.read_pos = self.write_pos = 0
+        if self.pool is not None:
+            self.pool.release(self._buf)
+            self.pool = None
+        self._buf = bytearray()
@@ -0,0 +1,149 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+from typing import Any
+from .registry import Registry
+
+_SHORT = struct.Struct('<h')
+_USHORT = struct.Struct('<H')
+_INT = struct.Struct('<i')
+_UINT = struct.Struct('<I')
+_FLOAT = struct.Struct('<f')
+_DOUBLE = struct.Struct('<d')
+_BYTE = struct.Struct('<b')
+
+# utf "@" (short length 1 + the tag byte) that precedes every non-null object.
+_OBJECT_TAG = b"\x01\x00@"
+_NULL_OBJECT = b"\x00\x00\x00\x00"
+_LENGTH_PLACEHOLDER = b"\x00\x00\x00\x00"
+
+
+class FrameWriter:
+    """
+    Encoder that writes everything into a single growable bytearray.
+    begin_frame() reserves the 4-byte length prefix and end_frame() patches it
+    in once the payload is known, so no separate header buffer is built.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.buf = bytearray()
+        self._frame_start = None
+
+    def begin_frame(self):
+        self._frame_start = len(self.buf)
+        self.buf += _LENGTH_PLACEHOLDER
+
+    def end_frame(self) -> int:
+        start = self._frame_start
+        if start is None:
+            raise Exception("end_frame called without begin_frame")
+        size = len(self.buf) - start - 4
+        _UINT.pack_into(self.buf, start, size)
+        self._frame_start = None
+        return size
+
+    def write_byte(self, value: int):
+        self.buf += _BYTE.pack(value)
+
+    def write_utf_bytes(self, value: str):
+        self.buf += value.encode('utf-8')
+
+    def write_int(self, value: int):
+        self.buf += _INT.pack(value)
+
+    def write_short(self, value: int):
+        self.buf += _SHORT.pack(value)
+
+    def write_unsigned_short(self, value: int):
+        self.buf += _USHORT.pack(value)
+
+    def write_float(self, value: float):
+        self.buf += _FLOAT.pack(value)
+
+    def write_multibyte(self, value: str, charset: str):
+        self.buf += value.encode(charset)
+
+    def write_utf(self, value: str):
+        data = value.encode('utf-8') if value else b""
+        self.buf += _SHORT.pack(len(data))
+        self.buf += data
+
+    def write_boolean(self, value: bool):
+        self.buf.append(1 if value else 0)
+
+    def write_double(self, value: float):
+        self.buf += _DOUBLE.pack(value)
+
+    def write_unsigned_int(self, value: int):
+        self.buf += _UINT.pack(value)
+
+    def write(self, data):
+        self.buf += data
+
+    def pack(self, fmt: struct.Struct, *values):
+        self.buf += fmt.pack(*values)
+
+    def write_object(self, obj: Any):
+        if obj is None:
+            self.buf += _NULL_OBJECT
+            return
+
+        obj_class = type(obj)
+        registry_id = None
+
+        if self.registry:
+            registry_id = self.registry.id_for_class(obj_class)
+
+        if registry_id is None:
+            registry_id = Registry.id_for_class_global(obj_class)
+
+        if registry_id is None:
+            raise Exception(f"No registry ID found for class: {obj_class.__name__}")
+
+        self.buf += _OBJECT_TAG
+        self.buf += _SHORT.pack(registry_id)
+
+        if hasattr(obj, 'write_external'):
+            obj.write_external(self)
+        else:
+            raise Exception(f"Object {obj_class.__name__} does not have write_external method")
+
+    writeByte = write_byte
+    writeUTFBytes = write_utf_bytes
+    writeInt = write_int
+    writeShort = write_short
+    writeUnsignedShort = write_unsigned_short
+    writeFloat = write_float
+    writeMultiByte = write_multibyte
+    writeUTF = write_utf
+    writeBoolean = write_boolean
+    writeDouble = write_double
+    writeUnsignedInt = write_unsigned_int
+    writeObject = write_object
+    write_bytes = write
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buf)
+
+    def tell(self):
+        return len(self.buf)
+
+    def __len__(self):
+        return len(self.buf)
@@ -0,0 +1,74 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from enum import IntEnum
+from typing import Optional
+from .frame_buffer import FrameBuffer
+
+# Every frame payload starts with an object: utf "@" (short length 1 + the tag byte).
+_OBJECT_TAG = b"\x01\x00@"
+
+
+class HandshakeState(IntEnum):
+    AWAIT_VERSION = 0
+    COMPLETE = 1
+
+
+class Handshake:
+    """
+    Receiving side of the version exchange. A client opens the connection
+    with its version packet: a uint32 size followed by that many bytes, the
+    same layout as a frame. advance() consumes exactly that packet from the
+    front of the connection's FrameBuffer and leaves whatever follows it
+    there for the framer, so a client may pipeline its first frames right
+    behind the version.
+
+    A client that skips the version and starts with a frame is accepted too:
+    a first "packet" that is too big for a version or holds an object is
+    left in the buffer untouched.
+    """
+
+    MAX_VERSION_SIZE = 16
+
+    def __init__(self):
+        self.state = HandshakeState.AWAIT_VERSION
+        self.client_version: Optional[bytes] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.state == HandshakeState.COMPLETE
+
+    def advance(self, buffer: FrameBuffer) -> bool:
+        """
+        Returns True once the handshake is complete and everything left in
+        buffer is frames, or False while the version is still arriving.
+        """
+        if self.state == HandshakeState.COMPLETE:
+            return True
+
+        size = buffer.frame_size()
+        if size is None:
+            return False
+        if size <= self.MAX_VERSION_SIZE:
+            if len(buffer) < 4 + size:
+                return False
+            if size < len(_OBJECT_TAG) or buffer.peek()[4:4 + len(_OBJECT_TAG)] != _OBJECT_TAG:
+                self.client_version = bytes(buffer.read_frame())
+
+        self.state = HandshakeState.COMPLETE
+        return True
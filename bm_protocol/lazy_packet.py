@@ -0,0 +1,175 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+from .packet import Packet
+from .packet_type import PacketType
+from .device_type import DeviceType
+from .bm_invoke import BMInvoke
+from .bm_parameter import BMParameter
+from .fast_stream import FastStream
+from .registry import Registry
+from .object_pool import acquire
+
+_PACKET_HEADER = struct.Struct('<iiddii')
+_INVOKE_COUNT = struct.Struct('<i')
+
+
+class LazyInvoke(BMInvoke):
+    """
+    BMInvoke whose id and method names are decoded, while the parameters stay
+    as an encoded slice of the frame until params_list is first used.
+    """
+    __slots__ = ('_params_list', '_params_view', '_params_count', '_registry', '_strings')
+
+    def __init__(self, iid=0, method="", *args):
+        self._params_view = None
+        self._params_count = 0
+        self._registry = None
+        self._strings = None
+        super().__init__(iid, method, *args)
+
+    @property
+    def params_list(self):
+        if self._params_view is not None:
+            stream = FastStream(self._params_view, self._registry, self._strings)
+            self._params_list = [stream.read_object() for _ in range(self._params_count)]
+            self._params_view = None
+        return self._params_list
+
+    @params_list.setter
+    def params_list(self, value):
+        self._params_list = value
+        self._params_view = None
+
+    @property
+    def params_decoded(self) -> bool:
+        return self._params_view is None
+
+    def split_last_object(self):
+        """
+        Decodes every parameter but the last and returns them together with the
+        still-encoded object held by the last one, so it can be forwarded as-is.
+        Returns None when the parameters are already decoded or the last one
+        does not hold an object.
+        """
+        if self._params_view is None or self._params_count < 1:
+            return None
+
+        stream = FastStream(self._params_view, self._registry, self._strings)
+        leading = [stream.read_object() for _ in range(self._params_count - 1)]
+        if stream.read_object_header() != Registry.id_for_class_global(BMParameter):
+            return None
+        if stream.read_utf() != "@":
+            return None
+        return leading, stream.read_rest()
+
+    def detach(self):
+        """Copies the encoded parameters out of the frame so they outlive its receive buffer."""
+        if self._params_view is not None:
+            self._params_view = bytes(self._params_view)
+
+    def read_external(self, data_input):
+        self.id = data_input.read_int()
+        self.method = data_input.read_utf()
+        self.return_method = data_input.read_utf()
+        self._params_count = data_input.unpack(_INVOKE_COUNT)[0]
+        self._params_list = []
+        # Parameters are the last field of an invoke, which is the last field of its packet.
+        self._params_view = data_input.read_rest()
+        self._registry = data_input.registry
+        self._strings = data_input.strings
+
+
+class LazyPacket(Packet):
+    """
+    Packet view that decodes only the fixed header eagerly. A BMInvoke message
+    becomes a LazyInvoke so routing can read its method; any other message is
+    kept encoded until .message is accessed.
+    """
+    __slots__ = ('_message', '_message_view', '_registry', '_strings')
+
+    def __init__(self):
+        self._message_view = None
+        self._registry = None
+        self._strings = None
+        super().__init__()
+
+    @property
+    def message(self):
+        if self._message_view is not None:
+            stream = FastStream(self._message_view, self._registry, self._strings)
+            self._message = stream.read_object()
+            self._message_view = None
+        return self._message
+
+    @message.setter
+    def message(self, value):
+        self._message = value
+        self._message_view = None
+
+    @property
+    def message_decoded(self) -> bool:
+        return self._message_view is None
+
+    def detach(self):
+        """Copies whatever is still encoded out of the frame so it outlives its receive buffer."""
+        if self._message_view is not None:
+            self._message_view = bytes(self._message_view)
+        elif isinstance(self._message, LazyInvoke):
+            self._message.detach()
+
+    def read_external(self, data_input):
+        (self.channel, self.sequence, self.timestamp, self.rtt,
+         packet_type, device_type) = data_input.unpack(_PACKET_HEADER)
+        self.packet_type = PacketType.for_value(packet_type)
+        self.device_type = DeviceType.for_value(device_type)
+        self.device_id = data_input.read_utf()
+        self.device_name = data_input.read_utf()
+        self._registry = data_input.registry
+        self._strings = data_input.strings
+
+        self._message = None
+        self._message_view = None
+        if not data_input.read_boolean():
+            return
+
+        start = data_input.tell()
+        if data_input.read_object_header() == Registry.id_for_class_global(BMInvoke):
+            invoke = acquire(LazyInvoke)
+            invoke.read_external(data_input)
+            self._message = invoke
+        else:
+            data_input.seek(start)
+            self._message_view = data_input.read_rest()
+
+
+def read_lazy_packet(data, registry=None, strings=None):
+    """
+    Decodes one frame payload into a LazyPacket, or into whatever object it
+    holds when the top-level object is not a Packet.
+    """
+    stream = FastStream(data, registry, strings)
+    start = stream.tell()
+    if stream.read_object_header() == Registry.id_for_class_global(Packet):
+        packet = acquire(LazyPacket)
+        packet.read_external(stream)
+        return packet
+
+    stream.seek(start)
+    return stream.read_object()
@@ -0,0 +1,120 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Dict
+
+DEFAULT_POOL_SIZE = 256
+
+
+class ObjectPool:
+    """
+    Free list of instances of one class. release() resets an instance in
+    place by re-running its __init__ and keeps it for the next acquire().
+    Pushing and popping the list needs no lock; the counters are approximate
+    when several threads use the pool at once.
+    """
+
+    def __init__(self, cls: type, max_size: int = DEFAULT_POOL_SIZE):
+        self.cls = cls
+        self.max_size = max_size
+        self._free = []
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+        self.dropped = 0
+
+    def acquire(self):
+        try:
+            obj = self._free.pop()
+        except IndexError:
+            self.misses += 1
+            return self.cls()
+        self.hits += 1
+        return obj
+
+    def release(self, obj):
+        if len(self._free) >= self.max_size:
+            self.dropped += 1
+            return
+        obj.__init__()
+        self._free.append(obj)
+        self.released += 1
+
+    def stats(self) -> Dict[str, Any]:
+        acquired = self.hits + self.misses
+        return {
+            'free': len(self._free),
+            'hits': self.hits,
+            'misses': self.misses,
+            'released': self.released,
+            'dropped': self.dropped,
+            'hit_rate': self.hits / acquired if acquired else 0.0,
+        }
+
+    def clear(self):
+        self._free.clear()
+
+    def __len__(self):
+        return len(self._free)
+
+
+_pools: Dict[type, ObjectPool] = {}
+
+
+def enable_pool(cls: type, max_size: int = DEFAULT_POOL_SIZE) -> ObjectPool:
+    pool = _pools.get(cls)
+    if pool is None:
+        pool = _pools[cls] = ObjectPool(cls, max_size)
+    else:
+        pool.max_size = max_size
+    return pool
+
+
+def disable_pools():
+    for pool in _pools.values():
+        pool.clear()
+    _pools.clear()
+
+
+def get_pool(cls: type):
+    return _pools.get(cls)
+
+
+def acquire(cls: type):
+    """
+    Returns a pooled instance of cls, or a new one when cls isn't pooled.
+    """
+    pool = _pools.get(cls)
+    if pool is None:
+        return cls()
+    return pool.acquire()
+
+
+def release(*objs):
+    """
+    Hands objects back to their pools. Objects of classes that aren't pooled
+    (and None) are ignored, so callers don't need to check.
+    """
+    for obj in objs:
+        pool = _pools.get(type(obj))
+        if pool is not None:
+            pool.release(obj)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {cls.__name__: pool.stats() for cls, pool in _pools.items()}
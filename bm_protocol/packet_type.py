@@ -16,66 +16,35 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-class PacketType:
-    DATA_PACKETTYPE = 0
-    PING_PACKETTYPE = 1
-    ACK_PACKETTYPE = 2
-    ECHO_PACKETTYPE = 3
-    ANALYSIS_PACKETTYPE = 4
-    KEEP_ALIVE_PACKETTYPE = 5
+from enum import IntEnum
 
-    # Pre-declare values for the IDE
-    DATA = None
-    PING = None
-    ACK = None
-    ECHO = None
-    ANALYSIS = None
-    KEEP_ALIVE = None
-    values = []
-    value_names = []
-
-    _enum_created = False
-
-    def __init__(self, value):
-        if PacketType._enum_created:
-            raise RuntimeError("The enum is already created.")
-        self._value = value
+class PacketType(IntEnum):
+    DATA = 0
+    PING = 1
+    ACK = 2
+    ECHO = 3
+    ANALYSIS = 4
+    KEEP_ALIVE = 5
 
     @staticmethod
     def for_value(value):
-        return PacketType.values[value]
+        return _PACKET_TYPES[value]
+
+    @staticmethod
+    def value_of(packet_type):
+        return int(packet_type) if packet_type else 0
 
     def get_packet_type(self):
-        return self._value
+        return int(self)
 
     def to_string(self):
-        return f"[PacketType {PacketType.value_names[self._value]}]"
+        return f"[PacketType {self.name}]"
 
     def __str__(self):
         return self.to_string()
 
-PacketType.DATA = PacketType(PacketType.DATA_PACKETTYPE)
-PacketType.PING = PacketType(PacketType.PING_PACKETTYPE)
-PacketType.ACK = PacketType(PacketType.ACK_PACKETTYPE)
-PacketType.ECHO = PacketType(PacketType.ECHO_PACKETTYPE)
-PacketType.ANALYSIS = PacketType(PacketType.ANALYSIS_PACKETTYPE)
-PacketType.KEEP_ALIVE = PacketType(PacketType.KEEP_ALIVE_PACKETTYPE)
-
-PacketType.values = [
-    PacketType.DATA,
-    PacketType.PING,
-    PacketType.ACK,
-    PacketType.ECHO,
-    PacketType.ANALYSIS,
-    PacketType.KEEP_ALIVE
-]
+# Wire value -> member, indexed directly instead of going through PacketType(value).
+_PACKET_TYPES = tuple(PacketType)
 
-PacketType.value_names = [
-    "DATA",
-    "PING",
-    "ACK",
-    "ECHO",
-    "ANALYSIS",
-    "KEEP_ALIVE"
-]
-PacketType._enum_created = True
\ No newline at end of file
+PacketType.values = _PACKET_TYPES
+PacketType.value_names = tuple(packet_type.name for packet_type in _PACKET_TYPES)
@@ -20,6 +20,8 @@ from pyamf import amf3
 from typing import Any, Optional
 
 class Ping:
+    __slots__ = ('device_id', 'address')
+
     def __init__(self, uid: Optional[str] = None, addr: Optional[Any] = None):
         self.device_id = uid
         self.address = addr
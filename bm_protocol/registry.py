@@ -16,14 +16,17 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Dict, Type, Optional, List, Any
+from typing import Dict, Type, Optional, List, Any, Tuple
 
 from bm_protocol.bm_byte_chunk import BMByteChunk
+from .device_type import GAME_DEVICE_TYPES
 
 
 class Registry:
     _global_id_to_class: Dict[int, Type] = {}
     _global_class_to_id: Dict[Type, int] = {}
+    # Indexed by class id, None where no class is registered.
+    _global_class_table: Tuple[Optional[Type], ...] = ()
     _global_initiated: bool = False
 
     def __init__(self, error_handler=None):
@@ -47,21 +50,20 @@ class Registry:
     def initiated(self) -> bool:
         return self._initiated
 
-    @staticmethod
-    def class_for_id(class_id: int) -> Optional[Type]:
-        return Registry.class_for_id_global(class_id)
+    @classmethod
+    def class_for_id(cls, class_id: int) -> Optional[Type]:
+        return cls.class_for_id_global(class_id)
 
-    @staticmethod
-    def id_for_class(clazz: Type) -> Optional[int]:
-        return Registry.id_for_class_global(clazz)
+    @classmethod
+    def id_for_class(cls, clazz: Type) -> Optional[int]:
+        return cls.id_for_class_global(clazz)
 
     def register_device(self, device: Any) -> bool:
         try:
             device_id = self._get_device_id(device)
             if device_id:
                 if hasattr(device, 'device') and hasattr(device.device, 'device_type'):
-                    from .device_type import DeviceType
-                    if device.device.device_type in [DeviceType.FLASH, DeviceType.UNITY]:
+                    if device.device.device_type in GAME_DEVICE_TYPES:
                         return self.register_flash_device(device)
 
                 self._devices[device_id] = device
@@ -153,6 +155,11 @@ class Registry:
             cls._register_class_global(BMRegistryInfo, 19)
             cls._register_class_global(BMArray, 21)
 
+            table = [None] * (max(cls._global_id_to_class) + 1)
+            for class_id, clazz in cls._global_id_to_class.items():
+                table[class_id] = clazz
+            cls._global_class_table = tuple(table)
+
             cls._global_initiated = True
 
         except Exception as e:
@@ -174,12 +181,18 @@ class Registry:
 
     @classmethod
     def class_for_id_global(cls, class_id: int) -> Optional[Type]:
+        table = cls._global_class_table
+        if 0 <= class_id < len(table):
+            return table[class_id]
         if not cls._global_initiated:
             cls.init_global()
-        return cls._global_id_to_class.get(class_id)
+            return cls.class_for_id_global(class_id)
+        return None
 
     @classmethod
     def id_for_class_global(cls, clazz: Type) -> Optional[int]:
-        if not cls._global_initiated:
+        class_id = cls._global_class_to_id.get(clazz)
+        if class_id is None and not cls._global_initiated:
             cls.init_global()
-        return cls._global_class_to_id.get(clazz)
\ No newline at end of file
+            return cls._global_class_to_id.get(clazz)
+        return class_id
\ No newline at end of file
@@ -0,0 +1,431 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+from itertools import groupby
+
+# Fixed-width kinds are struct format characters, so runs of them can be merged
+# into a single precompiled Struct.
+INT = 'i'
+UINT = 'I'
+SHORT = 'h'
+USHORT = 'H'
+FLOAT = 'f'
+DOUBLE = 'd'
+BYTE = 'b'
+BOOL = '?'
+UTF = "utf"
+OBJECT = "object"
+
+_FIXED_KINDS = frozenset((INT, UINT, SHORT, USHORT, FLOAT, DOUBLE, BYTE, BOOL))
+
+
+class Field:
+    """
+    A single value stored on attribute `attr`.
+    `decode` converts the wire value after reading, `encode` converts the
+    attribute value before writing. `required` makes the encoder raise when
+    the attribute is None.
+    """
+
+    def __init__(self, attr: str, kind: str, decode=None, encode=None, required: bool = False):
+        self.attr = attr
+        self.kind = kind
+        self.decode = decode
+        self.encode = encode
+        self.required = required
+
+
+class Flagged:
+    """
+    A value preceded by a boolean that says whether it is present.
+    """
+
+    def __init__(self, attr: str, kind: str):
+        self.attr = attr
+        self.kind = kind
+
+
+class When:
+    """
+    A block of fields that is only on the wire when `condition` holds.
+    The condition is a Python expression evaluated against `self`.
+    """
+
+    def __init__(self, condition: str, *fields):
+        self.condition = condition
+        self.fields = fields
+
+
+class Objects:
+    """
+    A list of objects prefixed by its length.
+    """
+
+    def __init__(self, attr: str, count: str = INT):
+        self.attr = attr
+        self.count = count
+
+
+class Bytes:
+    """
+    A raw payload whose length is given by an earlier field.
+    `encode` receives the whole message object and returns the bytes to write.
+    """
+
+    def __init__(self, attr: str, length_attr: str, decode=None, encode=None):
+        self.attr = attr
+        self.length_attr = length_attr
+        self.decode = decode
+        self.encode = encode
+
+
+class Tagged:
+    """
+    A value preceded by its one-character type tag (BMParameter).
+    """
+
+    def __init__(self, tag_attr: str, value_attr: str):
+        self.tag_attr = tag_attr
+        self.value_attr = value_attr
+
+
+class TaggedItems:
+    """
+    The message itself is a list of tagged values prefixed by its length (BMArray).
+    """
+
+    def __init__(self, count: str = SHORT):
+        self.count = count
+
+
+# Tag -> Struct for every scalar type a tagged value can carry.
+TAG_STRUCTS = {
+    "i": struct.Struct('<i'),
+    "I": struct.Struct('<I'),
+    "s": struct.Struct('<h'),
+    "S": struct.Struct('<H'),
+    "f": struct.Struct('<f'),
+    "d": struct.Struct('<d'),
+    "B": struct.Struct('<?'),
+}
+
+
+# Runs of at least this many same-tag scalars are packed/unpacked in one call.
+MIN_TAGGED_RUN = 4
+_MAX_RUN_STRUCTS = 256
+_run_structs = {}
+
+
+def run_struct(tag: str, count: int) -> struct.Struct:
+    """
+    Struct for `count` consecutive tagged scalars of one tag. Each element is
+    the utf tag (3 bytes, skipped as padding) followed by the value.
+    """
+    key = (tag, count)
+    fmt = _run_structs.get(key)
+    if fmt is None:
+        if len(_run_structs) >= _MAX_RUN_STRUCTS:
+            _run_structs.clear()
+        fmt = struct.Struct('<' + ('3x' + TAG_STRUCTS[tag].format[1:]) * count)
+        _run_structs[key] = fmt
+    return fmt
+
+
+def _pack_tagged_run(tag: str, values: list) -> bytearray:
+    count = len(values)
+    stride = 3 + TAG_STRUCTS[tag].size
+    chunk = bytearray(run_struct(tag, count).pack(*values))
+    view = memoryview(chunk)
+    # Fill in the utf tags over the padding; the high length byte stays 0.
+    view[0::stride] = b"\x01" * count
+    view[2::stride] = tag.encode('ascii') * count
+    return chunk
+
+
+def read_tagged_value(data_input, tag: str):
+    fmt = TAG_STRUCTS.get(tag)
+    if fmt is not None:
+        return data_input.unpack(fmt)[0]
+    if tag == "*":
+        return data_input.read_utf()
+    if tag == "@":
+        return data_input.read_object()
+    return None
+
+
+def write_tagged_value(data_output, tag: str, value):
+    fmt = TAG_STRUCTS.get(tag)
+    if fmt is not None:
+        data_output.pack(fmt, value)
+    elif tag == "*":
+        data_output.write_utf(value)
+    elif tag == "@":
+        data_output.write_object(value)
+
+
+def tag_for_value(value):
+    if isinstance(value, bool):
+        return "B"
+    if isinstance(value, int):
+        return "I" if 0 <= value <= 4294967295 else "i"
+    if isinstance(value, float):
+        return "f"
+    if isinstance(value, str):
+        return "*"
+    if hasattr(value, 'read_external') and hasattr(value, 'write_external'):
+        return "@"
+    return None
+
+
+_EXACT_TYPE_TAGS = {float: "f", str: "*", bool: "B"}
+
+
+def _item_tag(value):
+    tag = _EXACT_TYPE_TAGS.get(type(value))
+    return tag if tag is not None else tag_for_value(value)
+
+
+def read_tagged_items(data_input, count: int, items: list):
+    read_run = getattr(data_input, 'read_tagged_run', None)
+    while count > 0:
+        if read_run is not None:
+            run = read_run(count)
+            if run:
+                items.extend(run)
+                count -= len(run)
+                continue
+
+        tag = data_input.read_utf()
+        if tag in TAG_STRUCTS or tag == "*" or tag == "@":
+            items.append(read_tagged_value(data_input, tag))
+        else:
+            print(f"Unable to read element with encoding: {tag}")
+        count -= 1
+
+
+def write_tagged_items(data_output, items):
+    for tag, group in groupby(items, _item_tag):
+        values = list(group)
+        if tag is None:
+            for value in values:
+                print(f"Unrecognized object: {type(value)} {str(value)}")
+            continue
+
+        if tag in TAG_STRUCTS and len(values) >= MIN_TAGGED_RUN:
+            data_output.write_bytes(_pack_tagged_run(tag, values))
+            continue
+
+        for value in values:
+            data_output.write_utf(tag)
+            write_tagged_value(data_output, tag, value)
+
+
+class _CodecBuilder:
+    """
+    Turns a schema into the source of read_external/write_external.
+    Constants the generated code needs (Structs, converters) are put into its namespace.
+    """
+
+    def __init__(self):
+        self.namespace = {
+            'read_tagged_value': read_tagged_value,
+            'write_tagged_value': write_tagged_value,
+            'read_tagged_items': read_tagged_items,
+            'write_tagged_items': write_tagged_items,
+        }
+        self._counter = 0
+
+    def _const(self, prefix: str, value) -> str:
+        name = f"_{prefix}{self._counter}"
+        self._counter += 1
+        self.namespace[name] = value
+        return name
+
+    def _struct(self, kinds) -> str:
+        return self._const("s", struct.Struct('<' + ''.join(kinds)))
+
+    @staticmethod
+    def _groups(schema):
+        """
+        Splits the schema into runs of fixed-width Fields and single other elements.
+        """
+        run = []
+        for element in schema:
+            if isinstance(element, Field) and element.kind in _FIXED_KINDS and not element.required:
+                run.append(element)
+                continue
+            if run:
+                yield run
+                run = []
+            yield element
+        if run:
+            yield run
+
+    def read_lines(self, schema, indent: str):
+        lines = []
+        for group in self._groups(schema):
+            if isinstance(group, list):
+                targets = []
+                converts = []
+                for field in group:
+                    if field.decode is None:
+                        targets.append(f"self.{field.attr}")
+                    else:
+                        temp = f"_t{self._counter}"
+                        decode = self._const("dec", field.decode)
+                        targets.append(temp)
+                        converts.append(f"self.{field.attr} = {decode}({temp})")
+                target = ", ".join(targets) + ("," if len(targets) == 1 else "")
+                fmt = self._struct(field.kind for field in group)
+                lines.append(f"{indent}{target} = data_input.unpack({fmt})")
+                lines.extend(indent + line for line in converts)
+            elif isinstance(group, Field):
+                read = self._read_expr(group.kind)
+                if group.decode is not None:
+                    read = f"{self._const('dec', group.decode)}({read})"
+                lines.append(f"{indent}self.{group.attr} = {read}")
+            elif isinstance(group, Flagged):
+                lines.append(f"{indent}if data_input.read_boolean():")
+                lines.append(f"{indent}    self.{group.attr} = {self._read_expr(group.kind)}")
+                lines.append(f"{indent}else:")
+                lines.append(f"{indent}    self.{group.attr} = None")
+            elif isinstance(group, When):
+                lines.append(f"{indent}if {group.condition}:")
+                lines.extend(self.read_lines(group.fields, indent + "    "))
+            elif isinstance(group, Objects):
+                lines.append(f"{indent}_n = data_input.unpack({self._struct(group.count)})[0]")
+                lines.append(f"{indent}self.{group.attr} = [data_input.read_object() for _ in range(_n)]")
+            elif isinstance(group, Bytes):
+                read = f"data_input.read_bytes(self.{group.length_attr})"
+                if group.decode is not None:
+                    read = f"{self._const('dec', group.decode)}({read})"
+                lines.append(f"{indent}self.{group.attr} = {read}")
+            elif isinstance(group, Tagged):
+                lines.append(f"{indent}self.{group.tag_attr} = data_input.read_utf()")
+                lines.append(f"{indent}self.{group.value_attr} = read_tagged_value(data_input, self.{group.tag_attr})")
+            elif isinstance(group, TaggedItems):
+                lines.append(f"{indent}self.clear()")
+                lines.append(f"{indent}_n = data_input.unpack({self._struct(group.count)})[0]")
+                lines.append(f"{indent}read_tagged_items(data_input, _n, self)")
+            else:
+                raise TypeError(f"Unknown schema element: {group!r}")
+        return lines
+
+    def write_lines(self, schema, indent: str):
+        lines = []
+        for group in self._groups(schema):
+            if isinstance(group, list):
+                values = ", ".join(self._value_expr(field) for field in group)
+                fmt = self._struct(field.kind for field in group)
+                lines.append(f"{indent}data_output.pack({fmt}, {values})")
+            elif isinstance(group, Field):
+                if group.required:
+                    message = f"{group.attr.strip('_').capitalize()} is None"
+                    lines.append(f"{indent}if self.{group.attr} is None:")
+                    lines.append(f"{indent}    raise Exception({message!r})")
+                lines.append(f"{indent}{self._write_stmt(group.kind, self._value_expr(group))}")
+            elif isinstance(group, Flagged):
+                lines.append(f"{indent}if self.{group.attr} is not None:")
+                lines.append(f"{indent}    data_output.write_boolean(True)")
+                lines.append(f"{indent}    {self._write_stmt(group.kind, f'self.{group.attr}')}")
+                lines.append(f"{indent}else:")
+                lines.append(f"{indent}    data_output.write_boolean(False)")
+            elif isinstance(group, When):
+                lines.append(f"{indent}if {group.condition}:")
+                lines.extend(self.write_lines(group.fields, indent + "    "))
+            elif isinstance(group, Objects):
+                lines.append(f"{indent}data_output.pack({self._struct(group.count)}, len(self.{group.attr}))")
+                lines.append(f"{indent}for _o in self.{group.attr}:")
+                lines.append(f"{indent}    data_output.write_object(_o)")
+            elif isinstance(group, Bytes):
+                if group.encode is not None:
+                    value = f"{self._const('enc', group.encode)}(self)"
+                else:
+                    value = f"self.{group.attr}"
+                lines.append(f"{indent}data_output.write_bytes({value})")
+            elif isinstance(group, Tagged):
+                lines.append(f"{indent}data_output.write_utf(self.{group.tag_attr})")
+                lines.append(f"{indent}if self.{group.value_attr} is not None:")
+                lines.append(f"{indent}    write_tagged_value(data_output, self.{group.tag_attr}, self.{group.value_attr})")
+            elif isinstance(group, TaggedItems):
+                lines.append(f"{indent}data_output.pack({self._struct(group.count)}, len(self))")
+                lines.append(f"{indent}write_tagged_items(data_output, self)")
+            else:
+                raise TypeError(f"Unknown schema element: {group!r}")
+        return lines
+
+    def _value_expr(self, field: Field) -> str:
+        if field.encode is None:
+            return f"self.{field.attr}"
+        return f"{self._const('enc', field.encode)}(self.{field.attr})"
+
+    def _read_expr(self, kind: str) -> str:
+        if kind in _FIXED_KINDS:
+            return f"data_input.unpack({self._struct(kind)})[0]"
+        if kind == UTF:
+            return "data_input.read_utf()"
+        if kind == OBJECT:
+            return "data_input.read_object()"
+        raise TypeError(f"Unknown field kind: {kind!r}")
+
+    def _write_stmt(self, kind: str, value: str) -> str:
+        if kind in _FIXED_KINDS:
+            return f"data_output.pack({self._struct(kind)}, {value})"
+        if kind == UTF:
+            return f"data_output.write_utf({value})"
+        if kind == OBJECT:
+            return f"data_output.write_object({value})"
+        raise TypeError(f"Unknown field kind: {kind!r}")
+
+
+def message(*schema, after_read: str = None):
+    """
+    Class decorator that generates read_external/write_external from a field schema.
+    The functions are compiled once when the class is defined; `after_read`
+    names a method to call once all fields have been read.
+    """
+
+    def decorate(cls):
+        builder = _CodecBuilder()
+
+        read_body = builder.read_lines(schema, "    ")
+        if after_read:
+            read_body.append(f"    self.{after_read}()")
+        write_body = builder.write_lines(schema, "    ")
+
+        source = "\n".join(
+            ["def read_external(self, data_input):"] + (read_body or ["    pass"]) +
+            ["", "def write_external(self, data_output):"] + (write_body or ["    pass"])
+        )
+
+        namespace = builder.namespace
+        exec(compile(source, f"<codec {cls.__name__}>", "exec"), namespace)
+
+        read_external = namespace['read_external']
+        write_external = namespace['write_external']
+        read_external.__qualname__ = f"{cls.__qualname__}.read_external"
+        write_external.__qualname__ = f"{cls.__qualname__}.write_external"
+
+        cls.read_external = read_external
+        cls.write_external = write_external
+        cls.SCHEMA = schema
+        cls.CODEC_SOURCE = source
+        return cls
+
+    return decorate
@@ -16,8 +16,11 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import struct
 from pyamf import amf3
 from typing import Any
+from .frame_writer import FrameWriter
+from .registry import Registry
 
 class Stream:
     ERROR_DATA = ""
@@ -28,7 +31,6 @@ class Stream:
         self.registry = registry
         self.data = None
         self.tt = 0
-        self.tmp_array = amf3.ByteArray()
 
         self.byte_array: amf3.ByteArray = byte_array if byte_array else amf3.ByteArray()
 
@@ -40,16 +42,10 @@ class Stream:
     def _ensure_registry_initialized(self):
         if self.registry and self.registry.initiated:
             return
-        else:
-            from registry import Registry
-            Registry.init_global()
+        Registry.init_global()
 
     def _get_class_for_id(self, class_id: int):
-        if self.registry and self.registry.initiated:
-            return self.registry.class_for_id(class_id)
-        else:
-            from registry import Registry
-            return Registry.class_for_id_global(class_id)
+        return Registry.class_for_id_global(class_id)
 
     def read_short(self):
         return self.byte_array.readShort()
@@ -79,6 +75,15 @@ class Stream:
     def read_float(self):
         return self.byte_array.readFloat()
 
+    def read_bytes(self, length: int):
+        data = self.byte_array.read(length)
+        if len(data) != length:
+            raise IOError(f"Tried to read {length} byte(s) from the stream")
+        return data
+
+    def unpack(self, fmt: struct.Struct):
+        return fmt.unpack(self.read_bytes(fmt.size))
+
     def write_byte(self, value: int):
         self.byte_array.writeByte(value)
 
@@ -98,15 +103,15 @@ class Stream:
         self.byte_array.writeMultiByte(value, charset)
 
     def write_utf(self, value: str):
-        if not value:
-            value = ""
-        temp = amf3.ByteArray()
-        temp.endian = '<'  # Little-endian
-        temp.writeUTFBytes(value)
-        self.write_short(len(temp))
-        temp.seek(0)
-        while temp.remaining() > 0:
-            self.byte_array.writeByte(temp.readByte())
+        data = value.encode('utf-8') if value else b""
+        self.write_short(len(data))
+        self.byte_array.write(data)
+
+    def write_bytes(self, data):
+        self.byte_array.write(data)
+
+    def pack(self, fmt: struct.Struct, *values):
+        self.byte_array.write(fmt.pack(*values))
 
     def write_boolean(self, value: bool):
         self.byte_array.writeBoolean(value)
@@ -137,33 +142,10 @@ class Stream:
         return None
 
     def write_object(self, obj: Any):
-        if obj is None:
-            self.write_utf("")
-            self.write_short(0)
-            return
-
-        self.write_utf("@")
-
-        obj_class = type(obj)
-        registry_id = None
-
-        if hasattr(self, 'registry') and self.registry:
-            registry_id = self.registry.id_for_class(obj_class)
-
-        if registry_id is None:
-            from registry import Registry
-            Registry.init_global()
-            registry_id = Registry.id_for_class_global(obj_class)
-
-        if registry_id is None:
-            raise Exception(f"No registry ID found for class: {obj_class.__name__}")
-
-        self.write_short(registry_id)
-
-        if hasattr(obj, 'write_external'):
-            obj.write_external(self)
-        else:
-            raise Exception(f"Object {obj_class.__name__} does not have write_external method")
+        # Encode the whole object graph in one buffer and append it in a single write.
+        writer = FrameWriter(self.registry)
+        writer.write_object(obj)
+        self.byte_array.write(writer.buf)
 
     def readInt(self):
         return self.read_int()
@@ -17,6 +17,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 class VersionPacket:
+    __slots__ = ('_size', '_min_version', '_packet', '_version')
     _versions = []
 
     def __init__(self, stream, packet_size):
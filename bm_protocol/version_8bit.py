@@ -17,6 +17,8 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 class Version8Bit:
+    __slots__ = ('_build', '_minor', '_major')
+
     def __init__(self):
         self._build = 0
         self._minor = 0
@@ -16,26 +16,50 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import select
 import socket
 import threading
+import time
 from typing import Dict, Any, Callable
-from pyamf import amf3
 from packet_processor import PacketProcessor
 from error_handler import ErrorHandler
 from bm_protocol.registry import Registry
 from packet_operations_mixin import PacketOperationsMixin
 from bm_protocol.packet import Packet
 from bm_protocol.bm_invoke import BMInvoke
-from bm_protocol.bm_parameter import BMParameter
 from bm_protocol.packet_type import PacketType
-from bm_protocol.stream import Stream
+from bm_protocol.bm_byte_chunk import BMByteChunk
+from bm_protocol.chunk_assembler import ChunkAssembler
+from bm_protocol.frame_buffer import FrameBuffer
+from bm_protocol.buffer_pool import get_buffer_pool
+from bm_protocol.handshake import Handshake
+from bm_protocol.codec import read_packet, release_packet, detach_packet, StringTable
+from bm_protocol.lazy_packet import LazyInvoke, LazyPacket, read_lazy_packet
+from bm_protocol.object_pool import release
+import cut_through
+import send_batch
+from config import Config
+from memory_governor import MemoryGovernor
+from dispatch_pool import DispatchPool
+
+BYTE_CHUNK_SET_HANDLER = 'byte_chunk_set'
+# Give up on cut-through if a frame's header and target don't fit in this much.
+_CUT_THROUGH_MAX_HEAD = 16 * 1024
+# How often a paused receive loop checks whether it was stopped.
+_PAUSE_CHECK_INTERVAL = 1.0
+# Reports a peer's shutdown even with unread data still queued (Linux only).
+_POLLRDHUP = getattr(select, 'POLLRDHUP', 0)
 
 class ClientHandler(PacketOperationsMixin):
     def __init__(self, client_socket: socket.socket, client_address: tuple,
                  packet_processor: PacketProcessor, error_handler: ErrorHandler,
                  registry: 'Registry' = None,
                  message_handlers: Dict[str, Callable] = None,
-                 on_disconnect_callback: Callable = None):
+                 on_disconnect_callback: Callable = None,
+                 config: Config = None,
+                 relay_stream_opener: Callable = None,
+                 memory_governor: MemoryGovernor = None,
+                 dispatch_pool: DispatchPool = None):
         PacketOperationsMixin.__init__(self)
         self.client_socket = client_socket
         self.client_address = client_address
@@ -43,6 +67,10 @@ class ClientHandler(PacketOperationsMixin):
         self.error_handler = error_handler
         self.registry = registry
         self.message_handlers = message_handlers or {}
+        self.config = config or Config()
+        self.relay_stream_opener = relay_stream_opener
+        self.memory_governor = memory_governor
+        self.dispatch_pool = dispatch_pool
 
         self.is_running = False
         self.client_thread = None
@@ -52,16 +80,31 @@ class ClientHandler(PacketOperationsMixin):
         self.slot_id = None
         self.client_info = None
 
+        self.strings = StringTable()
+        self.chunk_assembler = ChunkAssembler(
+            spill_threshold=self.config.chunk_spill_threshold,
+            max_set_size=self.config.max_chunk_set_size
+        )
+
         self.receive_buffer = b''
         self.buffer_lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self._cut_through_declined = False
+        self.read_allowed = threading.Event()
+        self.read_allowed.set()
+        self._reported_memory = (0, 0)
+        self.packets_dropped = 0
 
         self.on_disconnect_callback = on_disconnect_callback
         self._disconnect_notified = False
 
-        from pyamf import amf3
-        self.buffer = amf3.ByteArray()
-        self.buffer.endian = '<'
+        self.buffer = FrameBuffer(
+            self.config.buffer_size,
+            max_capacity=self.config.max_buffer_size,
+            pool=get_buffer_pool()
+        )
         self.version_handshake_complete = False
+        self.handshake = Handshake()
 
     def start(self):
         self.is_running = True
@@ -85,10 +128,17 @@ class ClientHandler(PacketOperationsMixin):
 
     def stop(self):
         self.is_running = False
+        self.chunk_assembler.clear()
         try:
             self._notify_disconnection()
         except Exception:
             pass
+        try:
+            if self.client_socket:
+                # shutdown wakes a receive loop blocked in recv_into so it can exit and release its buffer.
+                self.client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         try:
             if self.client_socket:
                 self.client_socket.close()
@@ -96,6 +146,10 @@ class ClientHandler(PacketOperationsMixin):
             pass
         if self.client_thread and self.client_thread.is_alive():
             self.client_thread.join(timeout=1.0)
+        elif self.client_thread is None:
+            # Otherwise the receive loop hands the buffer back when it exits.
+            self._release_receive_buffer()
+        self.read_allowed.set()
         self.error_handler.log_info(
             f"Client handler stopped for {self.client_address[0]}:{self.client_address[1]}",
             "CLIENT_HANDLER"
@@ -110,6 +164,11 @@ class ClientHandler(PacketOperationsMixin):
             device_id, device_name, packet_type, device_type, timestamp
         )
 
+    def send_ping_response(self, server_device_id: str, server_host: str, server_port: int) -> bool:
+        return self.send_ping_response_to_socket(
+            self.client_socket, server_device_id, server_host, server_port
+        )
+
     def send_registration_response(self, original_invoke, server_device_id: str,
                                    server_host: str, server_port: int) -> bool:
         return self.send_registration_response_to_socket(
@@ -123,13 +182,7 @@ class ClientHandler(PacketOperationsMixin):
                 self.error_handler.log_warning("notify_host_connected: missing client_info", "CLIENT_HANDLER")
                 return False
 
-            invoke = BMInvoke(iid=1, method="onHostConnected")
-            invoke.add_parameter(BMParameter(info))
-
-            pkt = Packet()
-            pkt.message = invoke
-
-            ok = self.send_packet(pkt)
+            ok = self.send_frame(self.packet_processor.templates.host_connected_frame(info))
             if ok:
                 self.error_handler.log_info(
                     f"Sent onHostConnected to {self.client_address[0]}:{self.client_address[1]} "
@@ -146,44 +199,14 @@ class ClientHandler(PacketOperationsMixin):
     def _handle_handshake(self) -> bool:
         """
         Performs the handshake with clients.
-        The handshake is performed by exchanging the version packet.
+        The handshake is performed by exchanging the version packet: ours is
+        sent here, the client's is consumed by the receive loop (see
+        Handshake), so it can arrive in any number of segments and be
+        followed by the first frames in the same one.
         """
         try:
-            self.client_socket.setblocking(False)
-            try:
-                client_version_pkt = self.client_socket.recv(12)
-                if not client_version_pkt:
-                    self.error_handler.log_warning(
-                        f"Client disconnected before handshake: {self.client_address[0]}:{self.client_address[1]}",
-                        "HANDSHAKE"
-                    )
-                    return False
-                elif len(client_version_pkt) < 12:
-                    self.error_handler.log_warning(
-                        f"Failed to read full handshake (got {len(client_version_pkt)} bytes) from {self.client_address[0]}:{self.client_address[1]}",
-                        "HANDSHAKE"
-                    )
-                    return False
-                else:
-                    self.error_handler.log_info(
-                        f"Handshake received from {self.client_address[0]}:{self.client_address[1]}: {client_version_pkt.hex()}",
-                        "HANDSHAKE"
-                    )
-
-            except BlockingIOError:
-                self.error_handler.log_info(
-                    f"No initial payload from client {self.client_address[0]}:{self.client_address[1]}, proceeding with handshake",
-                    "HANDSHAKE"
-                )
-            except socket.error as e:
-                self.error_handler.log_error(
-                    f"Socket error during handshake read from {self.client_address[0]}:{self.client_address[1]}: {e}",
-                    "HANDSHAKE"
-                )
-                return False
-            finally:
-                self.client_socket.setblocking(True)
-                self.client_socket.settimeout(30.0)
+            # Until the client's version arrives, a silent client is dropped after handshake_timeout.
+            self.client_socket.settimeout(self.config.handshake_timeout or None)
 
             success = self.send_version_handshake()
             if success:
@@ -206,57 +229,90 @@ class ClientHandler(PacketOperationsMixin):
             f"Client marked disconnected: {self.client_address[0]}:{self.client_address[1]}",
             "CLIENT_HANDLER"
         )
+        if self.on_disconnect_callback:
+            self.on_disconnect_callback(self)
 
     def send_version_handshake(self) -> bool:
         return self.send_version_packet_to_socket(self.client_socket)
 
     def _handle_client(self):
-        while self.is_running:
-            try:
-                data = self.client_socket.recv(4096)
-                if not data:
-                    self.error_handler.log_info(
-                        f"Client {self.client_address[0]}:{self.client_address[1]} disconnected",
-                        "CLIENT_HANDLER"
-                    )
+        try:
+            while self.is_running:
+                if not self.read_allowed.is_set():
+                    self.read_allowed.wait(_PAUSE_CHECK_INTERVAL)
+                    if not self.read_allowed.is_set() and self._peer_closed():
+                        self.error_handler.log_info(
+                            f"Client {self.client_address[0]}:{self.client_address[1]} disconnected while paused",
+                            "CLIENT_HANDLER"
+                        )
+                        self._notify_disconnection()
+                        break
+                    continue
+                try:
+                    received = self.client_socket.recv_into(self.buffer.writable())
+                    if not received:
+                        self.error_handler.log_info(
+                            f"Client {self.client_address[0]}:{self.client_address[1]} disconnected",
+                            "CLIENT_HANDLER"
+                        )
+                        self._notify_disconnection()
+                        break
+
+                    self._process_received_data(received)
+                    self._report_memory()
+
+                except socket.timeout:
+                    if not self.handshake.complete:
+                        self.error_handler.log_warning(
+                            f"Handshake with {self.client_address[0]}:{self.client_address[1]} timed out",
+                            "HANDSHAKE"
+                        )
+                        self._notify_disconnection()
+                        try:
+                            self.client_socket.close()
+                        except OSError:
+                            pass
+                        break
+                    continue
+                except socket.error as e:
+                    if self.is_running:
+                        self.error_handler.handle_client_error(
+                            self.client_address, e, "receiving data"
+                        )
                     self._notify_disconnection()
                     break
-
-                self._process_received_data(data)
-
-            except socket.timeout:
-                continue
-            except socket.error as e:
-                if self.is_running:
+                except Exception as e:
                     self.error_handler.handle_client_error(
-                        self.client_address, e, "receiving data"
+                        self.client_address, e, "handling client"
                     )
-                self._notify_disconnection()
-                break
-            except Exception as e:
-                self.error_handler.handle_client_error(
-                    self.client_address, e, "handling client"
-                )
-                self._notify_disconnection()
-                break
+                    self._notify_disconnection()
+                    break
+        finally:
+            self._release_receive_buffer()
 
-    def _process_received_data(self, data: bytes):
+    def _process_received_data(self, count: int):
+        """
+        Handles count bytes that recv_into just placed in the receive buffer.
+        """
         try:
-            # Version packets don't need additional processing
-            if len(data) == 12 or len(data) == 8:
-                return
-
             with self.buffer_lock:
-                if not hasattr(self, 'buffer'):
-                    self.buffer = amf3.ByteArray()
-                    self.buffer.endian = '<'
+                self.buffer.commit(count)
 
-                self.buffer.seek(0, 2)
-                self.buffer.write(data)
-                self.buffer.seek(0)
+                if not self.handshake.complete:
+                    if not self.handshake.advance(self.buffer):
+                        return
+                    self._log_client_version()
+                    self._on_handshake_complete()
 
-                while self._parse_packet_from_buffer():
-                    pass
+                packets = self._decode_frames()
+                if packets:
+                    self._dispatch_packets(packets)
+
+                # Whatever is left is the start of a frame, which may be streamed on already.
+                # Not while earlier messages are still queued, as it would overtake them.
+                packet_size = self.buffer.frame_size()
+                if packet_size is not None and self._dispatch_idle():
+                    self._try_cut_through(packet_size)
 
         except Exception as e:
             self.error_handler.handle_client_error(
@@ -264,79 +320,284 @@ class ClientHandler(PacketOperationsMixin):
             )
 
             self.error_handler.log_debug(
-                f"Raw packet data: {data.hex()}",
+                f"Raw packet data: {self.buffer.peek().hex()}",
                 "PACKET_DEBUG"
             )
 
-    def _parse_packet_from_buffer(self) -> bool:
+    def _log_client_version(self):
+        version = self.handshake.client_version
+        if version is None:
+            self.error_handler.log_info(
+                f"No version packet from {self.client_address[0]}:{self.client_address[1]}, reading frames",
+                "HANDSHAKE"
+            )
+        else:
+            self.error_handler.log_info(
+                f"Handshake received from {self.client_address[0]}:{self.client_address[1]}: {version.hex()}",
+                "HANDSHAKE"
+            )
+
+    def _on_handshake_complete(self):
+        self.client_socket.settimeout(self.config.socket_timeout or None)
+
+    def _release_receive_buffer(self):
+        with self.buffer_lock:
+            self.buffer.close()
+        if self.memory_governor:
+            self.memory_governor.release(self)
+
+    def _report_memory(self):
+        if not self.memory_governor:
+            return
+        backlog = self._send_backlog()
+        usage = (self.buffer.size + self.chunk_assembler.buffered_bytes + backlog, backlog)
+        if usage != self._reported_memory:
+            self._reported_memory = usage
+            self.memory_governor.update(self, *usage)
+
+    def _send_backlog(self) -> int:
+        """Bytes queued for this client that haven't been handed to the kernel."""
+        return 0
+
+    def _peer_closed(self) -> bool:
+        try:
+            if _POLLRDHUP:
+                poller = select.poll()
+                poller.register(self.client_socket, _POLLRDHUP)
+                return bool(poller.poll(0))
+            readable, _, _ = select.select([self.client_socket], [], [], 0)
+            return bool(readable) and not self.client_socket.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
+
+    def pause_reading(self):
+        self.read_allowed.clear()
+
+    def resume_reading(self):
+        self.read_allowed.set()
+
+    def abort(self, reason: str):
         """
-        Parse one length‑prefixed packet from the receive buffer, if fully available.
-        The first 4 bytes are an unsigned int payload length.
-        Returns True if a packet was consumed (even on parse error) to make forward progress.
+        Disconnects the client from any thread. The receive loop wakes up,
+        exits and the connection manager cleans the handler up as usual.
         """
+        self.error_handler.log_warning(
+            f"Disconnecting {self.client_address[0]}:{self.client_address[1]}: {reason}",
+            "CLIENT_HANDLER"
+        )
+        self._notify_disconnection()
+        self.read_allowed.set()
         try:
-            self.buffer.seek(0)
+            self.client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
+    def _decode_frames(self) -> list:
+        """
+        Decodes every complete length-prefixed frame in the receive buffer.
+        The first 4 bytes of a frame are an unsigned int payload length.
+        Frames that fail to parse are logged and skipped so the buffer keeps moving.
+        """
+        packets = []
+        while True:
             # We need at least 4 bytes for the length prefix.
-            if self.buffer.remaining() < 4:
-                return False
+            packet_size = self.buffer.frame_size()
+            if packet_size is None:
+                return packets
 
-            packet_size = self.buffer.readUnsignedInt()
             self.error_handler.log_debug(f"Packet size: {packet_size}", "PACKET_PARSER")
 
-            # Wait for the full packet to arrive.
-            if self.buffer.remaining() < packet_size:
-                return False
-
-            # Slice exactly one packet and compact the buffer afterward.
-            packet_data = amf3.ByteArray()
-            packet_data.endian = '<'
-
-            for _ in range(packet_size):
-                packet_data.writeByte(self.buffer.readByte())
+            if packet_size > self.config.max_packet_size:
+                self.buffer.discard_frame()
+                self.error_handler.log_warning(
+                    f"Discarding {packet_size} byte frame from {self.client_address[0]}:{self.client_address[1]}, "
+                    f"over max_packet_size ({self.config.max_packet_size})",
+                    "PACKET_PARSER"
+                )
+                continue
 
-            self._compact_buffer()
-            packet_data.seek(0)
+            packet_data = self.buffer.read_frame()
+            if packet_data is None:
+                return packets
 
-            Registry.init_global()
+            self._cut_through_declined = False
 
-            stream = Stream(packet_data, self.registry)
-            packet = stream.read_object()
+            try:
+                # packet_data is only valid until the next receive; packets kept longer are detached.
+                packet = read_packet(packet_data, self.registry, self.strings)
+            except Exception as e:
+                self.error_handler.log_error(
+                    f"Error parsing packet: {e}",
+                    "PACKET_PARSER"
+                )
+                continue
 
             if packet:
                 self.error_handler.log_debug(
                     f"Successfully parsed packet: {type(packet).__name__}",
                     "PACKET_PARSER"
                 )
-                self._handle_parsed_packet(packet)
-                return True
+                packets.append(packet)
             else:
-                # We keep consuming forward even if object parse fails to avoid a buffer deadlock.
                 self.error_handler.log_warning(
                     "Failed to parse packet object",
                     "PACKET_PARSER"
                 )
-                return True
 
-        except Exception as e:
-            self.error_handler.log_error(
-                f"Error parsing packet: {e}",
-                "PACKET_PARSER"
+    def _dispatch_packets(self, packets: list):
+        """
+        Handles packets decoded from one receive. With a dispatch pool they are
+        queued to run on its workers in order; otherwise they are handled here,
+        and with more than one, sends the handlers make are batched, so each
+        target gets a single write.
+        """
+        if self.dispatch_pool is not None:
+            self._submit_packets(packets, wait=True)
+            return
+
+        if len(packets) == 1:
+            self._handle_parsed_packet(packets[0])
+            release_packet(packets[0])
+            return
+
+        with send_batch.batching():
+            for packet in packets:
+                self._handle_parsed_packet(packet)
+                release_packet(packet)
+
+    def _submit_packets(self, packets: list, wait: bool):
+        dropped = 0
+        for packet in packets:
+            # Queued packets are handled after the receive buffer has moved on.
+            detach_packet(packet)
+            if not self.dispatch_pool.submit(self, self._handle_and_release, packet, wait=wait):
+                release_packet(packet)
+                dropped += 1
+
+        if dropped:
+            self.packets_dropped += dropped
+            self.error_handler.log_warning(
+                f"Dispatch queue full, dropped {dropped} message(s) from "
+                f"{self.client_address[0]}:{self.client_address[1]}",
+                "CLIENT_HANDLER"
             )
-            return True
 
-    def _compact_buffer(self):
-        from pyamf import amf3
+    def _handle_and_release(self, packet):
+        try:
+            self._handle_parsed_packet(packet)
+        finally:
+            release_packet(packet)
 
-        new_buffer = amf3.ByteArray()
-        new_buffer.endian = '<'
+    def _dispatch_idle(self) -> bool:
+        return self.dispatch_pool is None or self.dispatch_pool.is_idle(self)
 
-        if self.buffer.remaining() > 0:
-            remaining_bytes = self.buffer.read()
-            new_buffer.write(remaining_bytes)
+    def _try_cut_through(self, packet_size: int) -> bool:
+        """
+        Starts forwarding a large relay frame before it has fully arrived.
+        Once the buffered start of the frame names its target, the buffered
+        bytes are sent and the rest is streamed from this socket to the target.
+        Returns True if the frame was consumed that way.
+        """
+        threshold = self.config.cut_through_threshold
+        if (self._cut_through_declined or not threshold or packet_size < threshold
+                or not self.relay_stream_opener):
+            return False
 
-        new_buffer.seek(0)
-        self.buffer = new_buffer
+        head = self.buffer.peek()[4:]
+        available = len(head)
+        # The target's send lock is held until the rest arrives, so only the tail of a frame is streamed.
+        if available * 2 < packet_size:
+            return False
+        packet = None
+        leading = []
+        try:
+            try:
+                packet = read_lazy_packet(head, self.registry, self.strings)
+                if not isinstance(packet, LazyPacket) or not packet.message_decoded:
+                    split = None
+                elif isinstance(packet.message, LazyInvoke):
+                    split = packet.message.split_last_object()
+                else:
+                    split = None
+            except IOError:
+                split = False
+            except Exception:
+                split = None
+            if split:
+                leading = split[0]
+
+            # The relayed message's header and invoke id are needed for the sequence.
+            if split is False or (split is not None and len(split[1]) < 9):
+                if available >= _CUT_THROUGH_MAX_HEAD:
+                    self._cut_through_declined = True
+                return False
+            if split is None:
+                self._cut_through_declined = True
+                return False
+
+            raw_head = split[1]
+            message_size = packet_size - (available - len(raw_head))
+            opened = self.relay_stream_opener(packet.message, leading, raw_head, message_size, self)
+        finally:
+            # The opener has built what it sends, so nothing decoded from the head is kept.
+            release(*leading)
+            release_packet(packet)
+
+        if opened is None:
+            self._cut_through_declined = True
+            return False
+
+        self.buffer.clear()
+
+        target_client, frame_head = opened
+        self._stream_relay(target_client, frame_head, packet_size - available)
+        return True
+
+    def _stream_relay(self, target_client: 'ClientHandler', frame_head: bytes, count: int):
+        source_failed = None
+        # Everyone else sending to the target waits for the stream, so a source that
+        # falls too far behind is cut off.
+        deadline = (time.monotonic() + self.config.cut_through_timeout
+                    + count / self.config.cut_through_min_rate)
+        with target_client.send_lock:
+            target_failed = None
+            try:
+                target_client.client_socket.sendall(frame_head)
+            except OSError as e:
+                target_failed = e
+            try:
+                if target_failed is None:
+                    cut_through.forward(self.client_socket, target_client.client_socket, count, deadline)
+                else:
+                    cut_through.drain(self.client_socket, count, deadline)
+            except cut_through.TargetError as e:
+                target_failed = e
+            except cut_through.SourceError as e:
+                source_failed = e
+                if target_failed is None:
+                    self._pad_stream(target_client, count - e.delivered)
+
+        if target_failed is not None:
+            self.error_handler.log_warning(
+                f"Relay target {target_client.device_id} failed mid-stream: {target_failed}",
+                "CLIENT_HANDLER"
+            )
+        if source_failed is not None:
+            self.error_handler.log_error(
+                f"Relay source {self.client_address[0]}:{self.client_address[1]} failed mid-stream: {source_failed}",
+                "CLIENT_HANDLER"
+            )
+            self._notify_disconnection()
+
+    @staticmethod
+    def _pad_stream(target_client: 'ClientHandler', count: int):
+        # The frame's length has been sent, so filling the rest with zeros keeps the
+        # frames after it in step; this one arrives with its tail zeroed. A target
+        # socket failing here is left to its own receive loop.
+        try:
+            target_client.client_socket.sendall(bytes(count))
+        except OSError:
+            pass
 
     def _handle_parsed_packet(self, packet):
         try:
@@ -347,32 +608,58 @@ class ClientHandler(PacketOperationsMixin):
                 )
                 return
 
+            # Pings are answered from the header alone, so the message is never decoded.
             if packet.packet_type == PacketType.PING:
-                device_id = self.device_id or getattr(packet.message, 'device_id', 'unknown')
-                device_name = self.device_name or getattr(packet.message, 'device_name', 'unknown')
+                device_id = self.device_id or packet.device_id or 'unknown'
+                device_name = self.device_name or packet.device_name or 'unknown'
                 self.error_handler.log_debug(
                     f"Received ping from device: {device_name} - {device_id}",
                     "PACKET_HANDLER"
                 )
-                self._route_message('ping', packet.message)
+                self._route_message('ping', packet)
                 return
 
             if packet.message and isinstance(packet.message, BMInvoke):
                 bm_invoke = packet.message
 
                 self.error_handler.log_debug(
-                    f"BMInvoke method: {bm_invoke.method}, params: {len(bm_invoke.params_list)}",
+                    f"BMInvoke method: {bm_invoke.method}",
                     "PACKET_HANDLER"
                 )
 
                 self._route_message(bm_invoke.method, bm_invoke)
 
+            elif isinstance(packet.message, BMByteChunk):
+                self._handle_byte_chunk(packet.message)
+
         except Exception as e:
             self.error_handler.log_error(
                 f"Error handling parsed packet: {e}",
                 "PACKET_HANDLER"
             )
 
+    def _handle_byte_chunk(self, chunk: BMByteChunk):
+        try:
+            chunk_set = self.chunk_assembler.add(chunk)
+        except ValueError as e:
+            self.error_handler.log_warning(f"Dropping byte chunk: {e}", "PACKET_HANDLER")
+            self.chunk_assembler.discard(chunk.set_id)
+            return
+
+        if chunk_set is None:
+            return
+
+        try:
+            if BYTE_CHUNK_SET_HANDLER in self.message_handlers:
+                self._route_message(BYTE_CHUNK_SET_HANDLER, chunk_set)
+            else:
+                self.error_handler.log_debug(
+                    f"Received byte set {chunk_set.set_id} ({chunk_set.total_size} bytes)",
+                    "PACKET_HANDLER"
+                )
+        finally:
+            chunk_set.close()
+
     def _route_message(self, method_name: str, message):
         try:
             if method_name in self.message_handlers:
@@ -393,7 +680,7 @@ class ClientHandler(PacketOperationsMixin):
         try:
             packet_data = self.packet_processor.create_response_packet(packet_obj)
             if packet_data:
-                self.client_socket.send(packet_data)
+                self._sendall(self.client_socket, packet_data)
 
                 self.error_handler.log_info(
                     f"Sent {type(packet_obj).__name__} to {self.client_address[0]}:{self.client_address[1]}",
@@ -413,13 +700,50 @@ class ClientHandler(PacketOperationsMixin):
             )
             return False
 
+    def _sendall(self, socket_obj, data):
+        batch = send_batch.current_batch()
+        if batch is not None and socket_obj is self.client_socket:
+            batch.add(self, data)
+            return
+        if socket_obj is self.client_socket:
+            self._write(data)
+            return
+        with self.send_lock:
+            socket_obj.sendall(data)
+
+    def _write(self, data):
+        with self.send_lock:
+            self.client_socket.sendall(data)
+
+    def flush_frames(self, data, count: int):
+        """Sends frames a SendBatch queued for this client."""
+        try:
+            self._write(data)
+        except Exception as e:
+            self.error_handler.handle_client_error(
+                self.client_address, e, f"sending {count} batched frame(s)"
+            )
+
+    def send_frame(self, frame: bytes) -> bool:
+        try:
+            self._sendall(self.client_socket, frame)
+            return True
+        except Exception as e:
+            self.error_handler.handle_client_error(
+                self.client_address, e, "sending frame"
+            )
+            return False
+
     def get_client_info(self) -> Dict[str, Any]:
         return {
             'address': self.client_address,
             'device_id': self.device_id,
             'device_name': self.device_name,
             'is_running': self.is_running,
-            'last_ping': self.last_ping_time
+            'last_ping': self.last_ping_time,
+            'frames_discarded': self.buffer.frames_discarded,
+            'bytes_discarded': self.buffer.bytes_discarded,
+            'packets_dropped': self.packets_dropped
         }
 
     def set_device_info(self, device_id: str, device_name: str):
@@ -0,0 +1,264 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from pyamf import amf3
+
+from packet_processor import PacketProcessor
+from bm_protocol.registry import Registry
+from bm_protocol.stream import Stream
+from bm_protocol.frame_writer import FrameWriter
+from bm_protocol.codec import DECODER_BACKENDS, create_input_stream
+from bm_protocol.lazy_packet import read_lazy_packet
+from bm_protocol.packet import Packet
+from bm_protocol.ping import Ping
+from bm_protocol.bm_invoke import BMInvoke
+from bm_protocol.bm_parameter import BMParameter
+from bm_protocol.bm_array import BMArray
+from bm_protocol.bm_byte_chunk import BMByteChunk
+from bm_protocol.bm_registry_info import BMRegistryInfo
+from bm_protocol.flash_device import FlashDevice
+from bm_protocol.device_address import DeviceAddress
+from bm_protocol.device_type import DeviceType
+
+DEFAULT_OUTPUT = "codec_benchmark.json"
+DEFAULT_DEVICES = 16
+CHUNK_SIZE = 64 * 1024
+
+# Ping carries no body and has no write_external, so it can only be decoded.
+_PING_OBJECT = b"\x01\x00@\x0b\x00"
+
+
+def _registry_info(index: int, slot_id: int = 1) -> BMRegistryInfo:
+    info = BMRegistryInfo()
+    info.address = DeviceAddress(f"192.168.1.{index % 250 + 2}", 8088)
+    info.device = FlashDevice(f"device-{index:04d}", f"Device {index}", info.address, DeviceType.FLASH)
+    info.app_id = "com.retouched.game"
+    info.slot_id = slot_id
+    info.current_clients = 1
+    info.max_clients = 4
+    return info
+
+
+def build_cases(devices: int = DEFAULT_DEVICES):
+    """
+    Returns (name, encoded object or None, bytes) for every registered class
+    and for the composite frames the server handles most.
+    Encoded objects are what Stream.write_object / FrameWriter.write_object
+    produce, i.e. frame payloads without the 4-byte length prefix.
+    """
+    server = FlashDevice("server", "Registry", DeviceAddress("10.0.0.1", 8088), DeviceType.SERVER)
+    small_invoke = BMInvoke(7, "onInput", 1, 2.5, "tap")
+
+    objects = [
+        ("class:Packet", PacketProcessor.create_invoke_packet("ping")),
+        ("class:DeviceAddress", DeviceAddress("10.0.0.2", 8088)),
+        ("class:BMParameter", BMParameter(42)),
+        ("class:BMInvoke", small_invoke),
+        ("class:FlashDevice", server),
+        ("class:BMByteChunk", BMByteChunk("set", 0, 256, 256, bytes(256))),
+        ("class:BMRegistryInfo", _registry_info(0)),
+        ("class:BMArray", BMArray(*[_registry_info(i) for i in range(4)])),
+        ("frame:ping", PacketProcessor.create_ping_response_packet("server", "10.0.0.1", 8088)),
+        ("frame:register", PacketProcessor.create_invoke_packet(
+            "registry.register", [BMParameter(_registry_info(0, 0))],
+            return_method="onRegister", device_id="device-0000", device_name="Device 0",
+            device_type=DeviceType.FLASH)),
+        ("frame:relay", PacketProcessor.create_invoke_packet(
+            "registry.relay", [BMParameter(_registry_info(1)), BMParameter(small_invoke)],
+            device_id="phone-0001", device_name="Phone", device_type=DeviceType.ANDROID)),
+        (f"frame:onList[{devices}]", PacketProcessor.create_invoke_packet(
+            "onList", [BMParameter(BMArray(*[_registry_info(i) for i in range(devices)]))])),
+    ]
+
+    chunk_packet = Packet()
+    chunk_packet.device_id = "phone-0001"
+    chunk_packet.device_name = "Phone"
+    chunk_packet.device_type = DeviceType.ANDROID
+    chunk_packet.message = BMByteChunk("set-1", 0, CHUNK_SIZE, CHUNK_SIZE, bytes(range(256)) * (CHUNK_SIZE // 256))
+    objects.append(("frame:byte_chunk[64KiB]", chunk_packet))
+
+    cases = [("class:Ping", None, _PING_OBJECT)]
+    for name, obj in objects:
+        writer = FrameWriter()
+        writer.write_object(obj)
+        cases.append((name, obj, bytes(writer.buf)))
+    return cases
+
+
+class _ByteArrayWriter(Stream):
+    """
+    Stream.write_object as it was before FrameWriter: every field of the
+    object graph is written through the amf3.ByteArray one call at a time.
+    """
+
+    def write_object(self, obj):
+        if obj is None:
+            self.write_utf("")
+            self.write_short(0)
+            return
+        self.write_utf("@")
+        self.write_short(Registry.id_for_class_global(type(obj)))
+        obj.write_external(self)
+
+
+def _encode_pyamf(obj):
+    stream = _ByteArrayWriter(amf3.ByteArray())
+    stream.write_object(obj)
+    return stream.byte_array.getvalue()
+
+
+def _encode_struct(obj):
+    writer = FrameWriter()
+    writer.write_object(obj)
+    return writer.buf
+
+
+def _decoder(backend: str, data: bytes):
+    if backend == "struct-lazy":
+        return lambda: read_lazy_packet(data)
+    return lambda: create_input_stream(data, backend=backend).read_object()
+
+
+def _encoder(backend: str, obj):
+    encode = _encode_struct if backend == "struct" else _encode_pyamf
+    return lambda: encode(obj)
+
+
+def _time_per_op(fn, repeat: int) -> float:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def _memory_per_op(fn, number: int):
+    """
+    Runs fn number times keeping every result alive and returns the memory
+    blocks and bytes each call leaves allocated, plus the extra peak one call
+    needs while it runs.
+    """
+    results = [None] * number
+    fn()
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        start_blocks = sys.getallocatedblocks()
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(number):
+            results[i] = fn()
+        end_size, peak = tracemalloc.get_traced_memory()
+        end_blocks = sys.getallocatedblocks()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    return ((end_blocks - start_blocks) / number,
+            (end_size - start_size) / number,
+            max(peak - end_size, 0))
+
+
+def run(devices: int = DEFAULT_DEVICES, repeat: int = 5, memory_ops: int = 200, case_filter: str = None):
+    Registry.init_global()
+    decode_backends = list(DECODER_BACKENDS) + ["struct-lazy"]
+    encode_backends = ["pyamf", "struct"]
+
+    results = []
+    for name, obj, data in build_cases(devices):
+        if case_filter and case_filter not in name:
+            continue
+
+        ops = [("decode", backend, _decoder(backend, data)) for backend in decode_backends]
+        if obj is not None:
+            ops += [("encode", backend, _encoder(backend, obj)) for backend in encode_backends]
+
+        for direction, backend, fn in ops:
+            allocs, size, peak = _memory_per_op(fn, memory_ops)
+            result = {
+                "case": name,
+                "direction": direction,
+                "backend": backend,
+                "size_bytes": len(data),
+                "ns_per_op": round(_time_per_op(fn, repeat), 1),
+                "allocs_per_op": round(allocs, 2),
+                "bytes_per_op": round(size, 1),
+                "peak_bytes_per_op": peak,
+            }
+            results.append(result)
+            print(f"{name:26s} {direction:6s} {backend:11s} {result['size_bytes']:7d}B "
+                  f"{result['ns_per_op']:12.1f} ns/op {result['allocs_per_op']:8.2f} allocs/op "
+                  f"{result['bytes_per_op']:10.1f} B/op", flush=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "devices": devices,
+        "results": results,
+    }
+
+
+def compare(previous: dict, current: dict):
+    def key(r):
+        return r["case"], r["direction"], r["backend"]
+
+    before = {key(r): r for r in previous.get("results", [])}
+    print(f"\nCompared with run from {previous.get('timestamp', '?')}:")
+    for result in current["results"]:
+        old = before.get(key(result))
+        if not old or not old["ns_per_op"]:
+            continue
+        change = (result["ns_per_op"] - old["ns_per_op"]) / old["ns_per_op"] * 100
+        print(f"{result['case']:26s} {result['direction']:6s} {result['backend']:11s} "
+              f"{old['ns_per_op']:12.1f} -> {result['ns_per_op']:12.1f} ns/op ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode/decode microbenchmarks for bm_protocol")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSON file the results are written to")
+    parser.add_argument("-c", "--compare", help="Earlier results file to compare against")
+    parser.add_argument("-k", "--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--devices", type=int, default=DEFAULT_DEVICES, help="Devices in the onList frame")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats, the fastest one is kept")
+    parser.add_argument("--memory-ops", type=int, default=200, help="Calls used to measure allocations")
+    args = parser.parse_args()
+
+    report = run(args.devices, args.repeat, args.memory_ops, args.filter)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(report['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
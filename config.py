@@ -22,14 +22,23 @@ HOST = "0.0.0.0"
 PORT = 8088
 
 _ALLOWED_LOG_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR"}
+_ALLOWED_CODEC_BACKENDS = {"pyamf", "struct"}
+_ALLOWED_CONNECTION_ENGINES = {"threads", "asyncio"}
+_ALLOWED_QUEUE_POLICIES = {"block", "drop"}
 
 class Config:
     def __init__(self):
         self.http_port = 8080
 
         self.max_connections = 100
+        self.connection_engine = "threads"
+        self.listen_backlog = 128
+        self.handshake_timeout = 10.0
+        self.handshake_workers = 4
         self.socket_timeout = 30.0
         self.buffer_size = 4096
+        self.max_buffer_size = 256 * 1024  # 256 KiB
+        self.buffer_pool_limit = 16 * 1024 * 1024  # 16 MiB
         self.max_packet_size = 1024 * 1024  # 1 MiB
 
         self.log_level = "INFO"
@@ -43,6 +52,23 @@ class Config:
 
         self.thread_pool_size = 10
         self.packet_queue_size = 100
+        self.dispatch_queue_policy = "block"
+
+        self.codec_backend = "struct"
+        self.lazy_decoding = True
+
+        self.chunk_spill_threshold = 1024 * 1024  # 1 MiB
+        self.max_chunk_set_size = 64 * 1024 * 1024  # 64 MiB
+        self.cut_through_threshold = 64 * 1024  # 64 KiB, 0 disables
+        self.cut_through_timeout = 2.0  # seconds a streamed frame may hold its target, plus:
+        self.cut_through_min_rate = 64 * 1024  # bytes per second the rest of a streamed frame may take
+
+        self.object_pooling = False
+        self.object_pool_size = 256
+
+        self.memory_soft_limit = 128 * 1024 * 1024  # 128 MiB, 0 disables
+        self.memory_hard_limit = 256 * 1024 * 1024  # 256 MiB, 0 disables
+        self.max_send_backlog = 8 * 1024 * 1024  # 8 MiB queued for one client, 0 disables
 
     @property
     def server_host(self) -> str:
@@ -75,8 +101,14 @@ class Config:
             mutable_keys = {
                 "http_port",
                 "max_connections",
+                "connection_engine",
+                "listen_backlog",
+                "handshake_timeout",
+                "handshake_workers",
                 "socket_timeout",
                 "buffer_size",
+                "max_buffer_size",
+                "buffer_pool_limit",
                 "log_level",
                 "log_to_file",
                 "log_file_path",
@@ -85,8 +117,21 @@ class Config:
                 "verbose_logging",
                 "thread_pool_size",
                 "packet_queue_size",
+                "dispatch_queue_policy",
                 "allow_anonymous_connections",
                 "max_packet_size",
+                "codec_backend",
+                "lazy_decoding",
+                "chunk_spill_threshold",
+                "max_chunk_set_size",
+                "cut_through_threshold",
+                "cut_through_timeout",
+                "cut_through_min_rate",
+                "object_pooling",
+                "object_pool_size",
+                "memory_soft_limit",
+                "memory_hard_limit",
+                "max_send_backlog",
             }
 
             for key, value in data.items():
@@ -113,8 +158,14 @@ class Config:
             "server_port": self.server_port,
             "http_port": self.http_port,
             "max_connections": self.max_connections,
+            "connection_engine": self.connection_engine,
+            "listen_backlog": self.listen_backlog,
+            "handshake_timeout": self.handshake_timeout,
+            "handshake_workers": self.handshake_workers,
             "socket_timeout": self.socket_timeout,
             "buffer_size": self.buffer_size,
+            "max_buffer_size": self.max_buffer_size,
+            "buffer_pool_limit": self.buffer_pool_limit,
             "log_level": self.log_level,
             "log_to_file": self.log_to_file,
             "log_file_path": self.log_file_path,
@@ -124,7 +175,20 @@ class Config:
             "verbose_logging": self.verbose_logging,
             "thread_pool_size": self.thread_pool_size,
             "packet_queue_size": self.packet_queue_size,
+            "dispatch_queue_policy": self.dispatch_queue_policy,
             "max_packet_size": self.max_packet_size,
+            "codec_backend": self.codec_backend,
+            "lazy_decoding": self.lazy_decoding,
+            "chunk_spill_threshold": self.chunk_spill_threshold,
+            "max_chunk_set_size": self.max_chunk_set_size,
+            "cut_through_threshold": self.cut_through_threshold,
+            "cut_through_timeout": self.cut_through_timeout,
+            "cut_through_min_rate": self.cut_through_min_rate,
+            "object_pooling": self.object_pooling,
+            "object_pool_size": self.object_pool_size,
+            "memory_soft_limit": self.memory_soft_limit,
+            "memory_hard_limit": self.memory_hard_limit,
+            "max_send_backlog": self.max_send_backlog,
         }
 
     def save_to_file(self, config_path: str):
@@ -146,6 +210,21 @@ class Config:
         except Exception:
             self.http_port = 8080
 
+        try:
+            self.listen_backlog = int(self.listen_backlog)
+        except Exception:
+            self.listen_backlog = 128
+
+        try:
+            self.handshake_timeout = float(self.handshake_timeout)
+        except Exception:
+            self.handshake_timeout = 10.0
+
+        try:
+            self.handshake_workers = int(self.handshake_workers)
+        except Exception:
+            self.handshake_workers = 4
+
         try:
             self.socket_timeout = float(self.socket_timeout)
         except Exception:
@@ -156,6 +235,16 @@ class Config:
         except Exception:
             self.buffer_size = 4096
 
+        try:
+            self.max_buffer_size = int(self.max_buffer_size)
+        except Exception:
+            self.max_buffer_size = 256 * 1024
+
+        try:
+            self.buffer_pool_limit = int(self.buffer_pool_limit)
+        except Exception:
+            self.buffer_pool_limit = 16 * 1024 * 1024
+
         try:
             self.log_max_size = int(self.log_max_size)
         except Exception:
@@ -181,9 +270,56 @@ class Config:
         except Exception:
             self.max_packet_size = 1024 * 1024
 
+        try:
+            self.chunk_spill_threshold = int(self.chunk_spill_threshold)
+        except Exception:
+            self.chunk_spill_threshold = 1024 * 1024
+
+        try:
+            self.max_chunk_set_size = int(self.max_chunk_set_size)
+        except Exception:
+            self.max_chunk_set_size = 64 * 1024 * 1024
+
+        try:
+            self.cut_through_threshold = int(self.cut_through_threshold)
+        except Exception:
+            self.cut_through_threshold = 64 * 1024
+
+        try:
+            self.cut_through_timeout = float(self.cut_through_timeout)
+        except Exception:
+            self.cut_through_timeout = 2.0
+
+        try:
+            self.cut_through_min_rate = int(self.cut_through_min_rate)
+        except Exception:
+            self.cut_through_min_rate = 64 * 1024
+
+        try:
+            self.object_pool_size = int(self.object_pool_size)
+        except Exception:
+            self.object_pool_size = 256
+
+        try:
+            self.memory_soft_limit = int(self.memory_soft_limit)
+        except Exception:
+            self.memory_soft_limit = 128 * 1024 * 1024
+
+        try:
+            self.memory_hard_limit = int(self.memory_hard_limit)
+        except Exception:
+            self.memory_hard_limit = 256 * 1024 * 1024
+
+        try:
+            self.max_send_backlog = int(self.max_send_backlog)
+        except Exception:
+            self.max_send_backlog = 8 * 1024 * 1024
+
         self.log_to_file = bool(self.log_to_file)
         self.debug = bool(self.debug)
         self.verbose_logging = bool(self.verbose_logging)
+        self.lazy_decoding = bool(self.lazy_decoding)
+        self.object_pooling = bool(self.object_pooling)
 
         self.log_file_path = str(self.log_file_path) if self.log_file_path is not None else "server.log"
 
@@ -192,6 +328,15 @@ class Config:
         if self.log_level == "DEBUG" and not bool(self.debug):
             self.log_level = "INFO"
 
+        backend = str(self.codec_backend).lower() if self.codec_backend is not None else "struct"
+        self.codec_backend = backend if backend in _ALLOWED_CODEC_BACKENDS else "struct"
+
+        engine = str(self.connection_engine).lower() if self.connection_engine is not None else "threads"
+        self.connection_engine = engine if engine in _ALLOWED_CONNECTION_ENGINES else "threads"
+
+        policy = str(self.dispatch_queue_policy).lower() if self.dispatch_queue_policy is not None else "block"
+        self.dispatch_queue_policy = policy if policy in _ALLOWED_QUEUE_POLICIES else "block"
+
     def validate(self) -> bool:
         if not (1 <= self.server_port <= 65535):
             print(f"Invalid fixed port: {self.server_port}")
@@ -203,7 +348,13 @@ class Config:
         if self.max_connections < 1:
             print(f"Invalid max_connections: {self.max_connections}")
             return False
-        if self.thread_pool_size < 1:
+        if self.listen_backlog < 1:
+            print(f"Invalid listen_backlog: {self.listen_backlog}")
+            return False
+        if self.handshake_workers < 1:
+            print(f"Invalid handshake_workers: {self.handshake_workers}")
+            return False
+        if self.thread_pool_size < 0:
             print(f"Invalid thread_pool_size: {self.thread_pool_size}")
             return False
         if self.packet_queue_size < 1:
@@ -212,18 +363,73 @@ class Config:
         if self.buffer_size < 512:
             print(f"buffer_size too small: {self.buffer_size}")
             return False
+        if self.max_buffer_size < self.buffer_size:
+            print(f"max_buffer_size smaller than buffer_size: {self.max_buffer_size}")
+            return False
+        if self.buffer_pool_limit < 0:
+            print(f"Invalid buffer_pool_limit: {self.buffer_pool_limit}")
+            return False
         if self.max_packet_size < 1024:
             print(f"max_packet_size too small: {self.max_packet_size}")
             return False
 
+        if self.chunk_spill_threshold < 0:
+            print(f"Invalid chunk_spill_threshold: {self.chunk_spill_threshold}")
+            return False
+        if self.max_chunk_set_size < 1:
+            print(f"Invalid max_chunk_set_size: {self.max_chunk_set_size}")
+            return False
+
+        if self.cut_through_threshold < 0:
+            print(f"Invalid cut_through_threshold: {self.cut_through_threshold}")
+            return False
+
+        if self.cut_through_timeout <= 0.0:
+            print(f"Invalid cut_through_timeout: {self.cut_through_timeout}")
+            return False
+
+        if self.cut_through_min_rate < 1:
+            print(f"Invalid cut_through_min_rate: {self.cut_through_min_rate}")
+            return False
+
+        if self.object_pool_size < 0:
+            print(f"Invalid object_pool_size: {self.object_pool_size}")
+            return False
+
+        if self.memory_soft_limit < 0 or self.memory_hard_limit < 0:
+            print(f"Invalid memory limits: soft={self.memory_soft_limit} hard={self.memory_hard_limit}")
+            return False
+        if self.memory_soft_limit and self.memory_hard_limit and self.memory_hard_limit < self.memory_soft_limit:
+            print(f"memory_hard_limit below memory_soft_limit: {self.memory_hard_limit}")
+            return False
+
+        if self.max_send_backlog < 0:
+            print(f"Invalid max_send_backlog: {self.max_send_backlog}")
+            return False
+
         if self.socket_timeout < 0.0:
             print(f"Invalid socket_timeout: {self.socket_timeout}")
             return False
+        if self.handshake_timeout < 0.0:
+            print(f"Invalid handshake_timeout: {self.handshake_timeout}")
+            return False
 
         if self.log_level not in _ALLOWED_LOG_LEVELS:
             print(f"Invalid log_level: {self.log_level}")
             return False
 
+        if self.codec_backend not in _ALLOWED_CODEC_BACKENDS:
+            print(f"Invalid codec_backend: {self.codec_backend}")
+            return False
+
+        if self.connection_engine not in _ALLOWED_CONNECTION_ENGINES:
+            print(f"Invalid connection_engine: {self.connection_engine}")
+            return False
+
+        if self.dispatch_queue_policy not in _ALLOWED_QUEUE_POLICIES:
+            print(f"Invalid dispatch_queue_policy: {self.dispatch_queue_policy}")
+            return False
+
         return True
 
     def __str__(self) -> str:
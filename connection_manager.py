@@ -16,31 +16,65 @@ You should have received a copy of the GNU Affero General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import queue
 import socket
 import threading
+import time
 from typing import Dict, List, Optional, Callable, Any
 from client_handler import ClientHandler
 from packet_processor import PacketProcessor
 from error_handler import ErrorHandler
 from config import Config
+from memory_governor import MemoryGovernor
+from dispatch_pool import DispatchPool
 from bm_protocol.registry import Registry
 
 class ConnectionManager:
     def __init__(self, config: Config, error_handler: ErrorHandler, registry: 'Registry' = None,
-                 packet_processor: 'PacketProcessor' = None, message_handlers: Dict[str, Callable] = None):
+                 packet_processor: 'PacketProcessor' = None, message_handlers: Dict[str, Callable] = None,
+                 relay_stream_opener: Callable = None):
         self.config = config
         self.error_handler = error_handler
         self.registry = registry
         self.packet_processor = packet_processor or PacketProcessor(error_handler, registry)
         self.message_handlers = message_handlers or {}
+        self.relay_stream_opener = relay_stream_opener
+        self.memory_governor = MemoryGovernor(
+            config.memory_soft_limit, config.memory_hard_limit, error_handler
+        )
+        # Without workers, handlers run on the thread that received the message.
+        self.dispatch_pool = None
+        if config.thread_pool_size:
+            self.dispatch_pool = DispatchPool(
+                config.thread_pool_size, config.packet_queue_size,
+                config.dispatch_queue_policy, error_handler
+            )
 
         self.server_socket = None
         self.is_running = False
         self.accept_thread = None
         self._shutdown_in_progress = False
+        # Accepted sockets waiting for a handshake worker: (socket, address, accepted_at).
+        self._handshake_queue = queue.Queue()
+        self._handshake_threads: List[threading.Thread] = []
+        self._handshake_stats = {
+            'completed': 0, 'timed_out': 0, 'rejected': 0, 'total_latency': 0.0, 'max_latency': 0.0
+        }
+        self._handshake_stats_lock = threading.Lock()
 
         self.clients: Dict[str, ClientHandler] = {}
         self.clients_lock = threading.Lock()
+        self._connection_count = 0
+        # Lookups for routing, kept under clients_lock. A device or slot maps to the
+        # client that registered it last; _index_keys holds what each client is indexed by.
+        self._by_device_id: Dict[str, ClientHandler] = {}
+        self._by_slot_id: Dict[int, ClientHandler] = {}
+        self._index_keys: Dict[ClientHandler, tuple] = {}
+        # Clients that disconnected, pushed by their handlers and cleaned up by _cleanup_worker.
+        self._disconnect_queue = queue.Queue()
+        self._cleanup_thread = None
+        # Counters of clients that are gone, so get_stats() covers the whole run.
+        self._closed_stats = {'frames_discarded': 0, 'bytes_discarded': 0, 'packets_dropped': 0}
 
         self.on_client_connected: Optional[Callable] = None
         self.on_client_disconnected: Optional[Callable] = None
@@ -55,9 +89,17 @@ class ConnectionManager:
             self.server_socket.settimeout(0.5)
 
             self.server_socket.bind((self.config.server_host, self.config.server_port))
-            self.server_socket.listen(self.config.max_connections)
+            self.server_socket.listen(self.config.listen_backlog)
 
             self.is_running = True
+            if self.dispatch_pool:
+                self.dispatch_pool.start()
+
+            self._start_cleanup_worker()
+            for _ in range(self.config.handshake_workers):
+                thread = threading.Thread(target=self._handshake_worker, daemon=True)
+                thread.start()
+                self._handshake_threads.append(thread)
 
             self.accept_thread = threading.Thread(target=self._accept_connections, daemon=True)
             self.accept_thread.start()
@@ -76,7 +118,6 @@ class ConnectionManager:
     def stop(self):
         self.is_running = False
         self._shutdown_in_progress = True
-        self._close_all_clients()
 
         if self.server_socket:
             try:
@@ -87,71 +128,32 @@ class ConnectionManager:
         if self.accept_thread and self.accept_thread.is_alive():
             self.accept_thread.join(timeout=2.0)
 
+        # Workers close whatever is still queued before they reach their sentinel.
+        for _ in self._handshake_threads:
+            self._handshake_queue.put(None)
+        for thread in self._handshake_threads:
+            thread.join(timeout=2.0)
+        self._handshake_threads = []
+
+        # Stopped before the clients, so receive loops waiting on a full queue are released.
+        if self.dispatch_pool:
+            self.dispatch_pool.stop()
+        self._close_all_clients()
+        self._stop_cleanup_worker()
+
         self.error_handler.log_info("Connection manager stopped", "CONNECTION_MANAGER")
 
     def _accept_connections(self):
+        """
+        Only accepts: sockets are queued for the handshake workers, so a burst
+        of connections doesn't wait on each other's handshakes.
+        """
         while self.is_running:
-            try:
-                self.cleanup_disconnected_clients()
-            except Exception as e:
-                self.error_handler.handle_server_error(e, "cleaning up disconnected clients")
-
             try:
                 client_socket, client_address = self.server_socket.accept()
-
-                self.cleanup_disconnected_clients()
-
-                with self.clients_lock:
-                    if len([c for c in self.clients.values() if c.is_connected()]) >= self.config.max_connections:
-                        self.error_handler.log_warning(
-                            f"Connection limit reached, rejecting {client_address[0]}:{client_address[1]}",
-                            "CONNECTION_MANAGER"
-                        )
-                        client_socket.close()
-                        continue
-
-                client_id = f"{client_address[0]}:{client_address[1]}"
-                client_handler = ClientHandler(
-                    client_socket=client_socket,
-                    client_address=client_address,
-                    packet_processor=self.packet_processor,
-                    error_handler=self.error_handler,
-                    registry=self.registry,
-                    message_handlers=self.message_handlers.copy(),
-                    on_disconnect_callback=None
-                )
-
-                if client_handler.start():
-                    with self.clients_lock:
-                        self.clients[client_id] = client_handler
-
-                    self.error_handler.log_info(
-                        f"New client connected: {client_address[0]}:{client_address[1]}",
-                        "CONNECTION_MANAGER"
-                    )
-
-                    if self.on_client_connected:
-                        try:
-                            self.on_client_connected(client_handler)
-                        except Exception as e:
-                            self.error_handler.handle_client_error(
-                                client_address, e, "client connected callback"
-                            )
-                else:
-                    self.error_handler.log_warning(
-                        f"Failed to start client handler for {client_address[0]}:{client_address[1]}",
-                        "CONNECTION_MANAGER"
-                    )
-                    try:
-                        client_socket.close()
-                    except:
-                        pass
+                self._handshake_queue.put((client_socket, client_address, time.monotonic()))
 
             except socket.timeout:
-                try:
-                    self.cleanup_disconnected_clients()
-                except Exception as e:
-                    self.error_handler.handle_server_error(e, "cleanup after timeout")
                 continue
             except socket.error as e:
                 if self.is_running:
@@ -161,6 +163,103 @@ class ConnectionManager:
                 self.error_handler.handle_server_error(e, "accepting connections")
                 break
 
+    def _handshake_worker(self):
+        while True:
+            item = self._handshake_queue.get()
+            if item is None:
+                return
+            client_socket, client_address, accepted_at = item
+
+            timeout = self.config.handshake_timeout
+            if not self.is_running or (timeout and time.monotonic() - accepted_at > timeout):
+                if self.is_running:
+                    self._record_handshake(None)
+                    self.error_handler.log_warning(
+                        f"Handshake for {client_address[0]}:{client_address[1]} timed out in the queue",
+                        "CONNECTION_MANAGER"
+                    )
+                self._close_socket(client_socket)
+                continue
+
+            try:
+                self._start_client(client_socket, client_address, accepted_at)
+            except Exception as e:
+                self.error_handler.handle_client_error(client_address, e, "starting client")
+                self._close_socket(client_socket)
+
+    @staticmethod
+    def _close_socket(client_socket: socket.socket):
+        try:
+            client_socket.close()
+        except OSError:
+            pass
+
+    def _start_client(self, client_socket: socket.socket, client_address: tuple, accepted_at: float):
+        if not self._reserve_connection():
+            self.error_handler.log_warning(
+                f"Connection limit reached, rejecting {client_address[0]}:{client_address[1]}",
+                "CONNECTION_MANAGER"
+            )
+            with self._handshake_stats_lock:
+                self._handshake_stats['rejected'] += 1
+            self._close_socket(client_socket)
+            return
+
+        client_id = f"{client_address[0]}:{client_address[1]}"
+        try:
+            client_handler = ClientHandler(
+                client_socket=client_socket,
+                client_address=client_address,
+                packet_processor=self.packet_processor,
+                error_handler=self.error_handler,
+                registry=self.registry,
+                message_handlers=self.message_handlers.copy(),
+                on_disconnect_callback=self._client_disconnected,
+                config=self.config,
+                relay_stream_opener=self.relay_stream_opener,
+                memory_governor=self.memory_governor,
+                dispatch_pool=self.dispatch_pool
+            )
+        except Exception:
+            self._release_connection()
+            raise
+
+        # Added before its receive loop starts, so whatever its first messages
+        # register is cleaned up with it even if it disconnects right away.
+        self._register_client(client_id, client_handler)
+        if client_handler.start():
+            self._record_handshake(time.monotonic() - accepted_at)
+            self.error_handler.log_info(
+                f"New client connected: {client_address[0]}:{client_address[1]}",
+                "CONNECTION_MANAGER"
+            )
+
+            if self.on_client_connected:
+                try:
+                    self.on_client_connected(client_handler)
+                except Exception as e:
+                    self.error_handler.handle_client_error(
+                        client_address, e, "client connected callback"
+                    )
+        else:
+            # stop() has queued its disconnect, which removes it and frees its slot.
+            self.error_handler.log_warning(
+                f"Failed to start client handler for {client_address[0]}:{client_address[1]}",
+                "CONNECTION_MANAGER"
+            )
+            self._close_socket(client_socket)
+
+    def _record_handshake(self, latency: Optional[float]):
+        """Counts a handshake that completed after latency seconds, or timed out (None)."""
+        stats = self._handshake_stats
+        with self._handshake_stats_lock:
+            if latency is None:
+                stats['timed_out'] += 1
+                return
+            stats['completed'] += 1
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+
     def _close_all_clients(self):
         with self.clients_lock:
             for client_id, client_handler in list(self.clients.items()):
@@ -170,8 +269,14 @@ class ConnectionManager:
                     self.error_handler.handle_client_error(
                         client_handler.client_address, e, "closing client"
                     )
+                self._retire_client_stats(client_handler)
 
+            # Slots reserved by handshakes still in progress stay counted.
+            self._connection_count -= len(self.clients)
             self.clients.clear()
+            self._by_device_id.clear()
+            self._by_slot_id.clear()
+            self._index_keys.clear()
 
     def get_connected_clients(self) -> List[Dict[str, Any]]:
         clients_info = []
@@ -186,39 +291,174 @@ class ConnectionManager:
         return clients_info
 
     def get_connection_count(self) -> int:
+        return self._connection_count
+
+    def _reserve_connection(self) -> bool:
+        """
+        Takes one of the max_connections slots for a client being accepted, or
+        returns False if none is left. The check and the count change together,
+        so concurrent handshakes can't overshoot the limit.
+        """
         with self.clients_lock:
-            return len([c for c in self.clients.values() if c.is_connected()])
+            if self._connection_count >= self.config.max_connections:
+                return False
+            self._connection_count += 1
+        return True
 
-    def cleanup_disconnected_clients(self):
-        to_cleanup = []
+    def _release_connection(self):
         with self.clients_lock:
-            for client_id, client_handler in list(self.clients.items()):
-                if not client_handler.is_connected():
-                    to_cleanup.append((client_id, client_handler))
+            self._connection_count -= 1
+
+    def _register_client(self, client_id: str, client_handler: ClientHandler) -> bool:
+        """
+        Adds a client into the slot reserved for it. Returns False if it
+        disconnected already, in which case its disconnect has been through the
+        cleanup queue, it must not be added and its slot is freed. Clients are
+        added before they can receive anything.
+        """
+        with self.clients_lock:
+            if client_handler._disconnect_notified:
+                self._connection_count -= 1
+                return False
+            self.clients[client_id] = client_handler
+        return True
+
+    def _client_disconnected(self, client_handler: ClientHandler):
+        """
+        Called once by a client handler when its client disconnects. Cleanup
+        waits for the messages it already sent to be handled.
+        """
+        if self.dispatch_pool:
+            self.dispatch_pool.when_idle(client_handler, lambda: self._disconnect_queue.put(client_handler))
+        else:
+            self._disconnect_queue.put(client_handler)
+
+    def _start_cleanup_worker(self):
+        self._cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
+        self._cleanup_thread.start()
+
+    def _stop_cleanup_worker(self):
+        if self._cleanup_thread and self._cleanup_thread.is_alive():
+            self._disconnect_queue.put(None)
+            self._cleanup_thread.join(timeout=2.0)
+        self._cleanup_thread = None
+
+    def _cleanup_worker(self):
+        while True:
+            client_handler = self._disconnect_queue.get()
+            if client_handler is None:
+                return
+            self._remove_client(client_handler)
 
-        for client_id, client_handler in to_cleanup:
+    def cleanup_disconnected_clients(self):
+        """
+        Cleans up queued disconnects on the calling thread instead of waiting
+        for the cleanup worker.
+        """
+        while True:
             try:
-                if not getattr(client_handler, "_server_cleanup_done", False):
-                    if self.on_client_disconnected:
-                        self.on_client_disconnected(client_handler)
-                    setattr(client_handler, "_server_cleanup_done", True)
+                client_handler = self._disconnect_queue.get_nowait()
+            except queue.Empty:
+                return
+            if client_handler is None:
+                # The worker's stop sentinel stays for the worker.
+                self._disconnect_queue.put(None)
+                return
+            self._remove_client(client_handler)
+
+    def _remove_client(self, client_handler: ClientHandler):
+        client_id = f"{client_handler.client_address[0]}:{client_handler.client_address[1]}"
+        with self.clients_lock:
+            # Its first messages can index it before it is added, so this goes either way.
+            self._unindex_client(client_handler)
+            if self.clients.get(client_id) is not client_handler:
+                return
+            del self.clients[client_id]
+            self._connection_count -= 1
+            self._retire_client_stats(client_handler)
+
+        if self.on_client_disconnected and not self._shutdown_in_progress:
+            try:
+                self.on_client_disconnected(client_handler)
             except Exception as e:
                 self.error_handler.handle_client_error(
                     client_handler.client_address, e, "client disconnected callback"
                 )
 
+        self.error_handler.log_info(f"Cleaned up disconnected client: {client_id}", "CONNECTION_MANAGER")
+
+    def _retire_client_stats(self, client_handler: ClientHandler):
+        self._closed_stats['frames_discarded'] += client_handler.buffer.frames_discarded
+        self._closed_stats['bytes_discarded'] += client_handler.buffer.bytes_discarded
+        self._closed_stats['packets_dropped'] += client_handler.packets_dropped
+
+    def get_stats(self) -> Dict[str, Any]:
         with self.clients_lock:
-            for client_id, _ in to_cleanup:
-                self.clients.pop(client_id, None)
-                self.error_handler.log_info(f"Cleaned up disconnected client: {client_id}", "CONNECTION_MANAGER")
+            clients = list(self.clients.values())
+            stats = dict(self._closed_stats)
+
+        stats['connections'] = self._connection_count
+        for client_handler in clients:
+            stats['frames_discarded'] += client_handler.buffer.frames_discarded
+            stats['bytes_discarded'] += client_handler.buffer.bytes_discarded
+            stats['packets_dropped'] += client_handler.packets_dropped
+        stats['memory'] = self.memory_governor.stats()
+        stats['handshake'] = self.get_handshake_stats()
+        if self.dispatch_pool:
+            stats['dispatch'] = self.dispatch_pool.stats()
+        return stats
+
+    def get_handshake_stats(self) -> Dict[str, Any]:
+        with self._handshake_stats_lock:
+            stats = dict(self._handshake_stats)
+        total_latency = stats.pop('total_latency')
+        stats['pending'] = self._handshake_queue.qsize()
+        stats['avg_latency_ms'] = total_latency / stats['completed'] * 1000 if stats['completed'] else 0.0
+        stats['max_latency_ms'] = stats.pop('max_latency') * 1000
+        return stats
+
+    def index_client(self, client_handler: ClientHandler) -> Optional[ClientHandler]:
+        """
+        Indexes a client under its current device_id and slot_id, replacing
+        whatever it was indexed under before. If another client already has
+        that device_id or slot_id, the lookup moves to this one: the last
+        registration wins, and the other client stays connected but no longer
+        receives relays. Returns that other client for the device_id, if any.
+        """
+        device_id = client_handler.device_id or None
+        slot_id = int(client_handler.slot_id or 0) or None
+
+        with self.clients_lock:
+            # The client may not be in self.clients yet, its first messages can arrive
+            # before that. One that disconnected already would never be unindexed.
+            if client_handler._disconnect_notified:
+                return None
+            self._unindex_client(client_handler)
+
+            replaced = None
+            if device_id is not None:
+                replaced = self._by_device_id.get(device_id)
+                self._by_device_id[device_id] = client_handler
+            if slot_id is not None:
+                self._by_slot_id[slot_id] = client_handler
+            self._index_keys[client_handler] = (device_id, slot_id)
+
+        return replaced
+
+    def _unindex_client(self, client_handler: ClientHandler):
+        device_id, slot_id = self._index_keys.pop(client_handler, (None, None))
+        if device_id is not None and self._by_device_id.get(device_id) is client_handler:
+            del self._by_device_id[device_id]
+        if slot_id is not None and self._by_slot_id.get(slot_id) is client_handler:
+            del self._by_slot_id[slot_id]
 
     def get_client_by_device_id(self, device_id: str) -> Optional[ClientHandler]:
         with self.clients_lock:
-            for client_handler in self.clients.values():
-                if hasattr(client_handler, 'device_id') and client_handler.device_id == device_id:
-                    return client_handler
+            return self._by_device_id.get(device_id)
 
-        return None
+    def get_client_by_slot_id(self, slot_id: int) -> Optional[ClientHandler]:
+        with self.clients_lock:
+            return self._by_slot_id.get(slot_id)
 
     def set_connection_callbacks(self, on_connected: Callable = None, on_disconnected: Callable = None):
         self.on_client_connected = on_connected
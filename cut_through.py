@@ -0,0 +1,193 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import select
+import socket
+import time
+from typing import Optional
+
+SPLICE_SUPPORTED = hasattr(os, "splice")
+CHUNK_SIZE = 64 * 1024  # Default pipe capacity on Linux.
+
+
+class SourceError(Exception):
+    """
+    The sending socket closed or failed before the frame was complete.
+    delivered is how many of its bytes had reached the target by then.
+    """
+
+    def __init__(self, reason, delivered: int = 0):
+        super().__init__(reason)
+        self.delivered = delivered
+
+
+class TargetError(Exception):
+    """The receiving socket failed; the source was drained to the frame's end."""
+
+
+def _wait(sock: socket.socket, writable: bool, deadline: float = None):
+    timeout = sock.gettimeout()
+    if deadline is not None:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise socket.timeout("deadline passed")
+        timeout = left if timeout is None else min(timeout, left)
+    if writable:
+        ready = select.select([], [sock], [], timeout)[1]
+    else:
+        ready = select.select([sock], [], [], timeout)[0]
+    if not ready:
+        raise socket.timeout("timed out")
+
+
+def _wait_source(src: socket.socket, deadline: float = None):
+    try:
+        _wait(src, writable=False, deadline=deadline)
+    except OSError as e:
+        raise SourceError(e)
+
+
+def _forward_splice(src: socket.socket, dst: socket.socket, count: int, deadline: float = None) -> int:
+    """
+    Moves count bytes through a pipe with splice(2), so the payload never
+    enters userspace. Returns how many bytes reached dst.
+    """
+    pipe_read, pipe_write = os.pipe()
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    remaining = count
+    delivered = 0
+    target_error = None
+    try:
+        while remaining:
+            if deadline is not None:
+                _wait_source(src, deadline)
+            try:
+                received = os.splice(src_fd, pipe_write, min(CHUNK_SIZE, remaining))
+            except BlockingIOError:
+                _wait_source(src, deadline)
+                continue
+            except OSError as e:
+                if remaining == count:
+                    raise
+                raise SourceError(e)
+            if received == 0:
+                raise SourceError("connection closed")
+            remaining -= received
+
+            pending = received
+            while pending:
+                if target_error is None:
+                    try:
+                        moved = os.splice(pipe_read, dst_fd, pending)
+                    except BlockingIOError:
+                        try:
+                            _wait(dst, writable=True, deadline=deadline)
+                        except OSError as e:
+                            target_error = e
+                        continue
+                    except OSError as e:
+                        target_error = e
+                        continue
+                    delivered += moved
+                else:
+                    moved = len(os.read(pipe_read, pending))
+                pending -= moved
+    except SourceError as e:
+        e.delivered = delivered
+        raise
+    finally:
+        os.close(pipe_read)
+        os.close(pipe_write)
+
+    if target_error is not None:
+        raise TargetError(target_error)
+    return delivered
+
+
+def _send(dst: socket.socket, data, deadline: float):
+    if deadline is None:
+        dst.sendall(data)
+        return
+    while data:
+        _wait(dst, writable=True, deadline=deadline)
+        data = data[dst.send(data):]
+
+
+def _forward_copy(src: socket.socket, dst: Optional[socket.socket], count: int, deadline: float = None) -> int:
+    buf = bytearray(min(CHUNK_SIZE, count))
+    view = memoryview(buf)
+    remaining = count
+    delivered = 0
+    target_error = None
+
+    while remaining:
+        try:
+            if deadline is not None:
+                _wait_source(src, deadline)
+            try:
+                received = src.recv_into(view, min(len(buf), remaining))
+            except OSError as e:
+                raise SourceError(e)
+            if received == 0:
+                raise SourceError("connection closed")
+        except SourceError as e:
+            e.delivered = delivered
+            raise
+        remaining -= received
+
+        if target_error is None and dst is not None:
+            try:
+                _send(dst, view[:received], deadline)
+                delivered += received
+            except OSError as e:
+                target_error = e
+
+    if target_error is not None:
+        raise TargetError(target_error)
+    return delivered
+
+
+def forward(src: socket.socket, dst: socket.socket, count: int, deadline: float = None) -> int:
+    """
+    Streams the next count bytes of src to dst as they arrive, using splice
+    where the platform and sockets allow it and a fixed userspace buffer
+    otherwise. src is always left at the end of those count bytes unless a
+    SourceError is raised, which includes not getting them all before
+    deadline (a time.monotonic() value).
+    """
+    if count <= 0:
+        return 0
+    if SPLICE_SUPPORTED:
+        try:
+            return _forward_splice(src, dst, count, deadline)
+        except (SourceError, TargetError):
+            raise
+        except OSError:
+            # splice refused these descriptors before moving anything.
+            pass
+    return _forward_copy(src, dst, count, deadline)
+
+
+def drain(src: socket.socket, count: int, deadline: float = None):
+    """
+    Reads and drops the next count bytes of src, for a frame whose target
+    failed before any of it was streamed. Raises SourceError like forward().
+    """
+    if count > 0:
+        _forward_copy(src, None, count, deadline)
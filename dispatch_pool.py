@@ -0,0 +1,200 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Callable, Dict
+import send_batch
+
+QUEUE_POLICIES = ("block", "drop")
+
+
+class _SerialQueue:
+    __slots__ = ('key', 'jobs', 'scheduled', 'idle_callbacks')
+
+    def __init__(self, key):
+        self.key = key
+        self.jobs = deque()
+        self.scheduled = False
+        self.idle_callbacks = []
+
+
+class DispatchPool:
+    """
+    Fixed set of worker threads that run jobs from per-key serial queues.
+    Jobs submitted under one key (a connection) run one at a time in the
+    order they were submitted; jobs of different keys run in parallel.
+    A worker takes everything queued for a key, runs it inside one
+    SendBatch and moves on, so one busy key can't hold a worker forever.
+
+    Each key queues at most queue_size jobs. When that is reached, the
+    "block" policy makes submit() wait for room and "drop" rejects the job
+    and counts it.
+    """
+
+    def __init__(self, workers: int, queue_size: int, policy: str = "block", error_handler=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.error_handler = error_handler
+        self.is_running = False
+        self._threads = []
+        self._queues: Dict[Any, _SerialQueue] = {}
+        self._ready = deque()
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.blocked = 0
+
+    def start(self):
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"dispatch-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stops the workers. Jobs that haven't started are discarded."""
+        with self._lock:
+            self.is_running = False
+            self._work.notify_all()
+            self._space.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+        with self._lock:
+            self._queues.clear()
+            self._ready.clear()
+
+    def submit(self, key, job: Callable, *args, wait: bool = True) -> bool:
+        """
+        Queues job(*args) behind the jobs already submitted under key. Returns
+        False if it was dropped. With wait=False a full queue under the "block"
+        policy takes the job anyway; see is_full().
+        """
+        with self._lock:
+            if not self.is_running:
+                return False
+            queue = self._queues.get(key)
+            if queue is not None and len(queue.jobs) >= self.queue_size:
+                if self.policy == "drop":
+                    self.dropped += 1
+                    return False
+                if wait:
+                    self.blocked += 1
+                    while queue is not None and len(queue.jobs) >= self.queue_size:
+                        self._space.wait()
+                        if not self.is_running:
+                            return False
+                        queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = _SerialQueue(key)
+
+            queue.jobs.append((job, args))
+            self.submitted += 1
+            if not queue.scheduled:
+                queue.scheduled = True
+                self._ready.append(queue)
+                self._work.notify()
+        return True
+
+    def is_full(self, key) -> bool:
+        with self._lock:
+            queue = self._queues.get(key)
+            return queue is not None and len(queue.jobs) >= self.queue_size
+
+    def is_idle(self, key) -> bool:
+        """True when nothing is queued or running for key."""
+        with self._lock:
+            return key not in self._queues
+
+    def when_idle(self, key, callback: Callable):
+        """
+        Calls callback() once every job submitted under key so far has run:
+        right away if nothing is pending, otherwise from the worker that
+        finishes the last one.
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.idle_callbacks.append(callback)
+                return
+        callback()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self.is_running and not self._ready:
+                    self._work.wait()
+                if not self.is_running:
+                    return
+                queue = self._ready.popleft()
+                jobs = list(queue.jobs)
+                queue.jobs.clear()
+                self._space.notify_all()
+
+            if len(jobs) == 1:
+                self._run_job(*jobs[0])
+            else:
+                with send_batch.batching():
+                    for job, args in jobs:
+                        self._run_job(job, args)
+
+            with self._lock:
+                self.completed += len(jobs)
+                if queue.jobs:
+                    self._ready.append(queue)
+                    self._work.notify()
+                    continue
+                queue.scheduled = False
+                if self._queues.get(queue.key) is queue:
+                    del self._queues[queue.key]
+                callbacks, queue.idle_callbacks = queue.idle_callbacks, []
+
+            for callback in callbacks:
+                self._run_job(callback, ())
+
+    def _run_job(self, job: Callable, args: tuple):
+        try:
+            job(*args)
+        except Exception as e:
+            if self.error_handler:
+                self.error_handler.log_error(f"Dispatched job failed: {e}", "DISPATCH_POOL")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'policy': self.policy,
+                'clients': len(self._queues),
+                'queued': sum(len(queue.jobs) for queue in self._queues.values()),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'blocked': self.blocked,
+            }
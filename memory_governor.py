@@ -0,0 +1,160 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from typing import Any, Dict, List
+
+# How many of the largest connections stats() lists.
+TOP_CONSUMERS = 5
+
+
+def _label(connection) -> str:
+    address = getattr(connection, 'client_address', None)
+    if address:
+        return f"{address[0]}:{address[1]}"
+    return str(connection)
+
+
+class MemoryGovernor:
+    """
+    Tracks the bytes each connection holds in buffers and the total across
+    all of them. Connections report their usage with update() and drop out
+    with release(). backlog is the part of a connection's usage waiting to be
+    sent to it, which drains without reading anything more from it.
+
+    Above soft_limit the connections with the largest backlog are asked to
+    pause reading until their backlog has drained or the total is back under
+    the limit. Received data only drains by reading more of it, so pausing
+    would never shrink it; that is left to hard_limit, above which the
+    largest connections are disconnected until the rest fits. A limit of 0
+    disables that check.
+
+    Connections must provide pause_reading(), resume_reading() and abort(reason).
+    These are called outside the governor's lock.
+    """
+
+    def __init__(self, soft_limit: int = 0, hard_limit: int = 0, error_handler=None):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.error_handler = error_handler
+        self._lock = threading.Lock()
+        self._usage: Dict[Any, int] = {}
+        self._backlog: Dict[Any, int] = {}
+        self._paused = set()
+        self._evicted = set()
+        self.total = 0
+        self.peak = 0
+        self.pauses = 0
+        self.disconnects = 0
+
+    def update(self, connection, usage: int, backlog: int = 0):
+        with self._lock:
+            self.total += usage - self._usage.get(connection, 0)
+            self._usage[connection] = usage
+            if backlog:
+                self._backlog[connection] = backlog
+            else:
+                self._backlog.pop(connection, None)
+            self.peak = max(self.peak, self.total)
+            to_pause, to_resume, to_evict = self._rebalance()
+        self._apply(to_pause, to_resume, to_evict)
+
+    def release(self, connection):
+        with self._lock:
+            self.total -= self._usage.pop(connection, 0)
+            self._backlog.pop(connection, None)
+            self._paused.discard(connection)
+            self._evicted.discard(connection)
+            to_pause, to_resume, to_evict = self._rebalance()
+        self._apply(to_pause, to_resume, to_evict)
+
+    @staticmethod
+    def _largest(usages: Dict[Any, int], excess: int, exclude) -> List[Any]:
+        chosen = []
+        for connection, usage in sorted(usages.items(), key=lambda item: item[1], reverse=True):
+            if excess <= 0 or usage <= 0:
+                break
+            if connection in exclude:
+                continue
+            chosen.append(connection)
+            excess -= usage
+        return chosen
+
+    def _rebalance(self):
+        # Evicted connections free their buffers once their receive loop exits.
+        live_total = self.total - sum(self._usage.get(c, 0) for c in self._evicted)
+
+        to_evict = []
+        if self.hard_limit and live_total > self.hard_limit:
+            to_evict = self._largest(self._usage, live_total - self.hard_limit, self._evicted)
+            self._evicted.update(to_evict)
+            self._paused.difference_update(to_evict)
+            live_total -= sum(self._usage[c] for c in to_evict)
+
+        to_pause = []
+        to_resume = []
+        if self.soft_limit and live_total > self.soft_limit:
+            # Nothing is left to drain once a paused connection's backlog is sent.
+            to_resume = [c for c in self._paused if c not in self._backlog]
+            self._paused.difference_update(to_resume)
+            paused_total = sum(self._backlog[c] for c in self._paused)
+            to_pause = self._largest(
+                self._backlog, live_total - self.soft_limit - paused_total, self._paused | self._evicted
+            )
+            self._paused.update(to_pause)
+        elif self._paused:
+            to_resume = list(self._paused)
+            self._paused.clear()
+
+        return to_pause, to_resume, to_evict
+
+    def _apply(self, to_pause, to_resume, to_evict):
+        for connection in to_resume:
+            connection.resume_reading()
+        for connection in to_pause:
+            self.pauses += 1
+            connection.pause_reading()
+        for connection in to_evict:
+            self.disconnects += 1
+            connection.abort(f"buffered memory over the hard limit ({self.hard_limit} bytes)")
+
+        if to_pause and self.error_handler:
+            self.error_handler.log_warning(
+                f"Buffered memory {self.total} bytes over the soft limit ({self.soft_limit}), "
+                f"paused reading from {len(to_pause)} connection(s)",
+                "MEMORY_GOVERNOR"
+            )
+
+    def is_paused(self, connection) -> bool:
+        return connection in self._paused
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            largest = sorted(self._usage.items(), key=lambda item: item[1], reverse=True)[:TOP_CONSUMERS]
+            return {
+                'total_bytes': self.total,
+                'backlog_bytes': sum(self._backlog.values()),
+                'peak_bytes': self.peak,
+                'soft_limit': self.soft_limit,
+                'hard_limit': self.hard_limit,
+                'connections': len(self._usage),
+                'paused': len(self._paused),
+                'pauses': self.pauses,
+                'disconnects': self.disconnects,
+                'largest': [{'connection': _label(c), 'bytes': usage} for c, usage in largest],
+            }
@@ -17,10 +17,9 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import time
-from bm_protocol.device_address import DeviceAddress
-from bm_protocol.flash_device import FlashDevice
 from bm_protocol.device_type import DeviceType
 from bm_protocol.packet import Packet
+from bm_protocol.object_pool import acquire
 from bm_protocol.packet_type import PacketType
 
 class PacketOperationsMixin:
@@ -31,6 +30,9 @@ class PacketOperationsMixin:
         self.device_id = None
         self.device_name = None
 
+    def _sendall(self, socket_obj, data):
+        socket_obj.sendall(data)
+
     def send_invoke_packet_to_socket(self, socket_obj, method: str, params: list = None,
                                      sequence: int = 1, return_method: str = None,
                                      device_id: str = None, device_name: str = None,
@@ -55,7 +57,7 @@ class PacketOperationsMixin:
                                              "PACKET_OPERATIONS")
                 return False
 
-            socket_obj.sendall(packet_data)
+            self._sendall(socket_obj, packet_data)
             self.error_handler.log_info(f"Sent {method} packet", "PACKET_OPERATIONS")
             return True
         except Exception as e:
@@ -83,7 +85,7 @@ class PacketOperationsMixin:
                                              "PACKET_OPERATIONS")
                 return False
 
-            socket_obj.sendall(packet_data)
+            self._sendall(socket_obj, packet_data)
             self.error_handler.log_info("Sent raw packet", "PACKET_OPERATIONS")
             return True
         except Exception as e:
@@ -92,7 +94,7 @@ class PacketOperationsMixin:
 
     def send_version_packet_to_socket(self, socket_obj) -> bool:
         try:
-            handshake_data = self.packet_processor.create_version_packet()
+            handshake_data = self.packet_processor.templates.version_frame()
             socket_obj.send(handshake_data)
             self.error_handler.log_debug("Version packet sent", "PACKET_OPERATIONS")
             return True
@@ -103,12 +105,11 @@ class PacketOperationsMixin:
     def send_registration_response_to_socket(self, socket_obj, original_invoke, server_device_id: str,
                                            server_host: str, server_port: int) -> bool:
         try:
-            packet = self.packet_processor.create_registration_response_packet(
+            packet_data = self.packet_processor.templates.registration_response_frame(
                 original_invoke, server_device_id, server_host, server_port
             )
-            packet_data = self.packet_processor.create_response_packet(packet)
             if packet_data:
-                socket_obj.sendall(packet_data)
+                self._sendall(socket_obj, packet_data)
                 self.error_handler.log_info("Sent registration response", "PACKET_OPERATIONS")
                 return True
             return False
@@ -119,7 +120,7 @@ class PacketOperationsMixin:
     @staticmethod
     def create_relay_packet_common(sender_device_id: str, sender_device_name: str,
                                    sender_device_type, relay_message, server_device_id: str = None):
-        relay_packet = Packet()
+        relay_packet = acquire(Packet)
         relay_packet.sequence = getattr(relay_message, 'id', 1)
         relay_packet.timestamp = time.time() * 1000
         relay_packet.packet_type = PacketType.DATA
@@ -131,26 +132,11 @@ class PacketOperationsMixin:
 
     def send_ping_response_to_socket(self, socket_obj, server_device_id: str, server_host: str, server_port: int) -> bool:
         try:
-            server_address = DeviceAddress(host=server_host, port=server_port)
-            server_device = FlashDevice(
-                device_id=server_device_id,
-                device_name="Registry",
-                address=server_address
+            packet_data = self.packet_processor.templates.ping_frame(
+                server_device_id, server_host, server_port
             )
-            server_device.device_type = DeviceType.SERVER
-
-            packet = Packet()
-            packet.sequence = 1
-            packet.timestamp = time.time() * 1000
-            packet.packet_type = PacketType.PING
-            packet.device_type = DeviceType.SERVER
-            packet.device_id = server_device_id
-            packet.device_name = "Registry"
-            packet.message = server_device
-
-            packet_data = self.packet_processor.create_response_packet(packet)
             if packet_data:
-                socket_obj.sendall(packet_data)
+                self._sendall(socket_obj, packet_data)
                 self.error_handler.log_info("Sent ping response", "PACKET_OPERATIONS")
                 return True
             return False
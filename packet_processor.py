@@ -17,6 +17,7 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
 import time
+import struct
 from pyamf import amf3
 from pyamf import register_class
 from typing import Optional
@@ -35,13 +36,21 @@ from bm_protocol.bm_registry_info import BMRegistryInfo
 from bm_protocol.version import VersionPacket as Version
 from bm_protocol.version_8bit import Version8Bit
 from bm_protocol.stream import Stream
+from bm_protocol.frame_writer import FrameWriter
 from bm_protocol.registry import Registry
 from bm_protocol.packet import Packet
+from bm_protocol.object_pool import acquire, release
+from packet_templates import PacketTemplateCache
+
+# Class id and first int of an encoded object, i.e. the id of a BMInvoke.
+_RAW_OBJECT_HEAD = struct.Struct('<3xhi')
+_UINT = struct.Struct('<I')
 
 class PacketProcessor:
     def __init__(self, error_handler=None, registry=None):
         self.error_handler = error_handler
         self.registry = registry
+        self.templates = PacketTemplateCache(self)
         self._register_amf_classes()
 
     @staticmethod
@@ -116,6 +125,27 @@ class PacketProcessor:
 
         return output_buffer.getvalue()
 
+    @staticmethod
+    def create_ping_response_packet(server_device_id: str, server_host: str, server_port: int) -> 'Packet':
+        server_address = DeviceAddress(host=server_host, port=server_port)
+        server_device = FlashDevice(
+            device_id=server_device_id,
+            device_name="Registry",
+            address=server_address
+        )
+        server_device.device_type = DeviceType.SERVER
+
+        packet = Packet()
+        packet.sequence = 1
+        packet.timestamp = time.time() * 1000
+        packet.packet_type = PacketType.PING
+        packet.device_type = DeviceType.SERVER
+        packet.device_id = server_device_id
+        packet.device_name = "Registry"
+        packet.message = server_device
+
+        return packet
+
     @staticmethod
     def create_registration_response_packet(original_invoke, server_device_id: str,
                                             server_host: str, server_port: int) -> 'Packet':
@@ -149,6 +179,50 @@ class PacketProcessor:
 
         return packet
 
+    def create_relay_frame(self, sender_device_id: str, sender_device_name: str,
+                           sender_device_type, raw_message, message_size: int = None) -> Optional[bytes]:
+        """
+        Frames an already encoded relay message behind a fresh Packet header.
+        The message bytes are copied from the inbound frame unchanged.
+        With message_size, raw_message may be just the start of the message:
+        the length prefix covers message_size bytes and the caller sends the rest.
+        """
+        try:
+            sequence = 1
+            if len(raw_message) >= _RAW_OBJECT_HEAD.size:
+                class_id, first_int = _RAW_OBJECT_HEAD.unpack_from(raw_message, 0)
+                if class_id == Registry.id_for_class_global(BMInvoke):
+                    sequence = first_int
+
+            header = acquire(Packet)
+            header.sequence = sequence
+            header.timestamp = time.time() * 1000
+            header.packet_type = PacketType.DATA
+            header.device_type = sender_device_type or DeviceType.SERVER
+            header.device_id = sender_device_id or "unknown"
+            header.device_name = sender_device_name or "Unknown"
+
+            Registry.init_global()
+
+            # Header fields up to the message flag are Packet's own encoding;
+            # flag it present and append the inbound object verbatim.
+            writer = FrameWriter(self.registry)
+            writer.begin_frame()
+            writer.write_object(header)
+            release(header)
+            writer.buf[-1] = 1
+            writer.write(raw_message)
+            size = writer.end_frame()
+            if message_size is not None:
+                _UINT.pack_into(writer.buf, 0, size - len(raw_message) + message_size)
+            return writer.getvalue()
+
+        except Exception as e:
+            self.error_handler.handle_client_error(
+                None, e, "creating relay frame"
+            )
+            return None
+
     def create_response_packet(self, packet_obj) -> Optional[bytes]:
         try:
             if not isinstance(packet_obj, Packet):
@@ -160,82 +234,15 @@ class PacketProcessor:
 
             Registry.init_global()
 
-            output_buffer = amf3.ByteArray()
-            output_buffer.endian = '<'
-
-            output_buffer.writeShort(1)
-            output_buffer.writeByte(ord("@"))
-
-            packet_registry_id = Registry.id_for_class_global(Packet)
-            if packet_registry_id is None:
-                self.error_handler.log_error("No registry ID for Packet class", "PACKET_PROCESSOR")
-                return None
-
-            output_buffer.writeShort(packet_registry_id)
-
-            class DataOutputWrapper:
-                def __init__(self, buffer):
-                    self.buffer = buffer
-
-                def writeInt(self, value):
-                    self.buffer.writeInt(value)
-
-                def writeShort(self, value):
-                    self.buffer.writeShort(value)
-
-                def writeDouble(self, value):
-                    self.buffer.writeDouble(value)
-
-                def writeFloat(self, value):
-                    self.buffer.writeFloat(value)
-
-                def writeUnsignedInt(self, value):
-                    self.buffer.writeUnsignedInt(value)
-
-                def writeUTF(self, value):
-                    if not value:
-                        value = ""
-                    temp = amf3.ByteArray()
-                    temp.endian = '<'
-                    temp.writeUTFBytes(value)
-                    self.buffer.writeShort(len(temp))
-                    temp.seek(0)
-                    while temp.remaining() > 0:
-                        self.buffer.writeByte(temp.readByte())
-
-                def writeBoolean(self, value):
-                    self.buffer.writeBoolean(value)
-
-                def writeObject(self, obj):
-                    if hasattr(obj, 'write_external'):
-                        self.buffer.writeShort(1)
-                        self.buffer.writeByte(ord("@"))
-
-                        obj_registry_id = Registry.id_for_class_global(type(obj))
-                        if obj_registry_id is not None:
-                            self.buffer.writeShort(obj_registry_id)
-                            obj.write_external(self)
-                        else:
-                            raise Exception(f"No registry ID for class: {type(obj)}")
-
-            wrapper = DataOutputWrapper(output_buffer)
-            packet_obj.write_external(wrapper)
-
-            packet_content = output_buffer.getvalue()
-
-            if len(packet_content) == 0:
-                self.error_handler.log_warning("Empty packet data generated", "PACKET_PROCESSOR")
-                return None
-
-            size = len(packet_content)
-            header_ba = amf3.ByteArray()
-            header_ba.endian = '<'
-            header_ba.writeUnsignedInt(size)
+            writer = FrameWriter(self.registry)
+            writer.begin_frame()
+            writer.write_object(packet_obj)
+            size = writer.end_frame()
 
-            final_packet = header_ba.getvalue() + packet_content
+            final_packet = writer.getvalue()
 
             self.error_handler.log_debug(
-                f"Created packet with {len(final_packet)} bytes (header: {len(header_ba.getvalue())}, content: {len(packet_content)})",
+                f"Created packet with {len(final_packet)} bytes (header: 4, content: {size})",
                 "PACKET_PROCESSOR"
             )
 
@@ -0,0 +1,140 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import struct
+import threading
+import time
+from bm_protocol.bm_invoke import BMInvoke
+from bm_protocol.bm_parameter import BMParameter
+from bm_protocol.frame_writer import FrameWriter
+from bm_protocol.packet import Packet
+from bm_protocol.registry import Registry
+
+# Every frame starts with the length, the Packet object header and the channel,
+# so the sequence and timestamp of a Packet always sit at the same offsets.
+_SEQUENCE_TIMESTAMP = struct.Struct('<id')
+_SEQUENCE_OFFSET = 4 + 5 + 4
+_INVOKE_ID = struct.Struct('<i')
+_MAX_TEMPLATES = 64
+
+
+def _message_offset(writer: FrameWriter, packet: Packet) -> int:
+    """
+    Offset of the message body in a frame holding packet, i.e. just past the
+    message's own object header.
+    """
+    message = packet.message
+    packet.message = None
+    try:
+        writer.begin_frame()
+        writer.write_object(packet)
+        return len(writer.buf) + 5
+    finally:
+        writer.buf.clear()
+        packet.message = message
+
+
+class PacketTemplateCache:
+    """
+    Server-originated packets encoded once and reused. A template is a complete
+    frame whose sequence, timestamp and invoke id are patched in place before
+    it is sent, so only a copy and a pack_into are paid per packet.
+    """
+
+    def __init__(self, packet_processor):
+        self.packet_processor = packet_processor
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._version = None
+
+    def _get(self, key, build):
+        template = self._templates.get(key)
+        if template is None:
+            template = build()
+            with self._lock:
+                if len(self._templates) >= _MAX_TEMPLATES:
+                    self._templates.clear()
+                self._templates[key] = template
+        return template
+
+    def _encode(self, packet: Packet):
+        Registry.init_global()
+        writer = FrameWriter(self.packet_processor.registry)
+        message_offset = _message_offset(writer, packet) if packet.message is not None else None
+        writer.begin_frame()
+        writer.write_object(packet)
+        writer.end_frame()
+        return bytes(writer.buf), message_offset
+
+    def version_frame(self) -> bytes:
+        if self._version is None:
+            self._version = self.packet_processor.create_version_packet()
+        return self._version
+
+    def ping_frame(self, server_device_id: str, server_host: str, server_port: int) -> bytes:
+        def build():
+            packet = self.packet_processor.create_ping_response_packet(
+                server_device_id, server_host, server_port
+            )
+            return self._encode(packet)[0]
+
+        template = self._get(("ping", server_device_id, server_host, server_port), build)
+        frame = bytearray(template)
+        _SEQUENCE_TIMESTAMP.pack_into(frame, _SEQUENCE_OFFSET, 1, time.time() * 1000)
+        return bytes(frame)
+
+    def registration_response_frame(self, original_invoke, server_device_id: str,
+                                    server_host: str, server_port: int) -> bytes:
+        return_method = getattr(original_invoke, 'return_method', None) or "onRegister"
+
+        def build():
+            template_invoke = BMInvoke(iid=0)
+            template_invoke.return_method = return_method
+            packet = self.packet_processor.create_registration_response_packet(
+                template_invoke, server_device_id, server_host, server_port
+            )
+            return self._encode(packet)
+
+        template, invoke_offset = self._get(
+            ("register", server_device_id, server_host, server_port, return_method), build
+        )
+        frame = bytearray(template)
+        _SEQUENCE_TIMESTAMP.pack_into(frame, _SEQUENCE_OFFSET, original_invoke.id, time.time() * 1000)
+        _INVOKE_ID.pack_into(frame, invoke_offset, original_invoke.id)
+        return bytes(frame)
+
+    def host_connected_frame(self, info) -> bytes:
+        """
+        onHostConnected differs only in its registry info parameter, so the
+        template is the encoded frame up to the parameter count.
+        """
+        def build():
+            packet = Packet()
+            packet.message = BMInvoke(iid=1, method="onHostConnected")
+            frame, _ = self._encode(packet)
+            # Drop the length prefix and the trailing zero parameter count.
+            return frame[4:-4]
+
+        prefix = self._get(("host_connected",), build)
+        writer = FrameWriter(self.packet_processor.registry)
+        writer.begin_frame()
+        writer.write(prefix)
+        writer.write_int(1)
+        writer.write_object(BMParameter(info))
+        writer.end_frame()
+        return writer.getvalue()
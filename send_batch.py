@@ -0,0 +1,71 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class SendBatch:
+    """
+    Outbound frames queued per target while a batch of received frames is
+    dispatched. flush() hands each target everything queued for it in one
+    write, in the order it was queued.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def add(self, target, data):
+        frames = self._pending.get(target)
+        if frames is None:
+            self._pending[target] = [data]
+        else:
+            frames.append(data)
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for target, frames in pending.items():
+            target.flush_frames(frames[0] if len(frames) == 1 else b"".join(frames), len(frames))
+
+    def __len__(self):
+        return sum(len(frames) for frames in self._pending.values())
+
+
+def current_batch():
+    return getattr(_local, 'batch', None)
+
+
+@contextmanager
+def batching():
+    """
+    Queues sends made by this thread until the block exits. A nested block
+    joins the batch that is already open.
+    """
+    batch = current_batch()
+    if batch is not None:
+        yield batch
+        return
+
+    batch = _local.batch = SendBatch()
+    try:
+        yield batch
+    finally:
+        _local.batch = None
+        batch.flush()
@@ -19,15 +19,20 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 import threading, time
 from typing import Dict, Any, Optional
 from connection_manager import ConnectionManager
+from async_connection_manager import AsyncConnectionManager
 from packet_processor import PacketProcessor
 from error_handler import ErrorHandler
 from config import Config
 from client_handler import ClientHandler
 from bm_protocol.registry import Registry
+from bm_protocol.codec import set_decoder_backend, set_lazy_decoding, set_object_pooling
+from bm_protocol.object_pool import release, pool_stats
+from bm_protocol.buffer_pool import configure_buffer_pool, get_buffer_pool
 from bm_protocol.bm_invoke import BMInvoke
+from bm_protocol.lazy_packet import LazyInvoke
 from bm_protocol.bm_parameter import BMParameter
 from bm_protocol.bm_array import BMArray
-from bm_protocol.device_type import DeviceType
+from bm_protocol.device_type import DeviceType, GAME_DEVICE_TYPES
 from bm_protocol.packet import Packet
 from bm_protocol.packet_type import PacketType
 from http_server import BMRegistryHTTPServer
@@ -43,18 +48,24 @@ class Server(PacketOperationsMixin):
         )
         self.registry = Registry(self.error_handler)
         self.registry.init()
+        set_decoder_backend(config.codec_backend)
+        set_lazy_decoding(config.lazy_decoding)
+        set_object_pooling(config.object_pooling, config.object_pool_size)
+        configure_buffer_pool(config.buffer_pool_limit)
         self.allocated_slots = set()
         self._slot_lock = threading.Lock()
         self.packet_processor = PacketProcessor(self.error_handler, self.registry)
 
         self._setup_message_handlers()
 
-        self.connection_manager = ConnectionManager(
+        manager_class = AsyncConnectionManager if config.connection_engine == "asyncio" else ConnectionManager
+        self.connection_manager = manager_class(
             config,
             self.error_handler,
             self.registry,
             self.packet_processor,
-            self.message_handlers
+            self.message_handlers,
+            relay_stream_opener=self.open_relay_stream
         )
 
         self.is_running = False
@@ -135,7 +146,7 @@ class Server(PacketOperationsMixin):
             device_name = getattr(client_info.device, "device_name", "unknown")
             device_type = getattr(client_info.device, "device_type", None)
 
-            if device_type in (DeviceType.FLASH, DeviceType.UNITY):
+            if device_type in GAME_DEVICE_TYPES:
                 allocated_slot_id = self.allocate_slot_id()
                 client_info.slot_id = allocated_slot_id
                 client_handler.slot_id = allocated_slot_id
@@ -150,6 +161,14 @@ class Server(PacketOperationsMixin):
                 pass
             client_handler.client_info = client_info
 
+            replaced = self.connection_manager.index_client(client_handler)
+            if replaced is not None:
+                self.error_handler.log_info(
+                    f"Device {device_id} registered again from {client_handler.client_address}, "
+                    f"replacing {replaced.client_address}",
+                    "REGISTRY"
+                )
+
             try:
                 self.registry.unregister_device(device_id)
             except Exception:
@@ -170,7 +189,7 @@ class Server(PacketOperationsMixin):
             )
 
             # For flash/unity clients, we need to send onHostConnected to update the slot color
-            if device_type in (DeviceType.FLASH, DeviceType.UNITY):
+            if device_type in GAME_DEVICE_TYPES:
                 client_handler.notify_host_connected()
 
             self._send_filtered_device_list(client_handler, device_type)
@@ -198,66 +217,49 @@ class Server(PacketOperationsMixin):
         self.error_handler.log_info(f"Processing registry.relay from {client_handler.client_address}", "REGISTRY")
 
         try:
-            if len(inv_message.params_list) < 2:
+            # Lazily decoded relays keep the payload encoded and forward its bytes.
+            split = None
+            if isinstance(inv_message, LazyInvoke):
+                split = inv_message.split_last_object()
+
+            if split is not None:
+                leading, raw_relay = split
+                params = leading + [None]
+            else:
+                raw_relay = None
+                params = inv_message.params_list
+
+            if len(params) < 2:
                 self.error_handler.log_warning("Invalid relay request - need 2 parameters", "REGISTRY")
                 return
 
-            target_info = inv_message.params_list[0].value
-            relay_message = inv_message.params_list[1].value
+            target_info = params[0].value
+            relay_message = params[1].value if raw_relay is None else None
 
-            if not hasattr(target_info, 'device') or not target_info.device:
-                self.error_handler.log_warning("Invalid target info in relay", "REGISTRY")
-                return
-
-            target_device_id = getattr(target_info.device, 'device_id', None)
-            if not target_device_id:
-                self.error_handler.log_warning("No device ID in target info", "REGISTRY")
+            target_client = self._resolve_relay_target(target_info, client_handler)
+            if not target_client:
                 return
+            target_device_id = target_info.device.device_id
 
-            self.error_handler.log_info(f"Relaying message to device: {target_device_id}", "REGISTRY")
+            sender_device_id, sender_device_name, sender_device_type = self._relay_sender(client_handler)
 
-            target_client = self.connection_manager.get_client_by_device_id(target_device_id)
-            if not target_client:
-                self.error_handler.log_warning(f"Target device {target_device_id} not found", "REGISTRY")
-                return
+            if raw_relay is not None:
+                relay_frame = self.packet_processor.create_relay_frame(
+                    sender_device_id, sender_device_name, sender_device_type, raw_relay
+                )
+                sent = relay_frame is not None and target_client.send_frame(relay_frame)
+                release(*leading)
+            else:
+                relay_packet = self.create_relay_packet_common(
+                    sender_device_id, sender_device_name, sender_device_type,
+                    relay_message, self.server_device_id
+                )
+                sent = target_client.send_packet(relay_packet)
+                release(relay_packet)
 
-            try:
-                sender_type = None
-                if getattr(client_handler, "client_info", None) and getattr(client_handler.client_info, "device", None):
-                    sender_type = getattr(client_handler.client_info.device, "device_type", None)
-
-                if sender_type not in [DeviceType.FLASH, DeviceType.UNITY]:
-                    target_slot = int(getattr(target_client, "slot_id", 0) or 0)
-                    already_paired = (getattr(client_handler, "paired_slot_id", None) == target_slot)
-
-                    if target_slot:
-                        try:
-                            live_count = getattr(getattr(target_client, "client_info", None), "current_clients", 0)
-                            live_count = int(live_count if live_count is not None else 0)
-                        except Exception:
-                            live_count = 0
-
-                        try:
-                            max_clients = int(
-                                getattr(getattr(target_client, "client_info", None), "max_clients", 1) or 1
-                            )
-                        except Exception:
-                            max_clients = 1
-
-                        if live_count >= max_clients and not already_paired:
-                            self.error_handler.log_warning(
-                                f"Relay blocked: game slot {target_slot} is full ({live_count}/{max_clients})",
-                                "REGISTRY"
-                            )
-                            return
-            except Exception as e:
-                self.error_handler.log_warning(f"relay capacity check skipped: {e}", "REGISTRY")
-
-            relay_packet = self._create_relay_packet(client_handler, relay_message)
-
-            if target_client.send_packet(relay_packet):
+            if sent:
                 self.error_handler.log_info(
-                    f"Successfully relayed message from {relay_packet.device_id} to {target_device_id}",
+                    f"Successfully relayed message from {sender_device_id} to {target_device_id}",
                     "REGISTRY"
                 )
             else:
@@ -269,6 +271,93 @@ class Server(PacketOperationsMixin):
         except Exception as e:
             self.error_handler.log_error(f"Error in registry.relay: {e}", "REGISTRY")
 
+    def _resolve_relay_target(self, target_info, client_handler: ClientHandler) -> Optional[ClientHandler]:
+        """
+        Finds the client a relay is addressed to, or None when the target is
+        unknown or its game slot is full.
+        """
+        if not hasattr(target_info, 'device') or not target_info.device:
+            self.error_handler.log_warning("Invalid target info in relay", "REGISTRY")
+            return None
+
+        target_device_id = getattr(target_info.device, 'device_id', None)
+        if not target_device_id:
+            self.error_handler.log_warning("No device ID in target info", "REGISTRY")
+            return None
+
+        self.error_handler.log_info(f"Relaying message to device: {target_device_id}", "REGISTRY")
+
+        target_client = self.connection_manager.get_client_by_device_id(target_device_id)
+        if not target_client:
+            self.error_handler.log_warning(f"Target device {target_device_id} not found", "REGISTRY")
+            return None
+
+        try:
+            sender_type = None
+            if getattr(client_handler, "client_info", None) and getattr(client_handler.client_info, "device", None):
+                sender_type = getattr(client_handler.client_info.device, "device_type", None)
+
+            if sender_type not in GAME_DEVICE_TYPES:
+                target_slot = int(getattr(target_client, "slot_id", 0) or 0)
+                already_paired = (getattr(client_handler, "paired_slot_id", None) == target_slot)
+
+                if target_slot:
+                    try:
+                        live_count = getattr(getattr(target_client, "client_info", None), "current_clients", 0)
+                        live_count = int(live_count if live_count is not None else 0)
+                    except Exception:
+                        live_count = 0
+
+                    try:
+                        max_clients = int(
+                            getattr(getattr(target_client, "client_info", None), "max_clients", 1) or 1
+                        )
+                    except Exception:
+                        max_clients = 1
+
+                    if live_count >= max_clients and not already_paired:
+                        self.error_handler.log_warning(
+                            f"Relay blocked: game slot {target_slot} is full ({live_count}/{max_clients})",
+                            "REGISTRY"
+                        )
+                        return None
+        except Exception as e:
+            self.error_handler.log_warning(f"relay capacity check skipped: {e}", "REGISTRY")
+
+        return target_client
+
+    def open_relay_stream(self, inv_message: BMInvoke, leading_params: list, raw_head,
+                          message_size: int, client_handler: ClientHandler):
+        """
+        Prepares a cut-through relay of a large frame whose payload has not
+        fully arrived. Returns the target client and the start of the frame to
+        send it (header plus raw_head), or None to buffer the frame as usual.
+        """
+        try:
+            if inv_message.method != 'registry.relay' or len(leading_params) != 1:
+                return None
+
+            target_info = leading_params[0].value
+            target_client = self._resolve_relay_target(target_info, client_handler)
+            if not target_client:
+                return None
+
+            sender_device_id, sender_device_name, sender_device_type = self._relay_sender(client_handler)
+            frame_head = self.packet_processor.create_relay_frame(
+                sender_device_id, sender_device_name, sender_device_type, raw_head, message_size
+            )
+            if frame_head is None:
+                return None
+
+            self.error_handler.log_info(
+                f"Streaming {message_size}-byte relay from {sender_device_id} to {target_info.device.device_id}",
+                "REGISTRY"
+            )
+            return target_client, frame_head
+        except Exception as e:
+            self.error_handler.log_error(f"Error opening relay stream: {e}", "REGISTRY")
+            return None
+
     def on_registry_update(self, inv_message: BMInvoke, client_handler: ClientHandler):
         try:
             info = inv_message.params_list[0].value if inv_message.params_list else None
@@ -294,6 +383,7 @@ class Server(PacketOperationsMixin):
                         if sid:
                             client_handler.client_info.slot_id = sid
                             client_handler.slot_id = sid
+                            self.connection_manager.index_client(client_handler)
                     except Exception:
                         pass
 
@@ -326,8 +416,7 @@ class Server(PacketOperationsMixin):
         try:
             self.error_handler.log_debug(f"Received ping from {client_handler.client_address}", "PING")
 
-            success = self.send_ping_response_to_socket(
-                client_handler.client_socket,
+            success = client_handler.send_ping_response(
                 self.server_device_id,
                 self.config.server_host or "127.0.0.1",
                 self.config.server_port
@@ -347,9 +436,7 @@ class Server(PacketOperationsMixin):
         """
         from copy import deepcopy
         try:
-            viewer_is_game = device_type in [DeviceType.FLASH, DeviceType.UNITY]
-            with self.connection_manager.clients_lock:
-                clients_snapshot = dict(self.connection_manager.clients)
+            viewer_is_game = device_type in GAME_DEVICE_TYPES
 
             all_devices = self.registry.get_all_devices()
             filtered_devices = []
@@ -364,23 +451,19 @@ class Server(PacketOperationsMixin):
                 if d_id in seen_ids:
                     continue
 
-                include = True if viewer_is_game else (d_type in [DeviceType.FLASH, DeviceType.UNITY])
+                include = True if viewer_is_game else (d_type in GAME_DEVICE_TYPES)
                 if not include:
                     continue
 
-                device_client = None
-                for ch in clients_snapshot.values():
-                    if getattr(ch, "device_id", None) == d_id and ch.is_connected():
-                        device_client = ch
-                        break
-                if not device_client:
+                device_client = self.connection_manager.get_client_by_device_id(d_id)
+                if not device_client or not device_client.is_connected():
                     continue
 
                 slot_for_emit = 0
                 current_clients = None
                 max_clients = None
 
-                if d_type in [DeviceType.FLASH, DeviceType.UNITY]:
+                if d_type in GAME_DEVICE_TYPES:
                     try:
                         slot_for_emit = int(getattr(device_client, "slot_id", 0) or 0)
                     except Exception:
@@ -440,7 +523,7 @@ class Server(PacketOperationsMixin):
         except Exception as e:
             self.error_handler.log_error(f"Error sending device list: {e}", "REGISTRY")
 
-    def _create_relay_packet(self, sender_client: ClientHandler, relay_message: BMInvoke) -> Packet:
+    def _relay_sender(self, sender_client: ClientHandler) -> tuple:
         sender_device_id = self.server_device_id
         sender_device_name = "Registry"
         sender_device_type = DeviceType.SERVER
@@ -451,10 +534,7 @@ class Server(PacketOperationsMixin):
                 sender_device_id = getattr(sender_client.client_info.device, 'device_id', 'unknown')
                 sender_device_name = getattr(sender_client.client_info.device, 'device_name', 'unknown')
 
-        return self.create_relay_packet_common(
-            sender_device_id, sender_device_name, sender_device_type,
-            relay_message, self.server_device_id
-        )
+        return sender_device_id, sender_device_name, sender_device_type
 
     def _broadcast_device_list_update(self, newly_connected_client: Optional[ClientHandler]):
         try:
@@ -542,7 +622,8 @@ class Server(PacketOperationsMixin):
                 self.free_slot_id(sid)
 
             did = getattr(client_handler, "device_id", None)
-            if did:
+            # A newer connection that registered the same device keeps it.
+            if did and self.connection_manager.get_client_by_device_id(did) is None:
                 try:
                     self.registry.unregister_device(did)
                 except Exception as e:
@@ -561,4 +642,16 @@ class Server(PacketOperationsMixin):
         self.connection_manager.cleanup_disconnected_clients()
 
     def get_connected_clients_info(self) -> list:
-        return self.connection_manager.get_connected_clients()
\ No newline at end of file
+        return self.connection_manager.get_connected_clients()
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        return pool_stats()
+
+    def get_buffer_stats(self) -> Dict[str, Any]:
+        return get_buffer_pool().stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.connection_manager.get_stats()
+        stats['buffers'] = self.get_buffer_stats()
+        stats['object_pools'] = self.get_pool_stats()
+        return stats
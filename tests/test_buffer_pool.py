@@ -0,0 +1,91 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm_protocol.buffer_pool import BufferPool, MIN_BUFFER_SIZE, size_class
+from bm_protocol.frame_buffer import FrameBuffer
+
+
+class SizeClassTest(unittest.TestCase):
+
+    def test_size_class(self):
+        self.assertEqual(size_class(0), MIN_BUFFER_SIZE)
+        self.assertEqual(size_class(MIN_BUFFER_SIZE), MIN_BUFFER_SIZE)
+        self.assertEqual(size_class(MIN_BUFFER_SIZE + 1), MIN_BUFFER_SIZE * 2)
+        self.assertEqual(size_class(4096), 4096)
+        self.assertEqual(size_class(5000), 8192)
+
+
+class BufferPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = BufferPool(max_free_bytes=8192)
+
+    def test_lease_rounds_up_to_size_class(self):
+        self.assertEqual(len(self.pool.lease(3000)), 4096)
+        self.assertEqual(len(self.pool.lease(1)), MIN_BUFFER_SIZE)
+        self.assertEqual(self.pool.leased, 2)
+        self.assertEqual(self.pool.leased_bytes, 4096 + MIN_BUFFER_SIZE)
+
+    def test_released_buffer_is_reused_by_its_size_class(self):
+        buf = self.pool.lease(4096)
+        self.pool.release(buf)
+        self.assertIsNot(self.pool.lease(2048), buf)
+        self.assertIs(self.pool.lease(4000), buf)
+        self.assertEqual(self.pool.hits, 1)
+        self.assertEqual(self.pool.misses, 2)
+
+    def test_free_bytes_are_capped(self):
+        bufs = [self.pool.lease(4096) for _ in range(3)]
+        for buf in bufs:
+            self.pool.release(buf)
+        self.assertEqual(self.pool.free_bytes, 8192)
+        self.assertEqual(self.pool.dropped, 1)
+        self.assertEqual(self.pool.leased_bytes, 0)
+
+    def test_odd_sized_buffer_is_not_kept(self):
+        self.pool.lease(1000)
+        self.pool.release(bytearray(1000))
+        self.assertEqual(self.pool.free_bytes, 0)
+        self.assertEqual(self.pool.dropped, 1)
+
+
+class FrameBufferPoolTest(unittest.TestCase):
+
+    def test_capacity_follows_frame_size(self):
+        pool = BufferPool()
+        buffer = FrameBuffer(1024, max_capacity=64 * 1024, pool=pool)
+        frame = struct.pack('<I', 8188) + bytes(8188)
+        for _ in range(32):
+            buffer.write(frame)
+            self.assertEqual(len(buffer.read_frame()), 8188)
+        self.assertEqual(buffer.capacity, 32 * 1024)
+
+        buffer.close()
+        self.assertEqual(pool.leased, 0)
+        self.assertEqual(pool.leased_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
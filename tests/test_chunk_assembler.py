@@ -0,0 +1,137 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm_protocol.chunk_assembler import ChunkSet, ChunkAssembler
+from bm_protocol.bm_byte_chunk import BMByteChunk
+
+DATA = bytes(range(100))
+
+
+def _chunk(set_id: str, start: int, end: int, data: bytes = DATA) -> BMByteChunk:
+    return BMByteChunk(set_id, start, end - start, len(data), data[start:end])
+
+
+class ChunkSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk_set = ChunkSet("set", len(DATA), spill_threshold=1024)
+
+    def add(self, start: int, end: int) -> bool:
+        return self.chunk_set.add(start, DATA[start:end])
+
+    def test_disjoint_chunks(self):
+        self.assertTrue(self.add(0, 10))
+        self.assertTrue(self.add(50, 60))
+        self.assertEqual(self.chunk_set.received, 20)
+        self.assertFalse(self.chunk_set.complete)
+
+    def test_repeated_chunk_counts_once(self):
+        self.assertTrue(self.add(10, 20))
+        self.assertFalse(self.add(10, 20))
+        self.assertFalse(self.add(12, 18))
+        self.assertEqual(self.chunk_set.received, 10)
+
+    def test_overlapping_chunks(self):
+        self.add(0, 30)
+        self.add(20, 50)
+        self.assertEqual(self.chunk_set.received, 50)
+        self.add(40, 100)
+        self.assertEqual(self.chunk_set.received, 100)
+        self.assertTrue(self.chunk_set.complete)
+        self.assertEqual(self.chunk_set.getvalue(), DATA)
+
+    def test_chunk_bridging_ranges(self):
+        self.add(0, 10)
+        self.add(20, 30)
+        self.add(40, 50)
+        self.add(5, 45)
+        self.assertEqual(self.chunk_set.received, 50)
+        self.add(50, 100)
+        self.assertTrue(self.chunk_set.complete)
+        self.assertEqual(self.chunk_set.getvalue(), DATA)
+
+    def test_adjacent_chunks(self):
+        for start in range(90, -1, -10):
+            self.add(start, start + 10)
+        self.assertEqual(self.chunk_set.received, 100)
+        self.assertEqual(self.chunk_set.getvalue(), DATA)
+
+    def test_empty_chunk(self):
+        self.assertFalse(self.add(10, 10))
+        self.assertEqual(self.chunk_set.received, 0)
+
+    def test_chunk_outside_set(self):
+        with self.assertRaises(ValueError):
+            self.chunk_set.add(95, bytes(10))
+        with self.assertRaises(ValueError):
+            self.chunk_set.add(-1, bytes(1))
+
+    def test_spill(self):
+        chunk_set = ChunkSet("big", len(DATA), spill_threshold=10)
+        self.addCleanup(chunk_set.close)
+        self.assertTrue(chunk_set.spilled)
+        chunk_set.add(0, DATA)
+        self.assertEqual(chunk_set.getvalue(), DATA)
+
+
+class ChunkAssemblerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.assembler = ChunkAssembler(spill_threshold=1024, max_set_size=1000, max_sets=2)
+        self.addCleanup(self.assembler.clear)
+
+    def test_overlap_does_not_complete_early(self):
+        self.assertIsNone(self.assembler.add(_chunk("a", 0, 60)))
+        self.assertIsNone(self.assembler.add(_chunk("a", 20, 80)))
+        self.assertEqual(self.assembler.buffered_bytes, 100)
+        chunk_set = self.assembler.add(_chunk("a", 80, 100))
+        self.assertEqual(chunk_set.getvalue(), DATA)
+        self.assertEqual(len(self.assembler), 0)
+        self.assertEqual(self.assembler.buffered_bytes, 0)
+
+    def test_oldest_set_is_dropped(self):
+        for set_id in ("a", "b", "c"):
+            self.assembler.add(_chunk(set_id, 0, 10))
+        self.assertEqual(len(self.assembler), 2)
+        self.assertEqual(self.assembler.buffered_bytes, 200)
+        # "a" starts over.
+        self.assertIsNone(self.assembler.add(_chunk("a", 10, 100)))
+
+    def test_discard(self):
+        self.assembler.add(_chunk("a", 0, 10))
+        self.assembler.discard("a")
+        self.assembler.discard("a")
+        self.assertEqual(len(self.assembler), 0)
+        self.assertEqual(self.assembler.buffered_bytes, 0)
+
+    def test_set_limits(self):
+        with self.assertRaises(ValueError):
+            self.assembler.add(BMByteChunk("big", 0, 1, 1001, b"x"))
+        self.assembler.add(_chunk("a", 0, 10))
+        with self.assertRaises(ValueError):
+            self.assembler.add(BMByteChunk("a", 10, 1, 50, b"x"))
+
+
+if __name__ == '__main__':
+    unittest.main()
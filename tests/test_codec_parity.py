@@ -0,0 +1,152 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from packet_processor import PacketProcessor
+from bm_protocol.registry import Registry
+from bm_protocol.frame_writer import FrameWriter
+from bm_protocol.codec import create_input_stream
+from bm_protocol.lazy_packet import LazyPacket, LazyInvoke, read_lazy_packet
+from bm_protocol.packet import Packet
+from bm_protocol.ping import Ping
+from bm_protocol.bm_invoke import BMInvoke
+from bm_protocol.bm_parameter import BMParameter
+from bm_protocol.bm_array import BMArray
+from bm_protocol.bm_byte_chunk import BMByteChunk
+from bm_protocol.bm_registry_info import BMRegistryInfo
+from bm_protocol.flash_device import FlashDevice
+from bm_protocol.device_address import DeviceAddress
+from bm_protocol.device_type import DeviceType
+
+BACKENDS = ("pyamf", "struct", "struct-lazy")
+
+# Ping has no write_external, so it is only ever decoded.
+_PING_OBJECT = b"\x01\x00@\x0b\x00"
+
+
+class _LazyRegistry:
+    # Lazy objects are written as the classes they stand in for.
+    @staticmethod
+    def id_for_class(clazz):
+        if clazz in (LazyPacket, LazyInvoke):
+            clazz = clazz.__mro__[1]
+        return Registry.id_for_class_global(clazz)
+
+
+def _registry_info(slot_id: int) -> BMRegistryInfo:
+    info = BMRegistryInfo()
+    info.address = DeviceAddress("10.0.0.2", 8088)
+    info.device = FlashDevice("device-1", "Game é", info.address, DeviceType.FLASH)
+    info.app_id = "com.retouched.game"
+    info.slot_id = slot_id
+    info.current_clients = 1
+    info.max_clients = 4
+    return info
+
+
+def _samples():
+    inner = BMInvoke(7, "onInput", 1, -3, 2.5, True, "tap")
+    chunk_packet = Packet()
+    chunk_packet.device_id = "phone-1"
+    chunk_packet.message = BMByteChunk("set-1", 0, 300, 1000, bytes(range(256)) + bytes(44))
+    return {
+        Packet: [
+            PacketProcessor.create_invoke_packet("ping"),
+            PacketProcessor.create_ping_response_packet("server", "10.0.0.1", 8088),
+            PacketProcessor.create_invoke_packet(
+                "registry.relay", [BMParameter(_registry_info(1)), BMParameter(inner)],
+                device_id="phone-1", device_name="Phone", device_type=DeviceType.ANDROID,
+                timestamp=1234.5),
+            PacketProcessor.create_invoke_packet(
+                "onList", [BMParameter(BMArray(_registry_info(0), _registry_info(3)))]),
+            chunk_packet,
+            Packet(),
+        ],
+        DeviceAddress: [DeviceAddress("1.2.3.4", 99)],
+        BMParameter: [BMParameter(-5), BMParameter("text"), BMParameter(inner)],
+        BMInvoke: [inner, BMInvoke(3, "noParams")],
+        FlashDevice: [FlashDevice("server", "Registry", DeviceAddress("h", 1), DeviceType.SERVER)],
+        BMByteChunk: [BMByteChunk("set-1", 0, 5, 5, b"hello")],
+        BMRegistryInfo: [_registry_info(0), _registry_info(2)],
+        BMArray: [BMArray(_registry_info(1), _registry_info(2)), BMArray(1, 2, 3), BMArray()],
+    }
+
+
+def _decode(backend: str, data: bytes):
+    if backend == "struct-lazy":
+        return read_lazy_packet(data)
+    return create_input_stream(data, backend=backend).read_object()
+
+
+def _encode(obj, registry=None) -> bytes:
+    writer = FrameWriter(registry)
+    writer.write_object(obj)
+    return writer.getvalue()
+
+
+class CodecParityTest(unittest.TestCase):
+    """
+    Every registered class written by FrameWriter must decode to the same
+    object under every decoder backend, checked by writing it back out.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        Registry.init_global()
+
+    def test_every_registered_class_has_a_sample(self):
+        registered = {clazz for clazz in map(Registry.class_for_id_global, range(256)) if clazz}
+        self.assertEqual(registered - set(_samples()), {Ping})
+
+    def test_round_trip(self):
+        for clazz, objects in _samples().items():
+            for index, obj in enumerate(objects):
+                data = _encode(obj)
+                for backend in BACKENDS:
+                    with self.subTest(cls=clazz.__name__, sample=index, backend=backend):
+                        decoded = _decode(backend, data)
+                        self.assertIsInstance(decoded, clazz)
+                        self.assertEqual(_encode(decoded, _LazyRegistry), data)
+
+    def test_lazy_packet_decodes_parameters_on_use(self):
+        packet = PacketProcessor.create_invoke_packet("onInput", [BMParameter(1), BMParameter("a")])
+        decoded = read_lazy_packet(_encode(packet))
+        self.assertFalse(decoded.message.params_decoded)
+        self.assertEqual([param.value for param in decoded.message.params_list], [1, "a"])
+
+    def test_ping(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertIsInstance(_decode(backend, _PING_OBJECT), Ping)
+
+    def test_unknown_class_id_raises(self):
+        data = b"\x01\x00@" + struct.pack('<h', 200)
+        for backend in ("struct", "struct-lazy"):
+            with self.subTest(backend=backend):
+                with self.assertRaises(IOError):
+                    _decode(backend, data)
+
+
+if __name__ == '__main__':
+    unittest.main()
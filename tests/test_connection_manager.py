@@ -0,0 +1,112 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from connection_manager import ConnectionManager
+from error_handler import ErrorHandler, set_debug_enabled
+from bm_protocol.registry import Registry
+from bm_protocol.bm_parameter import BMParameter
+from bm_protocol.device_type import DeviceType
+
+
+class _TestConfig(Config):
+    # Any free port.
+    server_port = 0
+
+
+class RegisterThenDisconnectTest(unittest.TestCase):
+    """
+    A client whose register arrives with its version and who disconnects
+    before the connection manager has finished accepting it.
+    """
+
+    def setUp(self):
+        set_debug_enabled(False)
+        error_handler = ErrorHandler(log_to_file=False)
+        registry = Registry(error_handler)
+        registry.init()
+
+        self.registered = []
+        self.disconnected = []
+        self.slots = set()
+        self.cleaned_up = threading.Event()
+        self.accepted = threading.Event()
+
+        self.manager = ConnectionManager(
+            _TestConfig(), error_handler, registry,
+            message_handlers={'registry.register': self._on_register}
+        )
+        self.manager.set_connection_callbacks(self._on_connected, self._on_disconnected)
+        self.assertTrue(self.manager.start())
+        self.addCleanup(self.manager.stop)
+
+    def _on_register(self, message, client_handler):
+        client_handler.set_device_info("device-1", "device-1")
+        client_handler.slot_id = 1
+        self.slots.add(1)
+        self.manager.index_client(client_handler)
+        self.registered.append(client_handler)
+
+    def _on_connected(self, client_handler):
+        # Keeps the manager from finishing with the client until it has been cleaned up.
+        self.cleaned_up.wait(5.0)
+        self.accepted.set()
+
+    def _on_disconnected(self, client_handler):
+        self.slots.discard(client_handler.slot_id)
+        self.disconnected.append(client_handler)
+        self.cleaned_up.set()
+
+    def test_register_then_disconnect_before_registration_completes(self):
+        manager = self.manager
+        register = manager.packet_processor.create_invoke_packet(
+            "registry.register", [BMParameter("device-1")],
+            device_id="device-1", device_name="device-1", device_type=DeviceType.FLASH
+        )
+        port = manager.server_socket.getsockname()[1]
+        client = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(client.close)
+        client.sendall(
+            manager.packet_processor.create_version_packet()
+            + manager.packet_processor.create_response_packet(register)
+        )
+        # Still reading, so the server's version packet can be sent.
+        client.shutdown(socket.SHUT_WR)
+
+        self.assertTrue(self.cleaned_up.wait(5.0))
+        self.assertTrue(self.accepted.wait(5.0))
+
+        self.assertEqual(len(self.registered), 1)
+        self.assertEqual(self.disconnected, self.registered)
+        self.assertEqual(self.slots, set())
+        self.assertIsNone(manager.get_client_by_device_id("device-1"))
+        self.assertIsNone(manager.get_client_by_slot_id(1))
+        self.assertEqual(manager.get_connection_count(), 0)
+        self.assertEqual(manager.get_connected_clients(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
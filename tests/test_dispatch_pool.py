@@ -0,0 +1,153 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dispatch_pool import DispatchPool
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class DispatchPoolTest(unittest.TestCase):
+
+    def make_pool(self, workers: int = 4, queue_size: int = 1000, policy: str = "block"):
+        pool = DispatchPool(workers, queue_size, policy)
+        pool.start()
+        self.addCleanup(pool.stop)
+        return pool
+
+    def hold(self, pool, key):
+        """Submits a job under key that keeps its worker busy until the returned event is set."""
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def job():
+            started.set()
+            release.wait(5.0)
+
+        pool.submit(key, job)
+        self.assertTrue(started.wait(5.0))
+        return release
+
+    def test_jobs_of_one_key_run_in_order(self):
+        pool = self.make_pool()
+        results = {key: [] for key in range(8)}
+        for index in range(200):
+            for key, seen in results.items():
+                pool.submit(key, seen.append, index)
+
+        self.assertTrue(_wait_for(lambda: all(pool.is_idle(key) for key in results)))
+        for seen in results.values():
+            self.assertEqual(seen, list(range(200)))
+        self.assertEqual(pool.stats()['completed'], 1600)
+
+    def test_keys_run_in_parallel(self):
+        pool = self.make_pool(workers=2)
+        release = self.hold(pool, "a")
+        done = threading.Event()
+        pool.submit("b", done.set)
+        self.assertTrue(done.wait(5.0))
+        self.assertFalse(pool.is_idle("a"))
+        release.set()
+        self.assertTrue(_wait_for(lambda: pool.is_idle("a")))
+
+    def test_drop_policy(self):
+        pool = self.make_pool(queue_size=2, policy="drop")
+        release = self.hold(pool, "a")
+        ran = []
+        self.assertTrue(pool.submit("a", ran.append, 1))
+        self.assertTrue(pool.submit("a", ran.append, 2))
+        self.assertTrue(pool.is_full("a"))
+        self.assertFalse(pool.submit("a", ran.append, 3))
+        self.assertTrue(pool.submit("b", ran.append, 4))
+
+        release.set()
+        self.assertTrue(_wait_for(lambda: pool.is_idle("a") and pool.is_idle("b")))
+        self.assertEqual(sorted(ran), [1, 2, 4])
+        self.assertEqual(pool.stats()['dropped'], 1)
+
+    def test_block_policy(self):
+        pool = self.make_pool(queue_size=2)
+        release = self.hold(pool, "a")
+        ran = []
+        pool.submit("a", ran.append, 1)
+        pool.submit("a", ran.append, 2)
+
+        submitter = threading.Thread(target=pool.submit, args=("a", ran.append, 3))
+        submitter.start()
+        self.assertTrue(_wait_for(lambda: pool.stats()['blocked'] == 1))
+        self.assertTrue(submitter.is_alive())
+
+        # Without waiting the job is taken over the limit.
+        self.assertTrue(pool.submit("a", ran.append, 4, wait=False))
+
+        release.set()
+        submitter.join(5.0)
+        self.assertFalse(submitter.is_alive())
+        self.assertTrue(_wait_for(lambda: pool.is_idle("a")))
+        self.assertEqual(ran, [1, 2, 4, 3])
+
+    def test_when_idle(self):
+        pool = self.make_pool()
+        called = []
+        pool.when_idle("a", lambda: called.append("now"))
+        self.assertEqual(called, ["now"])
+
+        release = self.hold(pool, "a")
+        pool.submit("a", called.append, "job")
+        idle = threading.Event()
+        pool.when_idle("a", lambda: (called.append("idle"), idle.set()))
+        self.assertEqual(called, ["now"])
+        release.set()
+        self.assertTrue(idle.wait(5.0))
+        self.assertEqual(called, ["now", "job", "idle"])
+
+    def test_failed_job_does_not_stop_the_queue(self):
+        pool = self.make_pool(workers=1)
+        ran = []
+        pool.submit("a", lambda: 1 / 0)
+        pool.submit("a", ran.append, 1)
+        self.assertTrue(_wait_for(lambda: pool.is_idle("a")))
+        self.assertEqual(ran, [1])
+
+    def test_submit_after_stop(self):
+        pool = self.make_pool()
+        pool.stop()
+        self.assertFalse(pool.submit("a", print))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            DispatchPool(1, 1, "spill")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm_protocol.frame_buffer import FrameBuffer
+
+
+def _frame(payload: bytes) -> bytes:
+    return struct.pack('<I', len(payload)) + payload
+
+
+class FrameBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = FrameBuffer(1024)
+
+    def receive(self, data: bytes):
+        """Writes data the way the receive loop does, through writable() and commit()."""
+        while data:
+            view = self.buffer.writable()
+            count = min(len(view), len(data))
+            view[:count] = data[:count]
+            self.buffer.commit(count)
+            data = data[count:]
+
+    def test_frames_split_across_writes(self):
+        data = _frame(b"first") + _frame(b"second")
+        self.receive(data[:3])
+        self.assertIsNone(self.buffer.read_frame())
+        self.receive(data[3:12])
+        self.assertEqual(bytes(self.buffer.read_frame()), b"first")
+        self.assertIsNone(self.buffer.read_frame())
+        self.receive(data[12:])
+        self.assertEqual(bytes(self.buffer.read_frame()), b"second")
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_discard_buffered_frame(self):
+        self.receive(_frame(b"x" * 100) + _frame(b"next"))
+        self.assertEqual(self.buffer.discard_frame(), 100)
+        self.assertFalse(self.buffer.discarding)
+        self.assertEqual(bytes(self.buffer.read_frame()), b"next")
+        self.assertEqual(self.buffer.frames_discarded, 1)
+        self.assertEqual(self.buffer.bytes_discarded, 104)
+
+    def test_discard_before_length_prefix(self):
+        self.receive(b"\x10\x00")
+        self.assertIsNone(self.buffer.discard_frame())
+        self.assertEqual(self.buffer.frames_discarded, 0)
+
+    def test_discard_skips_bytes_still_to_arrive(self):
+        big = _frame(bytes(10000))
+        self.receive(big[:500])
+        self.assertEqual(self.buffer.discard_frame(), 10000)
+        self.assertTrue(self.buffer.discarding)
+        self.assertEqual(len(self.buffer), 0)
+
+        self.receive(big[500:6000])
+        self.assertTrue(self.buffer.discarding)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.size, 1024)
+
+        self.receive(big[6000:] + _frame(b"after"))
+        self.assertFalse(self.buffer.discarding)
+        self.assertEqual(bytes(self.buffer.read_frame()), b"after")
+        self.assertEqual(self.buffer.bytes_discarded, len(big))
+
+    def test_discard_through_write(self):
+        big = _frame(bytes(3000))
+        self.buffer.write(big[:100])
+        self.buffer.discard_frame()
+        self.buffer.write(big[100:2000])
+        self.buffer.write(big[2000:] + _frame(b"after"))
+        self.assertEqual(bytes(self.buffer.read_frame()), b"after")
+        self.assertEqual(self.buffer.bytes_discarded, len(big))
+
+
+if __name__ == '__main__':
+    unittest.main()
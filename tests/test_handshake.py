@@ -0,0 +1,146 @@
+"""
+retouched
+Copyright (C) 2025 ddavef/KinteLiX
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from connection_manager import ConnectionManager
+from async_connection_manager import AsyncConnectionManager
+from error_handler import ErrorHandler, set_debug_enabled
+from packet_processor import PacketProcessor
+from bm_protocol.registry import Registry
+from bm_protocol.frame_buffer import FrameBuffer
+from bm_protocol.handshake import Handshake
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _recv_until_closed(client: socket.socket, timeout: float = 5.0) -> bytes:
+    client.settimeout(timeout)
+    received = b""
+    while True:
+        data = client.recv(4096)
+        if not data:
+            return received
+        received += data
+
+
+class HandshakeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = FrameBuffer(1024)
+        self.handshake = Handshake()
+        self.version = PacketProcessor.create_version_packet()
+
+    def test_version_in_segments(self):
+        for byte in self.version[:-1]:
+            self.buffer.write(bytes([byte]))
+            self.assertFalse(self.handshake.advance(self.buffer))
+        self.buffer.write(self.version[-1:])
+        self.assertTrue(self.handshake.advance(self.buffer))
+        self.assertTrue(self.handshake.complete)
+        self.assertEqual(self.handshake.client_version, self.version[4:])
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_frames_behind_the_version(self):
+        frame = struct.pack('<I', 5) + b"\x01\x00@\x00\x00"
+        self.buffer.write(self.version + frame)
+        self.assertTrue(self.handshake.advance(self.buffer))
+        self.assertEqual(bytes(self.buffer.peek()), frame)
+
+    def test_client_without_version(self):
+        frame = struct.pack('<I', 5) + b"\x01\x00@\x00\x00"
+        self.buffer.write(frame)
+        self.assertTrue(self.handshake.advance(self.buffer))
+        self.assertIsNone(self.handshake.client_version)
+        self.assertEqual(bytes(self.buffer.peek()), frame)
+
+
+class HandshakeTimeoutTest(unittest.TestCase):
+    """Clients that never send their version are dropped, by either connection engine."""
+
+    manager_class = ConnectionManager
+
+    def setUp(self):
+        set_debug_enabled(False)
+        error_handler = ErrorHandler(log_to_file=False)
+        registry = Registry(error_handler)
+        registry.init()
+
+        port = _free_port()
+
+        class TestConfig(Config):
+            server_host = "127.0.0.1"
+            server_port = port
+
+        config = TestConfig()
+        config.handshake_timeout = 0.3
+        config.max_connections = 1
+        self.address = ("127.0.0.1", port)
+        self.disconnected = threading.Event()
+
+        self.manager = self.manager_class(config, error_handler, registry)
+        self.manager.set_connection_callbacks(on_disconnected=lambda client_handler: self.disconnected.set())
+        self.assertTrue(self.manager.start())
+        self.addCleanup(self.manager.stop)
+
+    def connect(self) -> socket.socket:
+        client = socket.create_connection(self.address)
+        self.addCleanup(client.close)
+        return client
+
+    def test_silent_client_is_dropped(self):
+        client = self.connect()
+        started = time.monotonic()
+        self.assertEqual(_recv_until_closed(client), PacketProcessor.create_version_packet())
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertTrue(self.disconnected.wait(5.0))
+        self.assertEqual(self.manager.get_connection_count(), 0)
+
+    def test_client_over_the_limit_is_rejected(self):
+        first = self.connect()
+        first.sendall(PacketProcessor.create_version_packet())
+        first.settimeout(5.0)
+        self.assertEqual(first.recv(4096), PacketProcessor.create_version_packet())
+
+        self.assertEqual(_recv_until_closed(self.connect()), b"")
+        self.assertEqual(self.manager.get_connection_count(), 1)
+
+        first.close()
+        self.assertTrue(self.disconnected.wait(5.0))
+        self.assertEqual(self.manager.get_connection_count(), 0)
+
+
+class AsyncHandshakeTimeoutTest(HandshakeTimeoutTest):
+    manager_class = AsyncConnectionManager
+
+
+if __name__ == '__main__':
+    unittest.main()